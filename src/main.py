@@ -1,11 +1,13 @@
 import os
 import sys
+import click
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_login import LoginManager
 from flask_cors import CORS
+from sqlalchemy import event
 from src.models.user import User, db
 from src.models.product import Product, Category
 from src.models.supplier import Supplier
@@ -16,6 +18,15 @@ from src.models.flavor import Flavor, ProductFlavor
 from src.models.stock_transfer import StockTransfer, StockTransferItem
 from src.models.sale import Sale, SaleItem
 from src.models.grn import GRN, GRNItem
+from src.models.stock_level import StockLevel
+from src.models.sales_daily import SalesDaily, SalesDailyPayment
+from src.models.inventory_checkpoint import InventoryCheckpoint, InventoryCheckpointLine
+from src.models.document_sequence import DocumentSequence
+from src.models.idempotency_key import IdempotencyKey
+from src.models.document_job import DocumentJob
+from src.models.migrations import run_migrations
+from src.services.valuation import checkpoint_due, take_checkpoint
+from src.services.bulk_invoices import fail_stale_jobs
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.products import products_bp
@@ -31,6 +42,7 @@ from src.routes.stock_transfers import stock_transfers_bp
 from src.routes.sales import sales_bp
 from src.routes.grn import grn_bp
 from src.routes.invoices import invoices_bp
+from src.routes.exports import exports_bp
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
@@ -44,7 +56,7 @@ login_manager.login_view = 'auth.login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 # Register blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -62,15 +74,62 @@ app.register_blueprint(stock_transfers_bp, url_prefix='/api')
 app.register_blueprint(sales_bp, url_prefix='/api')
 app.register_blueprint(grn_bp, url_prefix='/api')
 app.register_blueprint(invoices_bp, url_prefix='/api')
+app.register_blueprint(exports_bp, url_prefix='/api')
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Batch allocation for sales and transfers: 'fifo' (date received) or 'fefo' (earliest expiry)
+app.config['STOCK_ALLOCATION_POLICY'] = os.environ.get('STOCK_ALLOCATION_POLICY', 'fifo')
+# Hours between scheduled inventory checkpoints for point-in-time valuation
+app.config['INVENTORY_CHECKPOINT_INTERVAL_HOURS'] = float(os.environ.get('INVENTORY_CHECKPOINT_INTERVAL_HOURS', 24))
+# Invoice, GRN and transfer numbers each worker reserves per database round trip
+app.config['DOCUMENT_NUMBER_BLOCK_SIZE'] = int(os.environ.get('DOCUMENT_NUMBER_BLOCK_SIZE', 50))
+# How long a stored Idempotency-Key response can be replayed
+app.config['IDEMPOTENCY_KEY_TTL_HOURS'] = float(os.environ.get('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+# Seconds after which an unfinished reservation counts as abandoned and a retry may take it over
+app.config['IDEMPOTENCY_LEASE_SECONDS'] = float(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', 60))
+# Rendered invoice and receipt PDFs, evicted least recently used past the size bound
+app.config['DOCUMENT_CACHE_DIR'] = os.environ.get(
+    'DOCUMENT_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'database', 'document_cache')
+)
+app.config['DOCUMENT_CACHE_MAX_BYTES'] = int(os.environ.get('DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Bulk invoice jobs: output location, how long outputs are kept, and render processes (default: one per CPU)
+app.config['BULK_DOCUMENT_DIR'] = os.environ.get(
+    'BULK_DOCUMENT_DIR', os.path.join(os.path.dirname(__file__), 'database', 'bulk_documents')
+)
+app.config['BULK_DOCUMENT_TTL_HOURS'] = float(os.environ.get('BULK_DOCUMENT_TTL_HOURS', 24))
+app.config['BULK_RENDER_WORKERS'] = int(os.environ.get('BULK_RENDER_WORKERS', 0)) or None
+# Minutes without progress after which a pending or running bulk job counts as dead
+app.config['BULK_JOB_STALE_MINUTES'] = float(os.environ.get('BULK_JOB_STALE_MINUTES', 10))
+# Report response cache: 'sqlite' (shared by every worker, at REPORT_CACHE_PATH), 'memory' (per
+# worker; only safe with a single worker, as other workers' writes cannot invalidate it) or 'none'
+app.config['REPORT_CACHE_BACKEND'] = os.environ.get('REPORT_CACHE_BACKEND', 'sqlite')
+app.config['REPORT_CACHE_PATH'] = os.environ.get(
+    'REPORT_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'database', 'report_cache.db')
+)
+app.config['REPORT_CACHE_TTL_SECONDS'] = float(os.environ.get('REPORT_CACHE_TTL_SECONDS', 300))
+app.config['REPORT_CACHE_MAX_ENTRIES'] = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 500))
+# Seconds a cache lookup or invalidation waits on a locked report_cache.db before skipping it
+app.config['REPORT_CACHE_TIMEOUT_SECONDS'] = float(os.environ.get('REPORT_CACHE_TIMEOUT_SECONDS', 0.25))
 db.init_app(app)
 
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside a checkout's write. synchronous stays at FULL:
+    # a sale that was acknowledged must survive a power cut
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.close()
+
 # Create tables and initial admin user
 with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', _sqlite_pragmas)
     db.create_all()
+    for version, description in run_migrations():
+        print(f"Applied schema migration {version}: {description}")
     
     # Create initial admin user if no users exist
     if User.query.count() == 0:
@@ -84,6 +143,40 @@ with app.app_context():
         db.session.commit()
         print("Created initial admin user: admin / admin123")
 
+    # Bulk jobs run on threads, so any left running by a process that exited are dead
+    stale_jobs = fail_stale_jobs()
+    db.session.commit()
+    if stale_jobs:
+        print(f"Marked {stale_jobs} stale bulk document jobs as failed")
+
+@app.cli.command('rebuild-stock-levels')
+def rebuild_stock_levels():
+    """Recompute the stock_levels table from inventory"""
+    count = StockLevel.rebuild()
+    db.session.commit()
+    print(f"Rebuilt {count} stock levels")
+
+@app.cli.command('rebuild-sales-daily')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']), help='Only rebuild days from this date on')
+def rebuild_sales_daily(since):
+    """Recompute the sales_daily and sales_daily_payments rollups from sale history"""
+    start_date = since.date() if since else None
+    count = SalesDaily.rebuild(start_date=start_date)
+    payment_count = SalesDailyPayment.rebuild(start_date=start_date)
+    db.session.commit()
+    print(f"Rebuilt {count} sales_daily rows and {payment_count} sales_daily_payments rows")
+
+@app.cli.command('inventory-checkpoint')
+@click.option('--force', is_flag=True, help='Take a checkpoint even if one is not due yet')
+def inventory_checkpoint(force):
+    """Snapshot inventory for point-in-time valuation; run from cron at any rate"""
+    if not force and not checkpoint_due():
+        print("Inventory checkpoint not due yet")
+        return
+    checkpoint = take_checkpoint(notes='Scheduled checkpoint')
+    db.session.commit()
+    print(f"Took inventory checkpoint {checkpoint.id} of {checkpoint.batch_count} batches")
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
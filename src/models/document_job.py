@@ -0,0 +1,44 @@
+from src.models.user import db
+from datetime import datetime
+
+class DocumentJob(db.Model):
+    """Background bulk rendering job and its progress.
+
+    Kept in the database so any worker can report on a job another worker runs;
+    see src/services/bulk_invoices.py.
+    """
+    __tablename__ = 'document_jobs'
+    __table_args__ = (
+        db.Index('ix_document_jobs_created_at', 'created_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    document_type = db.Column(db.String(20), nullable=False, default='invoice')
+    output_format = db.Column(db.String(10), nullable=False)  # zip, pdf
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(500))
+    error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last progress report
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'document_type': self.document_type,
+            'output_format': self.output_format,
+            'status': self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'progress': round(self.completed / self.total * 100, 1) if self.total else 100.0,
+            'error': self.error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<DocumentJob {self.id} {self.status} {self.completed}/{self.total}>'
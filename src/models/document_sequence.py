@@ -0,0 +1,30 @@
+from src.models.user import db
+from datetime import datetime
+
+class DocumentSequence(db.Model):
+    """Next unreserved number per document type and store.
+
+    Workers reserve numbers from here in blocks; see src/services/numbering.py.
+    """
+    __tablename__ = 'document_sequences'
+    __table_args__ = (
+        db.UniqueConstraint('document_type', 'store_id', name='uq_document_sequences_type_store'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    document_type = db.Column(db.String(20), nullable=False)  # invoice, grn, transfer
+    store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=False)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'document_type': self.document_type,
+            'store_id': self.store_id,
+            'next_value': self.next_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<DocumentSequence {self.document_type} store={self.store_id}: {self.next_value}>'
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class GRN(db.Model):
     __tablename__ = 'grns'
+    __table_args__ = (
+        db.Index('ix_grns_received_date', 'received_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     grn_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -55,6 +58,10 @@ class GRN(db.Model):
 
 class GRNItem(db.Model):
     __tablename__ = 'grn_items'
+    __table_args__ = (
+        # Line lookup by GRN; also covers the summary view's line counts
+        db.Index('ix_grn_items_grn_quantity', 'grn_id', 'quantity_received'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     grn_id = db.Column(db.Integer, db.ForeignKey('grns.id'), nullable=False)
@@ -0,0 +1,23 @@
+from src.models.user import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a create request sent with an Idempotency-Key header"""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'scope', 'key', name='uq_idempotency_keys_user_scope_key'),
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    scope = db.Column(db.String(50), nullable=False)  # sales, grns, stock-transfers
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # NULL while the original request is still running
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.scope} {self.key}: {self.status_code}>'
@@ -3,6 +3,16 @@ from datetime import datetime, date
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        # FIFO batch lookup for sales and transfers; only sellable batches are indexed
+        db.Index(
+            'ix_inventory_fifo_available', 'product_id', 'store_id', 'date_received',
+            sqlite_where=db.text('is_active = 1 AND quantity > 0')
+        ),
+        db.Index('ix_inventory_expiration_date', 'expiration_date'),
+        db.Index('ix_inventory_store_expiration', 'store_id', 'expiration_date'),
+        db.Index('ix_inventory_product_expiration', 'product_id', 'expiration_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
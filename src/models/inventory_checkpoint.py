@@ -0,0 +1,68 @@
+from src.models.user import db
+from datetime import datetime
+
+class InventoryCheckpoint(db.Model):
+    """Snapshot of every inventory batch at one instant.
+
+    Point-in-time stock is rebuilt from the checkpoint nearest to the requested
+    date plus the transaction ledger between the two.
+    """
+    __tablename__ = 'inventory_checkpoints'
+    __table_args__ = (
+        db.Index('ix_inventory_checkpoints_taken_at', 'taken_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    batch_count = db.Column(db.Integer, nullable=False, default=0)
+    # Newest ledger row reflected in the snapshot; replay starts after it
+    last_transaction_id = db.Column(db.Integer)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    notes = db.Column(db.Text)
+
+    # Relationships
+    lines = db.relationship('InventoryCheckpointLine', backref='checkpoint', lazy='dynamic', cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'taken_at': self.taken_at.isoformat() if self.taken_at else None,
+            'batch_count': self.batch_count,
+            'last_transaction_id': self.last_transaction_id,
+            'created_by': self.created_by,
+            'notes': self.notes
+        }
+
+    def __repr__(self):
+        return f'<InventoryCheckpoint {self.id} at {self.taken_at}>'
+
+class InventoryCheckpointLine(db.Model):
+    __tablename__ = 'inventory_checkpoint_lines'
+    __table_args__ = (
+        db.Index('uq_inventory_checkpoint_lines_batch', 'checkpoint_id', 'inventory_id', unique=True),
+        db.Index('ix_inventory_checkpoint_lines_store', 'checkpoint_id', 'store_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    checkpoint_id = db.Column(db.Integer, db.ForeignKey('inventory_checkpoints.id'), nullable=False)
+    inventory_id = db.Column(db.Integer, db.ForeignKey('inventory.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    product_flavor_id = db.Column(db.Integer, db.ForeignKey('product_flavors.id'))
+    store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_cost = db.Column(db.Numeric(10, 2))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'checkpoint_id': self.checkpoint_id,
+            'inventory_id': self.inventory_id,
+            'product_id': self.product_id,
+            'product_flavor_id': self.product_flavor_id,
+            'store_id': self.store_id,
+            'quantity': self.quantity,
+            'unit_cost': float(self.unit_cost) if self.unit_cost else 0
+        }
+
+    def __repr__(self):
+        return f'<InventoryCheckpointLine checkpoint={self.checkpoint_id} batch={self.inventory_id}: {self.quantity}>'
@@ -0,0 +1,88 @@
+from sqlalchemy.orm import joinedload, selectinload
+from src.models.inventory import Inventory
+from src.models.flavor import ProductFlavor
+from src.models.sale import Sale, SaleItem
+from src.models.grn import GRN, GRNItem
+from src.models.stock_transfer import StockTransfer, StockTransferItem
+from src.models.transaction import Transaction
+
+# Named eager-loading bundles matching what each to_dict() touches. List
+# endpoints apply one before serializing, so a page costs a fixed number of
+# queries instead of one lazy SELECT per relationship per row. Many-to-one
+# links are joined; collections use selectin so pagination stays row-exact.
+# Backref attributes only exist once mappers are configured, hence builders.
+
+def _inventory_list():
+    return (
+        joinedload(Inventory.product),
+        joinedload(Inventory.product_flavor).joinedload(ProductFlavor.flavor),
+        joinedload(Inventory.store),
+        joinedload(Inventory.supplier),
+        joinedload(Inventory.grn),
+    )
+
+def _sale_with_items():
+    return (
+        joinedload(Sale.store),
+        joinedload(Sale.creator),
+        selectinload(Sale.sale_items).options(
+            joinedload(SaleItem.product),
+            joinedload(SaleItem.product_flavor).joinedload(ProductFlavor.flavor),
+            joinedload(SaleItem.inventory),
+        ),
+    )
+
+def _sale_receipt():
+    # A single sale, so the items are joined too and the receipt is one SELECT
+    return (
+        joinedload(Sale.store),
+        joinedload(Sale.sale_items).options(
+            joinedload(SaleItem.product),
+            joinedload(SaleItem.product_flavor).joinedload(ProductFlavor.flavor),
+        ),
+    )
+
+def _grn_with_items():
+    return (
+        joinedload(GRN.store),
+        joinedload(GRN.supplier),
+        joinedload(GRN.creator),
+        joinedload(GRN.verifier),
+        selectinload(GRN.grn_items).options(
+            joinedload(GRNItem.product),
+            joinedload(GRNItem.product_flavor).joinedload(ProductFlavor.flavor),
+        ),
+    )
+
+def _transfer_with_items():
+    return (
+        joinedload(StockTransfer.from_store),
+        joinedload(StockTransfer.to_store),
+        joinedload(StockTransfer.creator),
+        joinedload(StockTransfer.approver),
+        selectinload(StockTransfer.transfer_items).options(
+            joinedload(StockTransferItem.product),
+            joinedload(StockTransferItem.product_flavor).joinedload(ProductFlavor.flavor),
+            joinedload(StockTransferItem.inventory),
+        ),
+    )
+
+def _transaction_list():
+    return (
+        joinedload(Transaction.product),
+        joinedload(Transaction.store),
+        joinedload(Transaction.user),
+    )
+
+LOADING_PROFILES = {
+    'inventory_list': _inventory_list,
+    'sale_with_items': _sale_with_items,
+    'sale_receipt': _sale_receipt,
+    'grn_with_items': _grn_with_items,
+    'transfer_with_items': _transfer_with_items,
+    'transaction_list': _transaction_list,
+}
+
+def with_profile(query, name):
+    """Apply a named eager-loading profile to a query"""
+    return query.options(*LOADING_PROFILES[name]())
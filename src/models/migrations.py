@@ -0,0 +1,119 @@
+import re
+from sqlalchemy import text
+from src.models.user import db
+
+# db.create_all() only creates missing tables. It never adds an index or column
+# to a table that already exists, so every schema change that has to reach an
+# existing app.db is listed here. The applied version is kept in SQLite's
+# PRAGMA user_version.
+
+def _backfill_stock_levels(connection):
+    """Populate stock_levels from inventory"""
+    from src.models.stock_level import StockLevel
+    StockLevel.rebuild(connection)
+
+def _backfill_sales_daily(connection):
+    """Populate sales_daily from sale history"""
+    from src.models.sales_daily import SalesDaily
+    SalesDaily.rebuild(connection)
+
+def _backfill_sales_daily_payments(connection):
+    """Populate sales_daily_payments from sale history"""
+    from src.models.sales_daily import SalesDailyPayment
+    SalesDailyPayment.rebuild(connection)
+
+_ADJUSTMENT_NOTE = re.compile(r'Quantity adjusted from (-?\d+) to (-?\d+)')
+
+def _sign_legacy_ledger_rows(connection):
+    """Give ledger rows written before quantities were signed their sign.
+
+    Adjustments stored the size of the change; their notes still record the
+    quantity it went from and to. Single-batch sales stored the quantity sold as
+    a positive number, and no sale adds stock.
+    """
+    updates = []
+    for transaction_id, quantity, notes in connection.execute(text(
+        "SELECT id, quantity, notes FROM transactions "
+        "WHERE transaction_type = 'adjustment' AND notes LIKE 'Quantity adjusted from %'"
+    )):
+        match = _ADJUSTMENT_NOTE.match(notes)
+        if match and int(match.group(2)) - int(match.group(1)) != quantity:
+            updates.append({'id': transaction_id, 'quantity': int(match.group(2)) - int(match.group(1))})
+    if updates:
+        connection.execute(text('UPDATE transactions SET quantity = :quantity WHERE id = :id'), updates)
+    connection.execute(text("UPDATE transactions SET quantity = -quantity WHERE transaction_type = 'sale' AND quantity > 0"))
+
+def _create_model_indexes(*table_names):
+    """Migration step that creates every index the models declare on the given tables"""
+    def step(connection):
+        for table_name in table_names:
+            for index in db.metadata.tables[table_name].indexes:
+                index.create(connection, checkfirst=True)
+    return step
+
+def _recreate_model_indexes(table_name, *index_names):
+    """Migration step that rebuilds indexes whose declared columns have changed"""
+    def step(connection):
+        for index in db.metadata.tables[table_name].indexes:
+            if index.name in index_names:
+                connection.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+                index.create(connection)
+    return step
+
+def _add_model_columns(table_name, *column_names):
+    """Migration step that adds columns the model declares but the table lacks"""
+    def step(connection):
+        existing = {row[1] for row in connection.execute(text(f'PRAGMA table_info({table_name})'))}
+        table = db.metadata.tables[table_name]
+        for name in column_names:
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+    return step
+
+def _drop_columns(table_name, *column_names):
+    """Migration step that drops columns the model no longer declares"""
+    def step(connection):
+        existing = {row[1] for row in connection.execute(text(f'PRAGMA table_info({table_name})'))}
+        for name in column_names:
+            if name in existing:
+                connection.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {name}'))
+    return step
+
+MIGRATIONS = [
+    (1, 'Backfill stock_levels', _backfill_stock_levels),
+    (2, 'Access-path indexes on inventory, transactions and sales',
+     _create_model_indexes('inventory', 'transactions', 'sales')),
+    (3, 'Keyset pagination indexes on inventory, grns and stock_transfers',
+     _create_model_indexes('inventory', 'grns', 'stock_transfers')),
+    (4, 'Covering indexes for the sales summary', _create_model_indexes('sales', 'sale_items')),
+    (5, 'Backfill sales_daily', _backfill_sales_daily),
+    (6, 'Line indexes on grn_items and stock_transfer_items',
+     _create_model_indexes('grn_items', 'stock_transfer_items')),
+    (7, 'Ledger position on inventory_checkpoints',
+     _add_model_columns('inventory_checkpoints', 'last_transaction_id')),
+    (8, 'Backfill sales_daily_payments', _backfill_sales_daily_payments),
+    (9, 'Flavor column in the sale_items covering index',
+     _recreate_model_indexes('sale_items', 'ix_sale_items_sale_totals')),
+    # 10 added an insert sentinel column to sale_items, which 12 drops again
+    (10, 'Insert sentinel on sale_items', _drop_columns('sale_items', 'insert_sentinel')),
+    (11, 'Progress heartbeat on document_jobs', _add_model_columns('document_jobs', 'updated_at')),
+    (12, 'Drop the insert sentinel from sale_items', _drop_columns('sale_items', 'insert_sentinel')),
+    (13, 'Sign legacy adjustment and sale ledger rows', _sign_legacy_ledger_rows),
+]
+
+def get_schema_version(connection):
+    """Get the schema version recorded in the database"""
+    return connection.execute(text('PRAGMA user_version')).scalar()
+
+def run_migrations():
+    """Apply every migration newer than the database's schema version, each in its own transaction"""
+    applied = []
+    for version, description, step in MIGRATIONS:
+        with db.engine.begin() as connection:
+            if get_schema_version(connection) >= version:
+                continue
+            step(connection)
+            connection.execute(text(f'PRAGMA user_version = {int(version)}'))
+        applied.append((version, description))
+    return applied
@@ -73,22 +73,22 @@ class Product(db.Model):
     
     def get_total_quantity(self, store_id=None):
         """Get total quantity across all inventory items"""
-        query = self.inventory_items
-        if store_id:
-            query = [item for item in query if item.store_id == store_id]
-        return sum(item.quantity for item in query)
+        from src.models.stock_level import StockLevel
+        return StockLevel.quantity_for(self.id, store_id=store_id)
     
     def get_quantity_by_flavor(self, flavor_id, store_id=None):
         """Get quantity for a specific flavor"""
-        from src.models.inventory import Inventory
+        from src.models.stock_level import StockLevel
         from src.models.flavor import ProductFlavor
-        query = Inventory.query.join(ProductFlavor).filter(
-            Inventory.product_id == self.id,
+        query = db.session.query(db.func.coalesce(db.func.sum(StockLevel.quantity), 0)).join(
+            ProductFlavor, StockLevel.product_flavor_id == ProductFlavor.id
+        ).filter(
+            StockLevel.product_id == self.id,
             ProductFlavor.flavor_id == flavor_id
         )
         if store_id:
-            query = query.filter(Inventory.store_id == store_id)
-        return sum(item.quantity for item in query)
+            query = query.filter(StockLevel.store_id == store_id)
+        return query.scalar()
     
     def is_low_stock(self, store_id=None):
         """Check if product is below reorder point"""
@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Sale(db.Model):
     __tablename__ = 'sales'
+    __table_args__ = (
+        db.Index('ix_sales_sale_date', 'sale_date'),
+        db.Index('ix_sales_store_date', 'store_id', 'sale_date'),
+        # Covers the sales summary's grouped pass over a date range
+        db.Index('ix_sales_date_payment', 'sale_date', 'payment_method', 'total_amount'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     invoice_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -21,7 +27,7 @@ class Sale(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
     # Relationships
-    sale_items = db.relationship('SaleItem', backref='sale', lazy=True, cascade='all, delete-orphan')
+    sale_items = db.relationship('SaleItem', backref='sale', lazy=True, cascade='all, delete-orphan', order_by='SaleItem.id')
     creator = db.relationship('User', backref='sales_created')
     
     def to_dict(self):
@@ -56,6 +62,14 @@ class Sale(db.Model):
 
 class SaleItem(db.Model):
     __tablename__ = 'sale_items'
+    __table_args__ = (
+        # Line lookup by sale; also covers the columns the sales summary and the
+        # rollup's same-day pass aggregate, so neither is tempted to scan every line
+        db.Index(
+            'ix_sale_items_sale_totals',
+            'sale_id', 'product_id', 'product_flavor_id', 'quantity', 'line_total', 'unit_cost'
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.id'), nullable=False)
@@ -0,0 +1,242 @@
+from src.models.user import db
+from src.models.sale import Sale, SaleItem
+from datetime import datetime
+from sqlalchemy import bindparam, func, select, tuple_
+
+class SalesDaily(db.Model):
+    """Net sales per day, store, product and flavor.
+
+    Updated in the same transaction as every sale and void (see
+    src/services/sales_rollup.py), so dashboards can read whole days from here
+    instead of scanning sales. Voided sales are not counted.
+    """
+    __tablename__ = 'sales_daily'
+    __table_args__ = (
+        db.Index('ix_sales_daily_store_date', 'store_id', 'sale_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sale_date = db.Column(db.Date, nullable=False)
+    store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    product_flavor_id = db.Column(db.Integer, db.ForeignKey('product_flavors.id'))
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Sum of line totals
+    cost = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Sum of unit cost x quantity
+    sale_count = db.Column(db.Integer, nullable=False, default=0)  # Sales that included this product / flavor
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sale_date': self.sale_date.isoformat() if self.sale_date else None,
+            'store_id': self.store_id,
+            'product_id': self.product_id,
+            'product_flavor_id': self.product_flavor_id,
+            'quantity': self.quantity,
+            'revenue': float(self.revenue) if self.revenue else 0,
+            'cost': float(self.cost) if self.cost else 0,
+            'sale_count': self.sale_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Add deltas keyed by (sale_date, store_id, product_id, product_flavor_id).
+
+        Each delta is a [quantity, revenue, cost, sale_count] list. Existing keys are
+        found with one SELECT, then updated and inserted with one executemany
+        statement each.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        table = cls.__table__
+        now = datetime.utcnow()
+        existing = {
+            (row.sale_date, row.store_id, row.product_id, row.product_flavor_id): row.id
+            for row in connection.execute(
+                select(table.c.id, table.c.sale_date, table.c.store_id, table.c.product_id, table.c.product_flavor_id).where(
+                    tuple_(table.c.sale_date, table.c.store_id).in_({key[:2] for key in deltas}),
+                    table.c.product_id.in_({key[2] for key in deltas})
+                )
+            )
+        }
+
+        updates = [
+            {'row_id': existing[key], 'd_quantity': quantity, 'd_revenue': revenue, 'd_cost': cost, 'd_sale_count': sale_count, 'now': now}
+            for key, (quantity, revenue, cost, sale_count) in deltas.items() if key in existing
+        ]
+        inserts = [
+            {
+                'sale_date': key[0], 'store_id': key[1], 'product_id': key[2], 'product_flavor_id': key[3],
+                'quantity': quantity, 'revenue': revenue, 'cost': cost, 'sale_count': sale_count, 'updated_at': now
+            }
+            for key, (quantity, revenue, cost, sale_count) in deltas.items() if key not in existing
+        ]
+        if updates:
+            connection.execute(
+                table.update()
+                .where(table.c.id == bindparam('row_id'))
+                .values(
+                    quantity=table.c.quantity + bindparam('d_quantity'),
+                    revenue=table.c.revenue + bindparam('d_revenue'),
+                    cost=table.c.cost + bindparam('d_cost'),
+                    sale_count=table.c.sale_count + bindparam('d_sale_count'),
+                    updated_at=bindparam('now')
+                ),
+                updates
+            )
+        if inserts:
+            connection.execute(table.insert(), inserts)
+
+    @classmethod
+    def rebuild(cls, connection=None, start_date=None):
+        """Recompute the rollup from sale lines, for every day or from start_date on"""
+        table = cls.__table__
+        executor = connection if connection is not None else db.session
+        delete = table.delete()
+        lines = select(
+            func.date(Sale.sale_date).label('sale_date'),
+            Sale.store_id,
+            SaleItem.product_id,
+            SaleItem.product_flavor_id,
+            func.sum(SaleItem.quantity),
+            func.coalesce(func.sum(SaleItem.line_total), 0),
+            func.coalesce(func.sum(SaleItem.unit_cost * SaleItem.quantity), 0),
+            func.count(func.distinct(Sale.id)),
+            func.current_timestamp()
+        ).join(Sale, Sale.id == SaleItem.sale_id).where(
+            Sale.payment_status != 'voided'
+        ).group_by(
+            func.date(Sale.sale_date), Sale.store_id, SaleItem.product_id, SaleItem.product_flavor_id
+        )
+        if start_date:
+            delete = delete.where(table.c.sale_date >= start_date)
+            lines = lines.where(Sale.sale_date >= datetime.combine(start_date, datetime.min.time()))
+        executor.execute(delete)
+        executor.execute(table.insert().from_select(
+            ['sale_date', 'store_id', 'product_id', 'product_flavor_id', 'quantity', 'revenue', 'cost', 'sale_count', 'updated_at'],
+            lines
+        ))
+        return executor.execute(select(func.count()).select_from(table)).scalar()
+
+    def __repr__(self):
+        return f'<SalesDaily {self.sale_date} store={self.store_id} product={self.product_id} flavor={self.product_flavor_id}>'
+
+# One row per key; flavorless sales are stored with a NULL flavor, so fold it to 0 for uniqueness
+db.Index(
+    'uq_sales_daily_key',
+    SalesDaily.sale_date, SalesDaily.store_id, SalesDaily.product_id, func.coalesce(SalesDaily.product_flavor_id, 0),
+    unique=True
+)
+
+class SalesDailyPayment(db.Model):
+    """Net sale count and takings per day, store and payment method.
+
+    The header-level companion to SalesDaily: sale totals include tax and
+    discounts that the per-product lines do not, so they are rolled up on their
+    own. Maintained alongside SalesDaily; voided sales are not counted.
+    """
+    __tablename__ = 'sales_daily_payments'
+    __table_args__ = (
+        db.Index('ix_sales_daily_payments_store_date', 'store_id', 'sale_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    sale_date = db.Column(db.Date, nullable=False)
+    store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=False)
+    payment_method = db.Column(db.String(20))
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Sum of sale totals
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sale_date': self.sale_date.isoformat() if self.sale_date else None,
+            'store_id': self.store_id,
+            'payment_method': self.payment_method,
+            'sale_count': self.sale_count,
+            'total_amount': float(self.total_amount) if self.total_amount else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Add [sale_count, total_amount] deltas keyed by (sale_date, store_id, payment_method)"""
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        table = cls.__table__
+        now = datetime.utcnow()
+        existing = {
+            (row.sale_date, row.store_id, row.payment_method): row.id
+            for row in connection.execute(
+                select(table.c.id, table.c.sale_date, table.c.store_id, table.c.payment_method).where(
+                    tuple_(table.c.sale_date, table.c.store_id).in_({key[:2] for key in deltas})
+                )
+            )
+        }
+
+        updates = [
+            {'row_id': existing[key], 'd_sale_count': sale_count, 'd_total_amount': total_amount, 'now': now}
+            for key, (sale_count, total_amount) in deltas.items() if key in existing
+        ]
+        inserts = [
+            {
+                'sale_date': key[0], 'store_id': key[1], 'payment_method': key[2],
+                'sale_count': sale_count, 'total_amount': total_amount, 'updated_at': now
+            }
+            for key, (sale_count, total_amount) in deltas.items() if key not in existing
+        ]
+        if updates:
+            connection.execute(
+                table.update()
+                .where(table.c.id == bindparam('row_id'))
+                .values(
+                    sale_count=table.c.sale_count + bindparam('d_sale_count'),
+                    total_amount=table.c.total_amount + bindparam('d_total_amount'),
+                    updated_at=bindparam('now')
+                ),
+                updates
+            )
+        if inserts:
+            connection.execute(table.insert(), inserts)
+
+    @classmethod
+    def rebuild(cls, connection=None, start_date=None):
+        """Recompute the rollup from sale headers, for every day or from start_date on"""
+        table = cls.__table__
+        executor = connection if connection is not None else db.session
+        delete = table.delete()
+        headers = select(
+            func.date(Sale.sale_date).label('sale_date'),
+            Sale.store_id,
+            Sale.payment_method,
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.current_timestamp()
+        ).where(
+            Sale.payment_status != 'voided'
+        ).group_by(
+            func.date(Sale.sale_date), Sale.store_id, Sale.payment_method
+        )
+        if start_date:
+            delete = delete.where(table.c.sale_date >= start_date)
+            headers = headers.where(Sale.sale_date >= datetime.combine(start_date, datetime.min.time()))
+        executor.execute(delete)
+        executor.execute(table.insert().from_select(
+            ['sale_date', 'store_id', 'payment_method', 'sale_count', 'total_amount', 'updated_at'],
+            headers
+        ))
+        return executor.execute(select(func.count()).select_from(table)).scalar()
+
+    def __repr__(self):
+        return f'<SalesDailyPayment {self.sale_date} store={self.store_id} method={self.payment_method}>'
+
+db.Index(
+    'uq_sales_daily_payments_key',
+    SalesDailyPayment.sale_date, SalesDailyPayment.store_id, func.coalesce(SalesDailyPayment.payment_method, ''),
+    unique=True
+)
@@ -0,0 +1,161 @@
+from src.models.user import db
+from src.models.inventory import Inventory
+from datetime import datetime
+from sqlalchemy import bindparam, event, func, select
+from sqlalchemy.orm import Session
+
+class StockLevel(db.Model):
+    """Materialized on-hand quantity per product / flavor / store.
+
+    Kept in step with ``inventory.quantity`` by the flush hook below, so every
+    route that changes a batch updates this table in the same transaction.
+    """
+    __tablename__ = 'stock_levels'
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    product_flavor_id = db.Column(db.Integer, db.ForeignKey('product_flavors.id'))
+    store_id = db.Column(db.Integer, db.ForeignKey('stores.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'product_flavor_id': self.product_flavor_id,
+            'store_id': self.store_id,
+            'quantity': self.quantity,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @classmethod
+    def quantity_for(cls, product_id, store_id=None, product_flavor_id=None):
+        """Get on-hand quantity for a product, optionally narrowed to a store and flavor"""
+        query = db.session.query(func.coalesce(func.sum(cls.quantity), 0)).filter(cls.product_id == product_id)
+        if store_id:
+            query = query.filter(cls.store_id == store_id)
+        if product_flavor_id:
+            query = query.filter(cls.product_flavor_id == product_flavor_id)
+        return query.scalar()
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas):
+        """Add quantity deltas keyed by (product_id, product_flavor_id, store_id).
+
+        Existing keys are found with one SELECT, then updated and inserted with one
+        executemany statement each.
+        """
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        table = cls.__table__
+        now = datetime.utcnow()
+        existing = {
+            (row.product_id, row.product_flavor_id, row.store_id): row.id
+            for row in connection.execute(
+                select(table.c.id, table.c.product_id, table.c.product_flavor_id, table.c.store_id).where(
+                    table.c.product_id.in_({key[0] for key in deltas}),
+                    table.c.store_id.in_({key[2] for key in deltas})
+                )
+            )
+        }
+
+        updates = [
+            {'level_id': existing[key], 'delta': delta, 'now': now}
+            for key, delta in deltas.items() if key in existing
+        ]
+        inserts = [
+            {'product_id': key[0], 'product_flavor_id': key[1], 'store_id': key[2], 'quantity': delta, 'updated_at': now}
+            for key, delta in deltas.items() if key not in existing
+        ]
+        if updates:
+            connection.execute(
+                table.update()
+                .where(table.c.id == bindparam('level_id'))
+                .values(quantity=table.c.quantity + bindparam('delta'), updated_at=bindparam('now')),
+                updates
+            )
+        if inserts:
+            connection.execute(table.insert(), inserts)
+
+    @classmethod
+    def rebuild(cls, connection=None):
+        """Recompute every stock level from the inventory table"""
+        table = cls.__table__
+        executor = connection if connection is not None else db.session
+        executor.execute(table.delete())
+        executor.execute(table.insert().from_select(
+            ['product_id', 'product_flavor_id', 'store_id', 'quantity', 'updated_at'],
+            select(
+                Inventory.product_id,
+                Inventory.product_flavor_id,
+                Inventory.store_id,
+                func.sum(Inventory.quantity),
+                func.current_timestamp()
+            ).group_by(Inventory.product_id, Inventory.product_flavor_id, Inventory.store_id)
+        ))
+        return executor.execute(select(func.count()).select_from(table)).scalar()
+
+    def __repr__(self):
+        return f'<StockLevel product={self.product_id} flavor={self.product_flavor_id} store={self.store_id}: {self.quantity}>'
+
+# One row per key; flavorless stock is stored with a NULL flavor, so fold it to 0 for uniqueness
+db.Index(
+    'uq_stock_levels_key',
+    StockLevel.product_id, StockLevel.store_id, func.coalesce(StockLevel.product_flavor_id, 0),
+    unique=True
+)
+
+def _inventory_key(inventory, attr_state=None):
+    """Stock level key for an inventory row, using committed values when given attribute history"""
+    if attr_state is None:
+        return (inventory.product_id, inventory.product_flavor_id, inventory.store_id)
+    return tuple(attr_state[name] for name in ('product_id', 'product_flavor_id', 'store_id'))
+
+STOCK_COLUMNS = ('product_id', 'product_flavor_id', 'store_id', 'quantity')
+
+def _stock_changed(inventory):
+    """Whether this flush changes any column the stock level depends on"""
+    attrs = db.inspect(inventory).attrs
+    return any(attrs[name].history.has_changes() for name in STOCK_COLUMNS)
+
+def _previous_values(inventory):
+    """Values of the stock-relevant columns before this flush"""
+    state = db.inspect(inventory)
+    previous = {}
+    for name in STOCK_COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            previous[name] = history.deleted[0]
+        elif history.unchanged:
+            previous[name] = history.unchanged[0]
+        else:
+            previous[name] = getattr(inventory, name)
+    return previous
+
+@event.listens_for(Session, 'after_flush', propagate=True)
+def _sync_stock_levels(session, flush_context):
+    """Fold every inventory insert, quantity change and delete into stock_levels"""
+    deltas = {}
+
+    def add(key, delta):
+        deltas[key] = deltas.get(key, 0) + (delta or 0)
+
+    for obj in session.new:
+        if isinstance(obj, Inventory):
+            add(_inventory_key(obj), obj.quantity)
+    for obj in session.dirty:
+        # Checking the stock columns alone is cheaper than session.is_modified(),
+        # which diffs every attribute, and edits to anything else leave the level alone
+        if isinstance(obj, Inventory) and _stock_changed(obj):
+            previous = _previous_values(obj)
+            add(_inventory_key(obj, previous), -(previous['quantity'] or 0))
+            add(_inventory_key(obj), obj.quantity)
+    for obj in session.deleted:
+        if isinstance(obj, Inventory):
+            previous = _previous_values(obj)
+            add(_inventory_key(obj, previous), -(previous['quantity'] or 0))
+
+    if any(deltas.values()):
+        StockLevel.apply_deltas(session.connection(), deltas)
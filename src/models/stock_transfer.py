@@ -3,6 +3,9 @@ from datetime import datetime
 
 class StockTransfer(db.Model):
     __tablename__ = 'stock_transfers'
+    __table_args__ = (
+        db.Index('ix_stock_transfers_transfer_date', 'transfer_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transfer_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -44,6 +47,10 @@ class StockTransfer(db.Model):
 
 class StockTransferItem(db.Model):
     __tablename__ = 'stock_transfer_items'
+    __table_args__ = (
+        # Line lookup by transfer; also covers the summary view's line counts
+        db.Index('ix_stock_transfer_items_transfer_quantity', 'transfer_id', 'quantity'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transfer_id = db.Column(db.Integer, db.ForeignKey('stock_transfers.id'), nullable=False)
@@ -0,0 +1,168 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.supplier import Supplier
+from src.models.sale import Sale, SaleItem
+from src.models.grn import GRN, GRNItem
+from src.models.stock_transfer import StockTransfer, StockTransferItem
+
+# Flat header columns for the `view=summary` list pages. Each view is one
+# column query: many-to-one names are outer-joined and line counts are
+# correlated aggregates over the item table's parent index, so a page is one
+# SELECT however many rows it has. Builders, like the loading profiles, so the
+# aliases are fresh per query.
+
+def _item_totals(item_id, parent_column, quantity_column, parent_id):
+    return {
+        'item_count': select(func.count(item_id)).where(parent_column == parent_id).scalar_subquery(),
+        'total_quantity': select(func.coalesce(func.sum(quantity_column), 0)).where(parent_column == parent_id).scalar_subquery(),
+    }
+
+def _sale_summary():
+    creator = aliased(User)
+    columns = {
+        'id': Sale.id,
+        'invoice_number': Sale.invoice_number,
+        'store_id': Sale.store_id,
+        'store_name': Store.name,
+        'customer_name': Sale.customer_name,
+        'sale_date': Sale.sale_date,
+        'subtotal': Sale.subtotal,
+        'tax_amount': Sale.tax_amount,
+        'discount_amount': Sale.discount_amount,
+        'total_amount': Sale.total_amount,
+        'payment_method': Sale.payment_method,
+        'payment_status': Sale.payment_status,
+        'created_by': Sale.created_by,
+        'creator_name': creator.username,
+        **_item_totals(SaleItem.id, SaleItem.sale_id, SaleItem.quantity, Sale.id),
+    }
+    joins = [
+        (Store, Store.id == Sale.store_id),
+        (creator, creator.id == Sale.created_by),
+    ]
+    return Sale, columns, joins
+
+def _grn_summary():
+    creator = aliased(User)
+    columns = {
+        'id': GRN.id,
+        'grn_number': GRN.grn_number,
+        'store_id': GRN.store_id,
+        'store_name': Store.name,
+        'supplier_id': GRN.supplier_id,
+        'supplier_name': Supplier.name,
+        'purchase_order_number': GRN.purchase_order_number,
+        'invoice_number': GRN.invoice_number,
+        'received_date': GRN.received_date,
+        'total_amount': GRN.total_amount,
+        'status': GRN.status,
+        'created_by': GRN.created_by,
+        'creator_name': creator.username,
+        'verified_date': GRN.verified_date,
+        **_item_totals(GRNItem.id, GRNItem.grn_id, GRNItem.quantity_received, GRN.id),
+    }
+    joins = [
+        (Store, Store.id == GRN.store_id),
+        (Supplier, Supplier.id == GRN.supplier_id),
+        (creator, creator.id == GRN.created_by),
+    ]
+    return GRN, columns, joins
+
+def _transfer_summary():
+    from_store = aliased(Store)
+    to_store = aliased(Store)
+    creator = aliased(User)
+    columns = {
+        'id': StockTransfer.id,
+        'transfer_number': StockTransfer.transfer_number,
+        'from_store_id': StockTransfer.from_store_id,
+        'from_store_name': from_store.name,
+        'to_store_id': StockTransfer.to_store_id,
+        'to_store_name': to_store.name,
+        'status': StockTransfer.status,
+        'transfer_date': StockTransfer.transfer_date,
+        'completed_date': StockTransfer.completed_date,
+        'created_by': StockTransfer.created_by,
+        'creator_name': creator.username,
+        **_item_totals(StockTransferItem.id, StockTransferItem.transfer_id, StockTransferItem.quantity, StockTransfer.id),
+    }
+    joins = [
+        (from_store, from_store.id == StockTransfer.from_store_id),
+        (to_store, to_store.id == StockTransfer.to_store_id),
+        (creator, creator.id == StockTransfer.created_by),
+    ]
+    return StockTransfer, columns, joins
+
+SUMMARY_VIEWS = {
+    'sale': _sale_summary,
+    'grn': _grn_summary,
+    'transfer': _transfer_summary,
+}
+
+def summary_fields(name):
+    """Field names a summary view can return, in output order"""
+    return list(SUMMARY_VIEWS[name]()[1])
+
+def summary_query(name, fields=None, keys=()):
+    """Column query for a summary view, limited to `fields` when given.
+
+    Keyset columns in `keys` are always selected so cursors can be built from
+    the rows; summary_row() leaves out the ones that were not asked for.
+    """
+    model, columns, joins = SUMMARY_VIEWS[name]()
+    selected = [columns[field].label(field) for field in (fields or columns)]
+    selected_names = set(fields or columns)
+    selected += [column for column, _ in keys if column.key not in selected_names]
+
+    query = db.session.query(*selected).select_from(model)
+    for target, onclause in joins:
+        query = query.outerjoin(target, onclause)
+    return query
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def summary_row(row, fields):
+    """Serialize one summary row to the requested fields"""
+    mapping = row._mapping
+    return {field: _json_value(mapping[field]) for field in fields}
+
+def parse_view(name, view=None, fields=None):
+    """Validate the view= and fields= list parameters.
+
+    Returns the view ('summary' or 'full') and the requested field names, or None
+    for all of them. Summary fields must be summary columns; full-view fields are
+    matched against the to_dict() keys and unknown ones are left out.
+    """
+    view = view or 'full'
+    if view not in ('summary', 'full'):
+        raise ValueError("view must be 'summary' or 'full'")
+    if not fields:
+        return view, None
+    fields = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    if view == 'summary':
+        unknown = [field for field in fields if field not in summary_fields(name)]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return view, fields or None
+
+def project(data, fields):
+    """Keep only the requested keys of a to_dict() result"""
+    if not fields:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+def list_serializer(name, view, fields):
+    """Function that turns one list row into its JSON dict for the given view"""
+    if view == 'summary':
+        names = fields or summary_fields(name)
+        return lambda row: summary_row(row, names)
+    return lambda item: project(item.to_dict(), fields)
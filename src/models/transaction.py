@@ -3,6 +3,12 @@ from datetime import datetime
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        db.Index('ix_transactions_date', 'transaction_date'),
+        db.Index('ix_transactions_type_date', 'transaction_type', 'transaction_date'),
+        db.Index('ix_transactions_store_date', 'store_id', 'transaction_date'),
+        db.Index('ix_transactions_product_date', 'product_id', 'transaction_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from src.models.user import db
 from src.models.product import Product, Category
 from src.models.inventory import Inventory
+from src.services import report_cache
 
 category_bp = Blueprint('categories', __name__)
 
@@ -40,6 +41,7 @@ def create_category():
     category = Category(name=data['name'])
     db.session.add(category)
     db.session.commit()
+    report_cache.invalidate('categories')
     
     return jsonify({
         'message': 'Category created successfully',
@@ -0,0 +1,267 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_login import login_required
+from src.models.user import db
+from src.models.product import Product
+from src.models.inventory import Inventory
+from src.models.sale import Sale, SaleItem
+from src.models.transaction import Transaction
+from src.models.grn import GRN
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+import csv
+import io
+import json
+
+exports_bp = Blueprint('exports', __name__)
+
+# Rows fetched per round trip and written per response chunk
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _stream_rows(query, fmt):
+    """Yield the query's column tuples as NDJSON lines or CSV, one chunk at a time"""
+    names = [column['name'] for column in query.column_descriptions]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(names)
+
+    for count, row in enumerate(query.yield_per(EXPORT_CHUNK_SIZE), 1):
+        if writer:
+            writer.writerow([_csv_value(value) for value in row])
+        else:
+            buffer.write(json.dumps({name: _json_value(value) for name, value in zip(names, row)}))
+            buffer.write('\n')
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _export_response(query, dataset):
+    """Stream an export in the requested format (ndjson by default)"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Invalid format. Use ndjson or csv'}), 400
+    filename = f"{dataset}-{date.today().isoformat()}.{'csv' if fmt == 'csv' else 'ndjson'}"
+    return Response(
+        stream_with_context(_stream_rows(query, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def _parse_iso(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _sale_filters(query):
+    """Apply the /sales list filters"""
+    store_id = request.args.get('store_id', type=int)
+    start_date = _parse_iso(request.args.get('start_date'))
+    end_date = _parse_iso(request.args.get('end_date'))
+    payment_status = request.args.get('payment_status')
+    if store_id:
+        query = query.filter(Sale.store_id == store_id)
+    if start_date:
+        query = query.filter(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.filter(Sale.sale_date <= end_date)
+    if payment_status:
+        query = query.filter(Sale.payment_status == payment_status)
+    return query
+
+@exports_bp.route('/export/inventory', methods=['GET'])
+@login_required
+def export_inventory():
+    """Stream inventory batches with the /inventory list filters"""
+    product_id = request.args.get('product_id', type=int)
+    store_id = request.args.get('store_id', type=int)
+    expired = request.args.get('expired', type=bool)
+    expiring_soon = request.args.get('expiring_soon', type=bool)
+
+    query = db.session.query(
+        Inventory.id,
+        Inventory.product_id,
+        Product.sku.label('product_sku'),
+        Product.name.label('product_name'),
+        Inventory.product_flavor_id,
+        Inventory.store_id,
+        Inventory.supplier_id,
+        Inventory.batch_number,
+        Inventory.expiration_date,
+        Inventory.quantity,
+        Inventory.unit_cost,
+        Inventory.location,
+        Inventory.date_received,
+        Inventory.grn_id,
+        Inventory.is_active
+    ).join(Product, Product.id == Inventory.product_id).filter(Inventory.quantity > 0)
+
+    if product_id:
+        query = query.filter(Inventory.product_id == product_id)
+    if store_id:
+        query = query.filter(Inventory.store_id == store_id)
+    if expired:
+        query = query.filter(Inventory.expiration_date < date.today())
+    if expiring_soon:
+        query = query.filter(
+            Inventory.expiration_date <= date.today() + timedelta(days=30),
+            Inventory.expiration_date >= date.today()
+        )
+
+    return _export_response(query.order_by(Inventory.id), 'inventory')
+
+@exports_bp.route('/export/sales', methods=['GET'])
+@login_required
+def export_sales():
+    """Stream sale headers with the /sales list filters"""
+    try:
+        query = _sale_filters(db.session.query(
+            Sale.id,
+            Sale.invoice_number,
+            Sale.store_id,
+            Sale.sale_date,
+            Sale.customer_name,
+            Sale.customer_phone,
+            Sale.customer_email,
+            Sale.subtotal,
+            Sale.tax_amount,
+            Sale.discount_amount,
+            Sale.total_amount,
+            Sale.payment_method,
+            Sale.payment_status,
+            Sale.created_by
+        ))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+
+    return _export_response(query.order_by(Sale.id), 'sales')
+
+@exports_bp.route('/export/sale-items', methods=['GET'])
+@login_required
+def export_sale_items():
+    """Stream sale lines, filtered by their sale with the /sales list filters"""
+    try:
+        query = _sale_filters(db.session.query(
+            SaleItem.id,
+            SaleItem.sale_id,
+            Sale.invoice_number,
+            Sale.sale_date,
+            Sale.store_id,
+            SaleItem.product_id,
+            Product.sku.label('product_sku'),
+            SaleItem.product_flavor_id,
+            SaleItem.inventory_id,
+            SaleItem.quantity,
+            SaleItem.unit_price,
+            SaleItem.unit_cost,
+            SaleItem.discount_amount,
+            SaleItem.line_total
+        ).join(Sale, Sale.id == SaleItem.sale_id).join(Product, Product.id == SaleItem.product_id))
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+
+    return _export_response(query.order_by(SaleItem.id), 'sale-items')
+
+@exports_bp.route('/export/transactions', methods=['GET'])
+@login_required
+def export_transactions():
+    """Stream the transaction ledger with the /transactions list filters"""
+    product_id = request.args.get('product_id', type=int)
+    store_id = request.args.get('store_id', type=int)
+    transaction_type = request.args.get('transaction_type')
+    user_id = request.args.get('user_id', type=int)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    query = db.session.query(
+        Transaction.id,
+        Transaction.transaction_date,
+        Transaction.transaction_type,
+        Transaction.product_id,
+        Transaction.inventory_id,
+        Transaction.store_id,
+        Transaction.quantity,
+        Transaction.unit_price,
+        Transaction.total,
+        Transaction.reference,
+        Transaction.user_id,
+        Transaction.notes
+    )
+
+    if product_id:
+        query = query.filter(Transaction.product_id == product_id)
+    if store_id:
+        query = query.filter(Transaction.store_id == store_id)
+    if transaction_type:
+        query = query.filter(Transaction.transaction_type == transaction_type)
+    if user_id:
+        query = query.filter(Transaction.user_id == user_id)
+    try:
+        if start_date:
+            query = query.filter(Transaction.transaction_date >= datetime.strptime(start_date, '%Y-%m-%d'))
+        if end_date:
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            query = query.filter(Transaction.transaction_date <= end_dt)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    return _export_response(query.order_by(Transaction.id), 'transactions')
+
+@exports_bp.route('/export/grns', methods=['GET'])
+@login_required
+def export_grns():
+    """Stream GRN headers with the /grns list filters"""
+    store_id = request.args.get('store_id', type=int)
+    supplier_id = request.args.get('supplier_id', type=int)
+    status = request.args.get('status')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+
+    query = db.session.query(
+        GRN.id,
+        GRN.grn_number,
+        GRN.store_id,
+        GRN.supplier_id,
+        GRN.purchase_order_number,
+        GRN.invoice_number,
+        GRN.received_date,
+        GRN.total_amount,
+        GRN.status,
+        GRN.created_by,
+        GRN.verified_by,
+        GRN.verified_date
+    )
+
+    if store_id:
+        query = query.filter(GRN.store_id == store_id)
+    if supplier_id:
+        query = query.filter(GRN.supplier_id == supplier_id)
+    if status:
+        query = query.filter(GRN.status == status)
+    try:
+        if start_date:
+            query = query.filter(GRN.received_date >= datetime.fromisoformat(start_date).date())
+        if end_date:
+            query = query.filter(GRN.received_date <= datetime.fromisoformat(end_date).date())
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use ISO 8601'}), 400
+
+    return _export_response(query.order_by(GRN.id), 'grns')
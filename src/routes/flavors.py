@@ -3,6 +3,7 @@ from flask_login import login_required
 from src.models.user import db
 from src.models.flavor import Flavor, ProductFlavor
 from src.models.product import Product
+from src.services import report_cache
 
 flavors_bp = Blueprint('flavors', __name__)
 
@@ -39,6 +40,7 @@ def create_flavor():
         
         db.session.add(flavor)
         db.session.commit()
+        report_cache.invalidate('flavors')
         
         return jsonify(flavor.to_dict()), 201
         
@@ -69,6 +71,7 @@ def update_flavor(flavor_id):
             flavor.is_active = data['is_active']
         
         db.session.commit()
+        report_cache.invalidate('flavors')
         return jsonify(flavor.to_dict()), 200
         
     except Exception as e:
@@ -87,11 +90,13 @@ def delete_flavor(flavor_id):
             # Soft delete instead of hard delete
             flavor.is_active = False
             db.session.commit()
+            report_cache.invalidate('flavors')
             return jsonify({'message': 'Flavor deactivated successfully'}), 200
         else:
             # Hard delete if no related data
             db.session.delete(flavor)
             db.session.commit()
+            report_cache.invalidate('flavors')
             return jsonify({'message': 'Flavor deleted successfully'}), 200
         
     except Exception as e:
@@ -150,6 +155,7 @@ def create_product_flavor():
         
         db.session.add(product_flavor)
         db.session.commit()
+        report_cache.invalidate('flavors')
         
         return jsonify(product_flavor.to_dict()), 201
         
@@ -172,6 +178,7 @@ def update_product_flavor(pf_id):
             product_flavor.is_active = data['is_active']
         
         db.session.commit()
+        report_cache.invalidate('flavors')
         return jsonify(product_flavor.to_dict()), 200
         
     except Exception as e:
@@ -190,6 +197,7 @@ def delete_product_flavor(pf_id):
             # Soft delete
             product_flavor.is_active = False
             db.session.commit()
+            report_cache.invalidate('flavors')
             return jsonify({'message': 'Product-flavor combination deactivated'}), 200
         else:
             # Hard delete
@@ -206,6 +214,7 @@ def delete_product_flavor(pf_id):
                     product.has_flavors = False
             
             db.session.commit()
+            report_cache.invalidate('flavors')
             return jsonify({'message': 'Product-flavor combination deleted'}), 200
         
     except Exception as e:
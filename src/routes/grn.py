@@ -7,11 +7,20 @@ from src.models.product import Product
 from src.models.supplier import Supplier
 from src.models.transaction import Transaction
 from src.models.store import Store
+from src.models.loading_profiles import with_profile
+from src.models.summary_views import list_serializer, parse_view, summary_query
+from src.services.pagination import keyset_paginate, cursor_pagination_dict
+from src.services.numbering import next_document_number
+from src.services.idempotency import idempotent
+from src.services import report_cache
 from datetime import datetime, date
 from decimal import Decimal
 
 grn_bp = Blueprint('grn', __name__)
 
+# Stable keyset order for cursor pagination; id breaks ties
+GRN_KEYSET = [(GRN.received_date, True), (GRN.id, True)]
+
 @grn_bp.route('/grns', methods=['GET'])
 @login_required
 def get_grns():
@@ -25,8 +34,20 @@ def get_grns():
         end_date = request.args.get('end_date')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
         
-        query = GRN.query
+        try:
+            view, fields = parse_view('grn', request.args.get('view'), request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        serialize = list_serializer('grn', view, fields)
+        
+        # The summary view is one flat column query; the full view loads whole documents
+        if view == 'summary':
+            query = summary_query('grn', fields, GRN_KEYSET)
+        else:
+            query = with_profile(GRN.query, 'grn_with_items')
         
         # Apply filters
         if store_id:
@@ -40,13 +61,25 @@ def get_grns():
         if end_date:
             query = query.filter(GRN.received_date <= datetime.fromisoformat(end_date).date())
         
+        if cursor is not None:
+            try:
+                grns, next_cursor = keyset_paginate(query, GRN_KEYSET, cursor, per_page)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'grns': [serialize(grn) for grn in grns],
+                'pagination': cursor_pagination_dict(
+                    per_page, next_cursor, query.order_by(None).count() if include_total else None
+                )
+            }), 200
+        
         # Paginate results
         grns = query.order_by(GRN.received_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+            page=page, per_page=per_page, error_out=False, count=include_total
         )
         
         return jsonify({
-            'grns': [grn.to_dict() for grn in grns.items],
+            'grns': [serialize(grn) for grn in grns.items],
             'pagination': {
                 'page': page,
                 'pages': grns.pages,
@@ -60,6 +93,7 @@ def get_grns():
 
 @grn_bp.route('/grns', methods=['POST'])
 @login_required
+@idempotent('grns')
 def create_grn():
     """Create a new GRN"""
     try:
@@ -79,7 +113,7 @@ def create_grn():
             return jsonify({'error': 'Invalid store or supplier ID'}), 400
         
         # Generate GRN number
-        grn_number = f"GRN{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        grn_number = next_document_number('grn', store.id)
         
         # Create GRN
         grn = GRN(
@@ -130,6 +164,7 @@ def create_grn():
         grn.calculate_total()
         
         db.session.commit()
+        report_cache.invalidate('grns', store_ids=[grn.store_id])
         return jsonify(grn.to_dict()), 201
         
     except Exception as e:
@@ -141,7 +176,7 @@ def create_grn():
 def get_grn(grn_id):
     """Get a specific GRN"""
     try:
-        grn = GRN.query.get_or_404(grn_id)
+        grn = with_profile(GRN.query, 'grn_with_items').get_or_404(grn_id)
         return jsonify(grn.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -195,6 +230,7 @@ def verify_grn(grn_id):
         grn.verified_date = datetime.utcnow()
         
         db.session.commit()
+        report_cache.invalidate('grns', 'inventory', 'transactions', store_ids=[grn.store_id])
         return jsonify(grn.to_dict()), 200
         
     except Exception as e:
@@ -214,6 +250,7 @@ def complete_grn(grn_id):
         
         grn.status = 'completed'
         db.session.commit()
+        report_cache.invalidate('grns', store_ids=[grn.store_id])
         
         return jsonify(grn.to_dict()), 200
         
@@ -244,6 +281,7 @@ def update_grn(grn_id):
             grn.received_date = datetime.fromisoformat(data['received_date']).date()
         
         db.session.commit()
+        report_cache.invalidate('grns', store_ids=[grn.store_id])
         return jsonify(grn.to_dict()), 200
         
     except Exception as e:
@@ -265,8 +303,10 @@ def delete_grn(grn_id):
             db.session.delete(item)
         
         # Delete GRN
+        store_id = grn.store_id
         db.session.delete(grn)
         db.session.commit()
+        report_cache.invalidate('grns', store_ids=[store_id])
         
         return jsonify({'message': 'GRN deleted successfully'}), 200
         
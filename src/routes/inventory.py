@@ -6,6 +6,14 @@ from src.models.product import Product
 from src.models.supplier import Supplier
 from src.models.inventory import Inventory
 from src.models.transaction import Transaction
+from src.models.loading_profiles import with_profile
+from src.services.low_stock import count_low_stock
+from src.services.pagination import keyset_paginate, cursor_pagination_dict, pagination_dict
+from src.services.expiry import bucket_name, expiry_rows, expiry_summary, format_expiry_row
+from src.services.valuation import legacy_void_cutover, take_checkpoint, valuation_as_of
+from src.services.inventory_import import IMPORT_FORMATS, import_inventory, iter_records
+from src.services import report_cache
+from src.models.inventory_checkpoint import InventoryCheckpoint
 
 inventory_bp = Blueprint('inventory', __name__)
 
@@ -18,18 +26,23 @@ def admin_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# Stable keyset order for cursor pagination; id breaks ties
+INVENTORY_KEYSET = [(Inventory.product_id, False), (Inventory.expiration_date, False), (Inventory.id, False)]
+
 @inventory_bp.route('/inventory', methods=['GET'])
 @login_required
 def get_inventory():
     """Get all inventory items with optional filtering"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true').lower() != 'false'
     product_id = request.args.get('product_id', type=int)
     store_id = request.args.get('store_id', type=int) # Added store_id filter
     expired = request.args.get('expired', type=bool)
     expiring_soon = request.args.get('expiring_soon', type=bool)  # within 30 days
     
-    query = Inventory.query
+    query = with_profile(Inventory.query, 'inventory_list')
 
     # FIX: Always filter out items with zero quantity
     query = query.filter(Inventory.quantity > 0)
@@ -52,6 +65,18 @@ def get_inventory():
             Inventory.expiration_date >= date.today()
         )
     
+    # Cursor pagination is opt-in; without a cursor the full list is returned as before
+    if cursor is not None:
+        try:
+            inventory_items, next_cursor = keyset_paginate(query, INVENTORY_KEYSET, cursor, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        total = query.order_by(None).count() if include_total else None
+        return jsonify({
+            'inventory': [item.to_dict() for item in inventory_items],
+            'pagination': cursor_pagination_dict(per_page, next_cursor, total)
+        }), 200
+    
     inventory_items = query.order_by(Inventory.product_id, Inventory.expiration_date).all()
     
     return jsonify([item.to_dict() for item in inventory_items]), 200
@@ -61,7 +86,7 @@ def get_inventory():
 @login_required
 def get_inventory_item(inventory_id):
     """Get specific inventory item"""
-    inventory_item = Inventory.query.get_or_404(inventory_id)
+    inventory_item = with_profile(Inventory.query, 'inventory_list').get_or_404(inventory_id)
     return jsonify(inventory_item.to_dict()), 200
 
 @inventory_bp.route('/inventory', methods=['POST'])
@@ -114,12 +139,43 @@ def add_inventory():
     
     db.session.add(transaction)
     db.session.commit()
+    report_cache.invalidate('inventory', 'transactions', store_ids=[inventory_item.store_id])
     
     return jsonify({
         'message': 'Inventory added successfully',
         'inventory': inventory_item.to_dict()
     }), 201
 
+@inventory_bp.route('/inventory/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_add_inventory():
+    """Import inventory batches from a streamed CSV or NDJSON body, or an uploaded 'file'"""
+    upload = request.files.get('file')
+    fmt = request.args.get('format')
+    if not fmt:
+        content_type = (upload.mimetype if upload else request.mimetype) or ''
+        filename = (upload.filename if upload else '') or ''
+        fmt = 'csv' if 'csv' in content_type or filename.lower().endswith('.csv') else 'ndjson'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': 'Invalid format. Use csv or ndjson'}), 400
+
+    stream = upload.stream if upload else request.stream
+    try:
+        result = import_inventory(
+            iter_records(stream, fmt),
+            user_id=current_user.id,
+            default_store_id=request.args.get('store_id', type=int)
+        )
+    except Exception as e:
+        # Only reachable before the first chunk commits; stream errors are reported per row
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    if result['imported']:
+        # Rows may name any store
+        report_cache.invalidate('inventory', 'transactions')
+    return jsonify(result), 200 if result['imported'] or not result['failed'] else 400
+
 @inventory_bp.route('/inventory/<int:inventory_id>', methods=['PUT'])
 @login_required
 @admin_required
@@ -151,7 +207,8 @@ def update_inventory(inventory_id):
             transaction = Transaction(
                 product_id=inventory_item.product_id,
                 inventory_id=inventory_item.id,
-                quantity=abs(quantity_change),
+                store_id=inventory_item.store_id,
+                quantity=quantity_change,  # Signed, so the ledger replays to the batch quantity
                 transaction_type='adjustment',
                 user_id=current_user.id,
                 notes=f"Quantity adjusted from {old_quantity} to {new_quantity}"
@@ -166,6 +223,7 @@ def update_inventory(inventory_id):
         inventory_item.supplier_id = data['supplier_id']
     
     db.session.commit()
+    report_cache.invalidate('inventory', 'transactions', store_ids=[inventory_item.store_id])
     
     return jsonify({
         'message': 'Inventory updated successfully',
@@ -197,7 +255,8 @@ def record_sale(inventory_id):
     transaction = Transaction(
         product_id=inventory_item.product_id,
         inventory_id=inventory_item.id,
-        quantity=quantity_sold,
+        store_id=inventory_item.store_id,
+        quantity=-quantity_sold,  # Negative for sale
         transaction_type='sale',
         user_id=current_user.id,
         notes=data.get('notes', '')
@@ -205,6 +264,7 @@ def record_sale(inventory_id):
     
     db.session.add(transaction)
     db.session.commit()
+    report_cache.invalidate('inventory', 'transactions', store_ids=[inventory_item.store_id])
     
     return jsonify({
         'message': 'Sale recorded successfully',
@@ -216,20 +276,20 @@ def record_sale(inventory_id):
 @login_required
 def get_expired_inventory():
     """Get expired inventory items"""
-    expired_items = Inventory.query.filter(Inventory.expiration_date < date.today()).all()
-    return jsonify([item.to_dict() for item in expired_items]), 200
+    store_id = request.args.get('store_id', type=int)
+    supplier_id = request.args.get('supplier_id', type=int)
+    rows = expiry_rows(max_days=-1, store_id=store_id, supplier_id=supplier_id)
+    return jsonify([format_expiry_row(row) for row in rows]), 200
 
 @inventory_bp.route('/inventory/expiring-soon', methods=['GET'])
 @login_required
 def get_expiring_soon():
-    """Get inventory items expiring within 30 days"""
-    from datetime import timedelta
-    thirty_days_from_now = date.today() + timedelta(days=30)
-    expiring_items = Inventory.query.filter(
-        Inventory.expiration_date <= thirty_days_from_now,
-        Inventory.expiration_date >= date.today()
-    ).all()
-    return jsonify([item.to_dict() for item in expiring_items]), 200
+    """Get inventory items expiring within the given number of days (default 30)"""
+    days = request.args.get('days', 30, type=int)
+    store_id = request.args.get('store_id', type=int)
+    supplier_id = request.args.get('supplier_id', type=int)
+    rows = expiry_rows(thresholds=(days,), min_days=0, store_id=store_id, supplier_id=supplier_id)
+    return jsonify([format_expiry_row(row) for row in rows]), 200
 
 @inventory_bp.route('/inventory/summary', methods=['GET'])
 @login_required
@@ -237,22 +297,83 @@ def get_inventory_summary():
     """Get inventory summary statistics"""
     total_products = Product.query.count()
     total_inventory_items = Inventory.query.count()
-    expired_count = Inventory.query.filter(Inventory.expiration_date < date.today()).count()
     
-    from datetime import timedelta
-    thirty_days_from_now = date.today() + timedelta(days=30)
-    expiring_soon_count = Inventory.query.filter(
-        Inventory.expiration_date <= thirty_days_from_now,
-        Inventory.expiration_date >= date.today()
-    ).count()
+    expiry = expiry_summary(thresholds=(30,))
+    expired_count = expiry['buckets']['expired']['items']
+    expiring_soon_count = expiry['buckets'][bucket_name(30)]['items']
     
-    low_stock_products = [p for p in Product.query.all() if p.is_low_stock()]
+    store_id = request.args.get('store_id', type=int)
+    by_flavor = request.args.get('by_flavor', 'false').lower() == 'true'
+    low_stock_count = count_low_stock(store_id=store_id, by_flavor=by_flavor)
     
     return jsonify({
         'total_products': total_products,
         'total_inventory_items': total_inventory_items,
         'expired_items': expired_count,
         'expiring_soon': expiring_soon_count,
-        'low_stock_products': len(low_stock_products)
+        'low_stock_products': low_stock_count
+    }), 200
+
+@inventory_bp.route('/inventory/valuation', methods=['GET'])
+@login_required
+def get_inventory_valuation():
+    """Get stock quantity and value as of a point in time (default now)"""
+    raw_as_of = request.args.get('as_of')
+    store_id = request.args.get('store_id', type=int)
+    product_id = request.args.get('product_id', type=int)
+    group_by = request.args.get('group_by', 'product')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+
+    try:
+        as_of = datetime.fromisoformat(raw_as_of) if raw_as_of else datetime.utcnow()
+    except ValueError:
+        return jsonify({'error': 'Invalid as_of. Use ISO 8601'}), 400
+    if raw_as_of and len(raw_as_of) == 10:
+        # A bare date means the end of that day
+        as_of = datetime.combine(as_of.date(), datetime.max.time())
+
+    try:
+        rows, totals, total_rows, base = valuation_as_of(as_of, store_id, product_id, group_by, page, per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    report = {
+        'as_of': as_of.isoformat(),
+        'group_by': group_by,
+        'base': base,
+        'totals': totals,
+        'rows': rows,
+        'pagination': pagination_dict(page, per_page, total_rows)
+    }
+    cutover = legacy_void_cutover()
+    if cutover and as_of < cutover:
+        report['warning'] = (
+            f'Sales voided up to {cutover.isoformat()} restored stock without ledger rows, '
+            'so quantities before then may be overstated'
+        )
+    return jsonify(report), 200
+
+@inventory_bp.route('/inventory/checkpoints', methods=['GET'])
+@login_required
+def get_inventory_checkpoints():
+    """Get inventory checkpoints, newest first"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    checkpoints = InventoryCheckpoint.query.order_by(InventoryCheckpoint.taken_at.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    return jsonify({
+        'checkpoints': [checkpoint.to_dict() for checkpoint in checkpoints.items],
+        'pagination': pagination_dict(page, per_page, checkpoints.total)
     }), 200
 
+@inventory_bp.route('/inventory/checkpoints', methods=['POST'])
+@login_required
+@admin_required
+def create_inventory_checkpoint():
+    """Snapshot every inventory batch now"""
+    data = request.get_json(silent=True) or {}
+    checkpoint = take_checkpoint(user_id=current_user.id, notes=data.get('notes'))
+    db.session.commit()
+    return jsonify(checkpoint.to_dict()), 201
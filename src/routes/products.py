@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from src.models.user import db
 from src.models.product import Product, Category
 from src.models.inventory import Inventory
+from src.services.low_stock import low_stock_query
+from src.services import report_cache
 
 products_bp = Blueprint('products', __name__)
 
@@ -124,6 +126,7 @@ def create_product():
     
     db.session.add(product)
     db.session.commit()
+    report_cache.invalidate('products')
     
     return jsonify({
         'message': 'Product created successfully',
@@ -169,6 +172,7 @@ def update_product(product_id):
         product.image_url = data['image_url']
     
     db.session.commit()
+    report_cache.invalidate('products')
     
     return jsonify({
         'message': 'Product updated successfully',
@@ -188,6 +192,7 @@ def delete_product(product_id):
     
     db.session.delete(product)
     db.session.commit()
+    report_cache.invalidate('products')
     
     return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -195,8 +200,9 @@ def delete_product(product_id):
 @login_required
 def get_low_stock_products():
     """Get products with low stock"""
-    products = Product.query.all()
-    low_stock_products = [product.to_dict() for product in products if product.is_low_stock()]
+    low_stock_ids = low_stock_query().with_entities(Product.id).subquery()
+    products = Product.query.filter(Product.id.in_(db.select(low_stock_ids.c.id))).all()
+    low_stock_products = [product.to_dict() for product in products]
     
     return jsonify(low_stock_products), 200
 
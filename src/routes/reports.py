@@ -1,17 +1,34 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, and_
+from sqlalchemy import func
 from src.models.user import db
 from src.models.product import Product, Category
 from src.models.inventory import Inventory
 from src.models.transaction import Transaction
 from src.models.supplier import Supplier
+from src.models.loading_profiles import with_profile
+from src.services.low_stock import get_low_stock
+from src.services.pagination import clamp_page, pagination_dict
+from src.services.report_cache import cached_report, metrics as report_cache_metrics
+from src.services.sales_rollup import period_totals, sales_rows
+from src.services.supplier_performance import get_supplier_performance
+from src.services.category_analysis import category_statistics, category_store_breakdown
+from src.services.expiry import (
+    parse_thresholds, bucket_name, bucket_names, expiry_rows, expiry_summary, format_expiry_row
+)
 
 reports_bp = Blueprint('reports', __name__)
 
+@reports_bp.route('/reports/cache-metrics', methods=['GET'])
+@login_required
+def get_report_cache_metrics():
+    """Get report cache hit and miss counters for this worker"""
+    return jsonify(report_cache_metrics()), 200
+
 @reports_bp.route('/reports/inventory-summary', methods=['GET'])
 @login_required
+@cached_report('inventory-summary', tables=('products', 'categories', 'suppliers', 'inventory', 'flavors'))
 def inventory_summary_report():
     """Get comprehensive inventory summary report"""
     try:
@@ -27,29 +44,29 @@ def inventory_summary_report():
         ).join(Product).scalar() or 0
         
         # Low stock products
+        store_id = request.args.get('store_id', type=int)
+        by_flavor = request.args.get('by_flavor', 'false').lower() == 'true'
+        page, per_page = clamp_page(request.args.get('page', 1, type=int), request.args.get('per_page', 50, type=int))
+        low_stock_rows, low_stock_count = get_low_stock(
+            store_id=store_id, by_flavor=by_flavor, page=page, per_page=per_page
+        )
         low_stock_products = []
-        for product in Product.query.all():
-            if product.is_low_stock():
-                low_stock_products.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'current_stock': product.get_total_quantity(),
-                    'reorder_point': product.reorder_point
-                })
-        
-        # Expired items
-        expired_items = Inventory.query.filter(
-            Inventory.expiration_date < date.today()
-        ).count()
+        for row in low_stock_rows:
+            entry = {
+                'id': row['product_id'],
+                'name': row['product_name'],
+                'current_stock': row['current_stock'],
+                'reorder_point': row['reorder_point']
+            }
+            if by_flavor:
+                entry['product_flavor_id'] = row['product_flavor_id']
+                entry['flavor_name'] = row['flavor_name']
+            low_stock_products.append(entry)
         
-        # Expiring soon (within 30 days)
-        thirty_days_from_now = date.today() + timedelta(days=30)
-        expiring_soon = Inventory.query.filter(
-            and_(
-                Inventory.expiration_date <= thirty_days_from_now,
-                Inventory.expiration_date >= date.today()
-            )
-        ).count()
+        # Expired and expiring soon (within 30 days)
+        expiry = expiry_summary(thresholds=(30,))
+        expired_items = expiry['buckets']['expired']['items']
+        expiring_soon = expiry['buckets'][bucket_name(30)]['items']
         
         return jsonify({
             'summary': {
@@ -58,11 +75,12 @@ def inventory_summary_report():
                 'total_suppliers': total_suppliers,
                 'total_inventory_items': total_inventory_items,
                 'total_stock_value': round(total_stock_value, 2),
-                'low_stock_count': len(low_stock_products),
+                'low_stock_count': low_stock_count,
                 'expired_items': expired_items,
                 'expiring_soon': expiring_soon
             },
-            'low_stock_products': low_stock_products
+            'low_stock_products': low_stock_products,
+            'pagination': pagination_dict(page, per_page, low_stock_count)
         }), 200
         
     except Exception as e:
@@ -70,77 +88,26 @@ def inventory_summary_report():
 
 @reports_bp.route('/reports/sales-summary', methods=['GET'])
 @login_required
+@cached_report('sales-summary', tables=('sales', 'products'))
 def sales_summary_report():
     """Get sales summary report with time periods"""
     try:
-        today = date.today()
-        
-        # Today's sales
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
-        today_sales = Transaction.query.filter(
-            and_(
-                Transaction.transaction_type == 'sale',
-                Transaction.transaction_date >= today_start,
-                Transaction.transaction_date <= today_end
-            )
-        ).count()
-        
-        today_quantity = db.session.query(func.sum(Transaction.quantity)).filter(
-            and_(
-                Transaction.transaction_type == 'sale',
-                Transaction.transaction_date >= today_start,
-                Transaction.transaction_date <= today_end
-            )
-        ).scalar() or 0
-        
-        # This week's sales
-        week_start = today - timedelta(days=today.weekday())
-        week_start_dt = datetime.combine(week_start, datetime.min.time())
-        
-        week_sales = Transaction.query.filter(
-            and_(
-                Transaction.transaction_type == 'sale',
-                Transaction.transaction_date >= week_start_dt
-            )
-        ).count()
-        
-        # This month's sales
-        month_start = today.replace(day=1)
-        month_start_dt = datetime.combine(month_start, datetime.min.time())
-        
-        month_sales = Transaction.query.filter(
-            and_(
-                Transaction.transaction_type == 'sale',
-                Transaction.transaction_date >= month_start_dt
-            )
-        ).count()
+        # Whole days are read from the sales_daily rollup, today from the sale tables
+        periods = period_totals()
         
         # Top selling products (last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        thirty_days_ago_dt = datetime.combine(thirty_days_ago, datetime.min.time())
-        
+        recent = sales_rows(date.today() - timedelta(days=30))
+        total_sold = func.sum(recent.c.quantity)
         top_products = db.session.query(
             Product.name,
-            func.sum(Transaction.quantity).label('total_sold')
-        ).join(Transaction).filter(
-            and_(
-                Transaction.transaction_type == 'sale',
-                Transaction.transaction_date >= thirty_days_ago_dt
-            )
-        ).group_by(Product.id).order_by(func.sum(Transaction.quantity).desc()).limit(10).all()
+            total_sold.label('total_sold')
+        ).join(recent, recent.c.product_id == Product.id).group_by(Product.id).order_by(total_sold.desc()).limit(10).all()
         
         return jsonify({
-            'sales_summary': {
-                'today_sales': today_sales,
-                'today_quantity': today_quantity,
-                'week_sales': week_sales,
-                'month_sales': month_sales
-            },
+            'sales_summary': periods,
             'top_products': [
-                {'name': product.name, 'quantity_sold': int(quantity)}
-                for product, quantity in top_products
+                {'name': name, 'quantity_sold': int(quantity)}
+                for name, quantity in top_products
             ]
         }), 200
         
@@ -149,161 +116,124 @@ def sales_summary_report():
 
 @reports_bp.route('/reports/expiration-report', methods=['GET'])
 @login_required
+@cached_report('expiration-report', tables=('products', 'suppliers', 'flavors', 'stores'), store_tables=('inventory',))
 def expiration_report():
     """Get detailed expiration report"""
     try:
+        try:
+            thresholds = parse_thresholds(request.args.get('buckets'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        store_id = request.args.get('store_id', type=int)
+        supplier_id = request.args.get('supplier_id', type=int)
         today = date.today()
         
-        # Expired items
-        expired_items = db.session.query(
-            Inventory, Product
-        ).join(Product).filter(
-            Inventory.expiration_date < today
-        ).all()
-        
-        # Expiring within 7 days
-        seven_days_from_now = today + timedelta(days=7)
-        expiring_week = db.session.query(
-            Inventory, Product
-        ).join(Product).filter(
-            and_(
-                Inventory.expiration_date <= seven_days_from_now,
-                Inventory.expiration_date >= today
-            )
-        ).all()
-        
-        # Expiring within 30 days
-        thirty_days_from_now = today + timedelta(days=30)
-        expiring_month = db.session.query(
-            Inventory, Product
-        ).join(Product).filter(
-            and_(
-                Inventory.expiration_date <= thirty_days_from_now,
-                Inventory.expiration_date > seven_days_from_now
-            )
-        ).all()
+        rows = expiry_rows(thresholds=thresholds, store_id=store_id, supplier_id=supplier_id, today=today)
+        buckets = {name: [] for name in bucket_names(thresholds)}
+        for row in rows:
+            buckets[row.bucket].append(format_expiry_row(row, today))
         
-        def format_expiration_items(items):
-            return [
-                {
-                    'inventory_id': inventory.id,
-                    'product_name': product.name,
-                    'batch_number': inventory.batch_number,
-                    'expiration_date': inventory.expiration_date.isoformat(),
-                    'quantity': inventory.quantity,
-                    'days_until_expiry': (inventory.expiration_date - today).days,
-                    'location': inventory.location
-                }
-                for inventory, product in items
-            ]
+        report = {
+            'buckets': buckets,
+            'summary': expiry_summary(thresholds=thresholds, store_id=store_id, supplier_id=supplier_id, today=today),
+            'expired_items': buckets['expired']
+        }
+        # Keep the original week/month keys when those windows are among the buckets
+        if 7 in thresholds:
+            report['expiring_this_week'] = buckets[bucket_name(7)]
+        if 30 in thresholds:
+            report['expiring_this_month'] = buckets[bucket_name(30)]
         
-        return jsonify({
-            'expired_items': format_expiration_items(expired_items),
-            'expiring_this_week': format_expiration_items(expiring_week),
-            'expiring_this_month': format_expiration_items(expiring_month)
-        }), 200
+        return jsonify(report), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/supplier-report', methods=['GET'])
 @login_required
+@cached_report('supplier-report', tables=('suppliers', 'inventory', 'grns'))
 def supplier_report():
     """Get supplier performance report"""
     try:
-        # Get all suppliers with their inventory statistics
-        suppliers_data = []
+        sort = request.args.get('sort', 'name')
+        descending = request.args.get('order', 'asc').lower() == 'desc'
+        page, per_page = clamp_page(request.args.get('page', 1, type=int), request.args.get('per_page', 50, type=int))
+        try:
+            rows, total = get_supplier_performance(sort=sort, descending=descending, page=page, per_page=per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        for supplier in Supplier.query.all():
-            # Count inventory items from this supplier
-            inventory_count = Inventory.query.filter_by(supplier_id=supplier.id).count()
-            
-            # Total quantity received from this supplier
-            total_quantity = db.session.query(func.sum(Inventory.quantity)).filter_by(
-                supplier_id=supplier.id
-            ).scalar() or 0
-            
-            # Count of different products from this supplier
-            unique_products = db.session.query(func.count(func.distinct(Inventory.product_id))).filter_by(
-                supplier_id=supplier.id
-            ).scalar() or 0
-            
-            # Recent deliveries (last 30 days)
-            thirty_days_ago = date.today() - timedelta(days=30)
-            recent_deliveries = Inventory.query.filter(
-                and_(
-                    Inventory.supplier_id == supplier.id,
-                    Inventory.date_received >= thirty_days_ago
-                )
-            ).count()
-            
+        suppliers_data = []
+        for row in rows:
             suppliers_data.append({
-                'supplier': supplier.to_dict(),
+                'supplier': row.Supplier.to_dict(),
                 'statistics': {
-                    'total_inventory_items': inventory_count,
-                    'total_quantity_received': total_quantity,
-                    'unique_products': unique_products,
-                    'recent_deliveries': recent_deliveries
+                    'total_inventory_items': row.total_inventory_items,
+                    'total_quantity_received': row.total_quantity_received,
+                    'unique_products': row.unique_products,
+                    'recent_deliveries': row.recent_deliveries,
+                    'grn_count': row.grn_count,
+                    'total_purchase_value': round(float(row.total_purchase_value), 2),
+                    'total_units_purchased': row.total_units_purchased,
+                    'average_unit_cost': round(float(row.average_unit_cost), 2) if row.average_unit_cost is not None else None,
+                    'last_grn_date': row.last_grn_date.isoformat() if row.last_grn_date else None
                 }
             })
         
-        return jsonify({'suppliers': suppliers_data}), 200
+        return jsonify({
+            'suppliers': suppliers_data,
+            'pagination': pagination_dict(page, per_page, total),
+            'sort': sort,
+            'order': 'desc' if descending else 'asc'
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/category-analysis', methods=['GET'])
 @login_required
+@cached_report('category-analysis', tables=('categories', 'products', 'sales', 'stores'), store_tables=('inventory',))
 def category_analysis():
     """Get category-wise analysis"""
     try:
-        categories_data = []
+        value_at = request.args.get('value_at', 'unit_cost')
+        store_id = request.args.get('store_id', type=int)
+        by_store = request.args.get('by_store', 'false').lower() == 'true'
+        try:
+            categories = category_statistics(value_at=value_at, store_id=store_id)
+            breakdown = category_store_breakdown(value_at=value_at, store_id=store_id) if by_store else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def statistics(row):
+            return {
+                'total_stock_value': round(float(row.total_stock_value), 2),
+                'total_quantity': row.total_quantity,
+                'sales_last_30_days': row.units_sold,
+                'revenue_last_30_days': round(float(row.revenue), 2)
+            }
         
-        for category in Category.query.all():
-            # Count products in this category
-            product_count = Product.query.filter_by(category_id=category.id).count()
-            
-            # Total stock value for this category
-            total_value = db.session.query(
-                func.sum(Inventory.quantity * Product.price)
-            ).join(Product).filter(Product.category_id == category.id).scalar() or 0
-            
-            # Total quantity in stock
-            total_quantity = db.session.query(
-                func.sum(Inventory.quantity)
-            ).join(Product).filter(Product.category_id == category.id).scalar() or 0
-            
-            # Sales in last 30 days
-            thirty_days_ago = date.today() - timedelta(days=30)
-            thirty_days_ago_dt = datetime.combine(thirty_days_ago, datetime.min.time())
-            
-            sales_quantity = db.session.query(
-                func.sum(Transaction.quantity)
-            ).join(Product).filter(
-                and_(
-                    Product.category_id == category.id,
-                    Transaction.transaction_type == 'sale',
-                    Transaction.transaction_date >= thirty_days_ago_dt
-                )
-            ).scalar() or 0
-            
-            categories_data.append({
-                'category': category.to_dict(),
-                'statistics': {
-                    'product_count': product_count,
-                    'total_stock_value': round(total_value, 2),
-                    'total_quantity': total_quantity,
-                    'sales_last_30_days': sales_quantity
-                }
-            })
+        categories_data = []
+        for row in categories:
+            entry = {
+                'category': row.Category.to_dict(),
+                'statistics': {'product_count': row.product_count, **statistics(row)}
+            }
+            if by_store:
+                entry['stores'] = [
+                    {'store_id': store_row.store_id, 'store_name': store_row.store_name, **statistics(store_row)}
+                    for store_row in breakdown.get(row.Category.id, [])
+                ]
+            categories_data.append(entry)
         
-        return jsonify({'categories': categories_data}), 200
+        return jsonify({'categories': categories_data, 'value_at': value_at}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/transaction-history', methods=['GET'])
 @login_required
+@cached_report('transaction-history', tables=('transactions', 'sales', 'products', 'stores', 'users'))
 def transaction_history_report():
     """Get transaction history with filtering"""
     try:
@@ -327,45 +257,58 @@ def transaction_history_report():
         if transaction_type:
             query = query.filter(Transaction.transaction_type == transaction_type)
         
+        # Sale lines can be summarized from the daily rollup instead of the ledger
+        use_rollup = request.args.get('use_rollup', 'false').lower() == 'true' and transaction_type in (None, '', 'sale')
+        
+        # One GROUP BY over the same filter; its counts add up to the total, so the
+        # page does not need a count of its own
+        summary_query = query.filter(Transaction.transaction_type != 'sale') if use_rollup else query
+        type_summary = [
+            {'type': t_type, 'count': count, 'total_quantity': total_quantity}
+            for t_type, count, total_quantity in summary_query.with_entities(
+                Transaction.transaction_type,
+                func.count(Transaction.id),
+                func.sum(Transaction.quantity)
+            ).group_by(Transaction.transaction_type).order_by(Transaction.transaction_type)
+        ]
+        
+        sales_rollup = None
+        if use_rollup:
+            # Sale lines per day, product and flavor, net of voids; quantity signed like the ledger.
+            # These are not ledger rows, so they are reported beside the ledger counts, not in them
+            rows = sales_rows(
+                start_dt.date() if start_date else date.min,
+                end_dt.date() + timedelta(days=1) if end_date else None
+            )
+            product_sales, sale_quantity = db.session.query(
+                func.coalesce(func.sum(rows.c.sale_count), 0),
+                func.coalesce(func.sum(rows.c.quantity), 0)
+            ).one()
+            # product_sales counts each sale once per product and flavor it included
+            sales_rollup = {'product_sales': product_sales, 'total_quantity': -sale_quantity}
+        
         # Get transactions with pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        transactions = query.order_by(Transaction.transaction_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        transactions = with_profile(query, 'transaction_list').order_by(Transaction.transaction_date.desc()).paginate(
+            page=page, per_page=per_page, error_out=False, count=use_rollup
         )
+        # by_type leaves out the ledger's sale rows in rollup mode, so the total comes from the page count
+        total_transactions = transactions.total if use_rollup else sum(entry['count'] for entry in type_summary)
         
-        # Calculate summary statistics for the filtered data
-        total_transactions = query.count()
-        
-        # Group by transaction type
-        type_summary = db.session.query(
-            Transaction.transaction_type,
-            func.count(Transaction.id).label('count'),
-            func.sum(Transaction.quantity).label('total_quantity')
-        ).filter(
-            Transaction.id.in_([t.id for t in query.all()])
-        ).group_by(Transaction.transaction_type).all()
+        summary = {
+            'total_transactions': total_transactions,
+            'by_type': type_summary,
+            'source': 'sales_daily' if use_rollup else 'transactions'
+        }
+        if use_rollup:
+            summary['sales_rollup'] = sales_rollup
         
         return jsonify({
             'transactions': [t.to_dict() for t in transactions.items],
-            'pagination': {
-                'page': page,
-                'pages': transactions.pages,
-                'per_page': per_page,
-                'total': transactions.total
-            },
-            'summary': {
-                'total_transactions': total_transactions,
-                'by_type': [
-                    {
-                        'type': t_type,
-                        'count': count,
-                        'total_quantity': total_quantity
-                    }
-                    for t_type, count, total_quantity in type_summary
-                ]
-            }
+            'pagination': pagination_dict(page, per_page, total_transactions),
+            'summary': summary
         }), 200
         
     except Exception as e:
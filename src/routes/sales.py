@@ -6,11 +6,27 @@ from src.models.inventory import Inventory
 from src.models.product import Product
 from src.models.transaction import Transaction
 from src.models.store import Store
+from src.models.loading_profiles import with_profile
+from src.models.summary_views import list_serializer, parse_view, summary_query
+from src.services.pagination import keyset_paginate, cursor_pagination_dict
+from src.services.allocation import insert_ledger_rows
+from src.services.checkout import checkout, checkout_many
+from src.services import document_cache, report_cache
+from src.services.idempotency import idempotent
+from src.services.sales_rollup import reverse_sale, summary_rows
+from sqlalchemy import func
 from datetime import datetime, date
 from decimal import Decimal
 
 sales_bp = Blueprint('sales', __name__)
 
+# Offline POS uploads: sales per request, and sales allocated and committed together
+MAX_BATCH_SALES = 500
+BATCH_COMMIT_SIZE = 50
+
+# Stable keyset order for cursor pagination; id breaks ties
+SALE_KEYSET = [(Sale.sale_date, True), (Sale.id, True)]
+
 @sales_bp.route('/sales', methods=['GET'])
 @login_required
 def get_sales():
@@ -23,8 +39,20 @@ def get_sales():
         payment_status = request.args.get('payment_status')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
         
-        query = Sale.query
+        try:
+            view, fields = parse_view('sale', request.args.get('view'), request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        serialize = list_serializer('sale', view, fields)
+        
+        # The summary view is one flat column query; the full view loads whole documents
+        if view == 'summary':
+            query = summary_query('sale', fields, SALE_KEYSET)
+        else:
+            query = with_profile(Sale.query, 'sale_with_items')
         
         # Apply filters
         if store_id:
@@ -36,13 +64,25 @@ def get_sales():
         if payment_status:
             query = query.filter(Sale.payment_status == payment_status)
         
+        if cursor is not None:
+            try:
+                sales, next_cursor = keyset_paginate(query, SALE_KEYSET, cursor, per_page)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'sales': [serialize(sale) for sale in sales],
+                'pagination': cursor_pagination_dict(
+                    per_page, next_cursor, query.order_by(None).count() if include_total else None
+                )
+            }), 200
+        
         # Paginate results
         sales = query.order_by(Sale.sale_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+            page=page, per_page=per_page, error_out=False, count=include_total
         )
         
         return jsonify({
-            'sales': [sale.to_dict() for sale in sales.items],
+            'sales': [serialize(sale) for sale in sales.items],
             'pagination': {
                 'page': page,
                 'pages': sales.pages,
@@ -56,6 +96,7 @@ def get_sales():
 
 @sales_bp.route('/sales', methods=['POST'])
 @login_required
+@idempotent('sales')
 def create_sale():
     """Create a new sale"""
     try:
@@ -68,133 +109,73 @@ def create_sale():
         if not data.get('items') or len(data['items']) == 0:
             return jsonify({'error': 'At least one item is required'}), 400
         
-        # Verify store exists
-        store = Store.query.get(data['store_id'])
-        if not store:
-            return jsonify({'error': 'Invalid store ID'}), 400
-        
-        # Generate invoice number
-        invoice_number = f"INV{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        # Create sale
-        sale = Sale(
-            invoice_number=invoice_number,
-            store_id=data['store_id'],
-            customer_name=data.get('customer_name'),
-            customer_phone=data.get('customer_phone'),
-            customer_email=data.get('customer_email'),
-            tax_amount=Decimal(str(data.get('tax_amount', 0))),
-            discount_amount=Decimal(str(data.get('discount_amount', 0))),
-            payment_method=data.get('payment_method', 'cash'),
-            payment_status=data.get('payment_status', 'paid'),
-            notes=data.get('notes'),
-            created_by=current_user.id
-        )
+        # Validate, allocate and write the whole basket with a handful of set queries
+        try:
+            sale = checkout(data, current_user, data.get('allocation_policy'))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
         
-        db.session.add(sale)
-        db.session.flush()  # Get the sale ID
-        
-        # Add sale items and update inventory
-        for item_data in data['items']:
-            if not item_data.get('product_id') or not item_data.get('quantity') or not item_data.get('unit_price'):
-                return jsonify({'error': 'Product ID, quantity, and unit price are required for all items'}), 400
-            
-            # Verify product exists
-            product = Product.query.get(item_data['product_id'])
-            if not product:
-                return jsonify({'error': f'Invalid product ID: {item_data["product_id"]}'}), 400
-            
-            # Check inventory availability
-            if item_data.get('inventory_id'):
-                # Sell from specific inventory batch
-                inventory = Inventory.query.get(item_data['inventory_id'])
-                if not inventory or inventory.store_id != data['store_id']:
-                    return jsonify({'error': 'Invalid inventory batch for this store'}), 400
-                if inventory.quantity < item_data['quantity']:
-                    return jsonify({'error': f'Insufficient quantity in batch {inventory.batch_number}'}), 400
-                
-                unit_cost = inventory.unit_cost
-            else:
-                # Check total available quantity for product in store
-                total_available = product.get_total_quantity(data['store_id'])
-                if total_available < item_data['quantity']:
-                    return jsonify({'error': f'Insufficient quantity for {product.name} in store'}), 400
-                
-                # Get average cost for profit calculation
-                store_inventory = Inventory.query.filter_by(
-                    product_id=item_data['product_id'],
-                    store_id=data['store_id'],
-                    is_active=True
-                ).filter(Inventory.quantity > 0).all()
-                
-                if store_inventory:
-                    total_cost = sum(inv.unit_cost * inv.quantity for inv in store_inventory if inv.unit_cost)
-                    total_qty = sum(inv.quantity for inv in store_inventory)
-                    unit_cost = total_cost / total_qty if total_qty > 0 else 0
-                else:
-                    unit_cost = 0
-            
-            # Calculate line total
-            line_total = Decimal(str(item_data['quantity'])) * Decimal(str(item_data['unit_price']))
-            if item_data.get('discount_amount'):
-                line_total -= Decimal(str(item_data['discount_amount']))
-            
-            # Create sale item
-            sale_item = SaleItem(
-                sale_id=sale.id,
-                product_id=item_data['product_id'],
-                product_flavor_id=item_data.get('product_flavor_id'),
-                inventory_id=item_data.get('inventory_id'),
-                quantity=item_data['quantity'],
-                unit_price=Decimal(str(item_data['unit_price'])),
-                unit_cost=unit_cost,
-                line_total=line_total,
-                discount_amount=Decimal(str(item_data.get('discount_amount', 0)))
-            )
-            
-            db.session.add(sale_item)
-        
-        # Calculate sale totals
-        sale.calculate_totals()
-        
-        # Update inventory quantities and create transactions
-        for item in sale.sale_items:
-            inventory_to_reduce_from = []
-            if item.inventory_id:
-                inventory_to_reduce_from.append(Inventory.query.get(item.inventory_id))
-            else:
-                inventory_to_reduce_from = Inventory.query.filter_by(
-                    product_id=item.product_id,
-                    store_id=sale.store_id,
-                    is_active=True
-                ).filter(Inventory.quantity > 0).order_by(Inventory.date_received).all()
-            
-            remaining_qty_to_sell = item.quantity
-            for inv in inventory_to_reduce_from:
-                if remaining_qty_to_sell <= 0:
-                    break
-                
-                qty_from_this_batch = min(inv.quantity, remaining_qty_to_sell)
-                inv.quantity -= qty_from_this_batch
-                remaining_qty_to_sell -= qty_from_this_batch
+        # Everything to_dict() touches is already in the session, so serialize before commit expires it
+        sale_data = sale.to_dict()
+        db.session.commit()
+        report_cache.invalidate('sales', 'inventory', 'transactions', store_ids=[sale_data['store_id']])
+        return jsonify(sale_data), 201
 
-                # FIX: Create a transaction for each sale item
-                transaction = Transaction(
-                    product_id=item.product_id,
-                    inventory_id=inv.id,
-                    store_id=sale.store_id,
-                    quantity=-qty_from_this_batch, # Negative for sale
-                    transaction_type='sale',
-                    unit_price=item.unit_price,
-                    total=item.unit_price * qty_from_this_batch,
-                    reference=f"Sale: {sale.invoice_number}",
-                    user_id=current_user.id
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/sales/batch', methods=['POST'])
+@login_required
+@idempotent('sales-batch')
+def create_sales_batch():
+    """Create many sales uploaded by an offline POS terminal"""
+    try:
+        data = request.get_json()
+        sales = data.get('sales') if data else None
+
+        if not sales or not isinstance(sales, list):
+            return jsonify({'error': 'At least one sale is required'}), 400
+
+        if len(sales) > MAX_BATCH_SALES:
+            return jsonify({'error': f'At most {MAX_BATCH_SALES} sales can be sent per request'}), 400
+
+        policy = data.get('allocation_policy')
+        results = []
+        # Each group is allocated in one pass and committed as one transaction; a
+        # group that fails to write is reported as failed without affecting the others
+        for start in range(0, len(sales), BATCH_COMMIT_SIZE):
+            group = sales[start:start + BATCH_COMMIT_SIZE]
+            try:
+                outcomes = checkout_many(group, current_user, policy)
+                group_results = []
+                for offset, (sale, error) in enumerate(outcomes):
+                    if error:
+                        group_results.append({'index': start + offset, 'status': 'failed', 'error': error})
+                    else:
+                        group_results.append({'index': start + offset, 'status': 'created', 'sale': sale.to_dict()})
+                db.session.commit()
+                report_cache.invalidate(
+                    'sales', 'inventory', 'transactions',
+                    store_ids={sale.store_id for sale, error in outcomes if not error}
                 )
-                db.session.add(transaction)
-        
-        db.session.commit()
-        return jsonify(sale.to_dict()), 201
-        
+            except Exception as e:
+                db.session.rollback()
+                group_results = [
+                    {'index': start + offset, 'status': 'failed', 'error': str(e)}
+                    for offset in range(len(group))
+                ]
+            results.extend(group_results)
+
+        created = sum(1 for result in results if result['status'] == 'created')
+        failed = len(results) - created
+        return jsonify({
+            'results': results,
+            'created': created,
+            'failed': failed
+        }), 200 if created or not failed else 400
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -205,7 +186,7 @@ def create_sale():
 def get_sale(sale_id):
     """Get a specific sale"""
     try:
-        sale = Sale.query.get_or_404(sale_id)
+        sale = with_profile(Sale.query, 'sale_with_items').get_or_404(sale_id)
         return jsonify(sale.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -218,6 +199,14 @@ def update_sale(sale_id):
         sale = Sale.query.get_or_404(sale_id)
         data = request.get_json()
         
+        # Voiding restores stock and takes the sale out of the daily rollups, which
+        # only the void endpoint does; a voided sale stays voided
+        if 'payment_status' in data and data['payment_status'] != sale.payment_status:
+            if sale.payment_status == 'voided':
+                return jsonify({'error': 'A voided sale cannot change payment status'}), 400
+            if data['payment_status'] == 'voided':
+                return jsonify({'error': f'Use POST /api/sales/{sale.id}/void to void a sale'}), 400
+        
         # Only allow updating certain fields
         if 'customer_name' in data:
             sale.customer_name = data['customer_name']
@@ -231,6 +220,8 @@ def update_sale(sale_id):
             sale.notes = data['notes']
         
         db.session.commit()
+        document_cache.invalidate_sale(sale.id)
+        report_cache.invalidate('sales', store_ids=[sale.store_id])
         return jsonify(sale.to_dict()), 200
         
     except Exception as e:
@@ -248,12 +239,14 @@ def void_sale(sale_id):
             return jsonify({'error': 'Sale is already voided'}), 400
         
         # Restore inventory quantities
+        restored = []
         for item in sale.sale_items:
             if item.inventory_id:
                 # Restore to specific inventory batch
                 inventory = Inventory.query.get(item.inventory_id)
                 if inventory:
                     inventory.quantity += item.quantity
+                    restored.append((item, inventory))
             else:
                 # Create new inventory entry or add to existing
                 # Find most recent inventory for this product in the store
@@ -265,6 +258,7 @@ def void_sale(sale_id):
                 
                 if recent_inventory:
                     recent_inventory.quantity += item.quantity
+                    restored.append((item, recent_inventory))
                 else:
                     # Create new inventory entry
                     new_inventory = Inventory(
@@ -277,12 +271,31 @@ def void_sale(sale_id):
                         notes=f"Restored from voided sale {sale.invoice_number}"
                     )
                     db.session.add(new_inventory)
+                    restored.append((item, new_inventory))
+        
+        # Record the restored stock in the ledger; new batches need their ids first
+        db.session.flush()
+        insert_ledger_rows([{
+            'product_id': item.product_id,
+            'inventory_id': inventory.id,
+            'store_id': sale.store_id,
+            'quantity': item.quantity,  # Positive for return
+            'transaction_type': 'return',
+            'unit_price': item.unit_price,
+            'total': item.unit_price * item.quantity,
+            'reference': f"Void: {sale.invoice_number}",
+            'user_id': current_user.id
+        } for item, inventory in restored])
+        
+        reverse_sale(sale)
         
         # Update sale status
         sale.payment_status = 'voided'
         sale.notes = (sale.notes or '') + f"\nVoided on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         
         db.session.commit()
+        document_cache.invalidate_sale(sale.id)
+        report_cache.invalidate('sales', 'inventory', 'transactions', store_ids=[sale.store_id])
         return jsonify(sale.to_dict()), 200
         
     except Exception as e:
@@ -298,45 +311,46 @@ def get_sales_summary():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        query = Sale.query
-        
-        # Apply filters
-        if store_id:
-            query = query.filter(Sale.store_id == store_id)
-        if start_date:
-            query = query.filter(Sale.sale_date >= datetime.fromisoformat(start_date))
-        if end_date:
-            query = query.filter(Sale.sale_date <= datetime.fromisoformat(end_date))
-        
-        sales = query.all()
-        
-        # Calculate summary statistics
-        total_sales = len(sales)
-        total_revenue = sum(sale.total_amount for sale in sales)
-        total_cost = sum(
-            sum(item.unit_cost * item.quantity for item in sale.sale_items if item.unit_cost)
-            for sale in sales
+        # Both passes read whole days from the daily rollups rather than every sale
+        payments, lines = summary_rows(
+            datetime.fromisoformat(start_date) if start_date else None,
+            datetime.fromisoformat(end_date) if end_date else None,
+            store_id
         )
-        total_profit = total_revenue - total_cost
-        
-        # Group by payment method
         payment_methods = {}
-        for sale in sales:
-            method = sale.payment_method
-            if method not in payment_methods:
-                payment_methods[method] = {'count': 0, 'amount': 0}
-            payment_methods[method]['count'] += 1
-            payment_methods[method]['amount'] += float(sale.total_amount)
+        total_sales = 0
+        total_revenue = Decimal('0')
+        for method, count, amount in db.session.query(
+            payments.c.payment_method,
+            func.sum(payments.c.sale_count),
+            func.coalesce(func.sum(payments.c.total_amount), 0)
+        ).group_by(payments.c.payment_method):
+            if not count:
+                continue
+            payment_methods[method] = {'count': int(count), 'amount': float(amount)}
+            total_sales += int(count)
+            total_revenue += Decimal(str(amount))
+        
+        product_rows = [row for row in db.session.query(
+            lines.c.product_id,
+            func.sum(lines.c.quantity),
+            func.coalesce(func.sum(lines.c.revenue), 0),
+            func.coalesce(func.sum(lines.c.cost), 0)
+        ).group_by(lines.c.product_id) if row[1]]
+        total_cost = sum((Decimal(str(cost)) for _, _, _, cost in product_rows), Decimal('0'))
+        total_profit = total_revenue - total_cost
         
         # Top selling products
+        product_names = dict(db.session.query(Product.id, Product.name).filter(
+            Product.id.in_([product_id for product_id, _, _, _ in product_rows])
+        )) if product_rows else {}
         product_sales = {}
-        for sale in sales:
-            for item in sale.sale_items:
-                product_name = item.product.name if item.product else 'Unknown'
-                if product_name not in product_sales:
-                    product_sales[product_name] = {'quantity': 0, 'revenue': 0}
-                product_sales[product_name]['quantity'] += item.quantity
-                product_sales[product_name]['revenue'] += float(item.line_total)
+        for product_id, quantity, revenue, _ in product_rows:
+            product_name = product_names.get(product_id, 'Unknown')
+            if product_name not in product_sales:
+                product_sales[product_name] = {'quantity': 0, 'revenue': 0}
+            product_sales[product_name]['quantity'] += int(quantity)
+            product_sales[product_name]['revenue'] += float(revenue)
         
         top_products = sorted(
             product_sales.items(),
@@ -10,6 +10,9 @@ from src.models.store import Store
 from src.models.flavor import Flavor, ProductFlavor
 from src.models.sale import Sale, SaleItem
 from src.models.grn import GRN, GRNItem
+from src.models.stock_level import StockLevel
+from src.models.sales_daily import SalesDaily, SalesDailyPayment
+from src.services import report_cache
 from decimal import Decimal
 
 seed_bp = Blueprint('seed', __name__)
@@ -20,11 +23,14 @@ def seed_data():
     """Populate the database with comprehensive sample data"""
     try:
         # Clear existing data
+        db.session.query(SalesDaily).delete()
+        db.session.query(SalesDailyPayment).delete()
         db.session.query(SaleItem).delete()
         db.session.query(Sale).delete()
         db.session.query(GRNItem).delete()
         db.session.query(GRN).delete()
         db.session.query(Transaction).delete()
+        db.session.query(StockLevel).delete()
         db.session.query(Inventory).delete()
         db.session.query(ProductFlavor).delete()
         db.session.query(Product).delete()
@@ -268,7 +274,13 @@ def seed_data():
                 sale.tax_amount = sale.subtotal * Decimal('0.1')
                 sale.total_amount = sale.subtotal + sale.tax_amount
         
+        # Sample sales are written directly, so build their rollups in one pass
+        db.session.flush()
+        SalesDaily.rebuild()
+        SalesDailyPayment.rebuild()
+        
         db.session.commit()
+        report_cache.clear()
         
         return jsonify({
             'message': 'Sample data created successfully',
@@ -6,10 +6,20 @@ from src.models.transaction import Transaction
 from src.models.inventory import Inventory
 from src.models.product import Product
 from src.models.store import Store
+from src.models.loading_profiles import with_profile
+from src.models.summary_views import list_serializer, parse_view, summary_query
+from src.services.pagination import keyset_paginate, cursor_pagination_dict
+from src.services.allocation import AllocationLine, InsufficientStockError, allocate, insert_ledger_rows
+from src.services.numbering import next_document_number
+from src.services.idempotency import idempotent
+from src.services import report_cache
 from datetime import datetime
 
 stock_transfers_bp = Blueprint('stock_transfers', __name__)
 
+# Stable keyset order for cursor pagination; id breaks ties
+TRANSFER_KEYSET = [(StockTransfer.transfer_date, True), (StockTransfer.id, True)]
+
 @stock_transfers_bp.route('/stock-transfers', methods=['GET'])
 @login_required
 def get_stock_transfers():
@@ -21,8 +31,20 @@ def get_stock_transfers():
         to_store_id = request.args.get('to_store_id', type=int)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
+        
+        try:
+            view, fields = parse_view('transfer', request.args.get('view'), request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        serialize = list_serializer('transfer', view, fields)
         
-        query = StockTransfer.query
+        # The summary view is one flat column query; the full view loads whole documents
+        if view == 'summary':
+            query = summary_query('transfer', fields, TRANSFER_KEYSET)
+        else:
+            query = with_profile(StockTransfer.query, 'transfer_with_items')
         
         # Apply filters
         if status:
@@ -32,13 +54,25 @@ def get_stock_transfers():
         if to_store_id:
             query = query.filter(StockTransfer.to_store_id == to_store_id)
         
+        if cursor is not None:
+            try:
+                transfers, next_cursor = keyset_paginate(query, TRANSFER_KEYSET, cursor, per_page)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'transfers': [serialize(transfer) for transfer in transfers],
+                'pagination': cursor_pagination_dict(
+                    per_page, next_cursor, query.order_by(None).count() if include_total else None
+                )
+            }), 200
+        
         # Paginate results
         transfers = query.order_by(StockTransfer.transfer_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+            page=page, per_page=per_page, error_out=False, count=include_total
         )
         
         return jsonify({
-            'transfers': [transfer.to_dict() for transfer in transfers.items],
+            'transfers': [serialize(transfer) for transfer in transfers.items],
             'pagination': {
                 'page': page,
                 'pages': transfers.pages,
@@ -52,6 +86,7 @@ def get_stock_transfers():
 
 @stock_transfers_bp.route('/stock-transfers', methods=['POST'])
 @login_required
+@idempotent('stock-transfers')
 def create_stock_transfer():
     """Create a new stock transfer"""
     try:
@@ -74,7 +109,7 @@ def create_stock_transfer():
             return jsonify({'error': 'Invalid store ID'}), 400
         
         # Generate transfer number
-        transfer_number = f"ST{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        transfer_number = next_document_number('transfer', from_store.id)
         
         # Create transfer
         transfer = StockTransfer(
@@ -125,6 +160,7 @@ def create_stock_transfer():
             db.session.add(transfer_item)
         
         db.session.commit()
+        report_cache.invalidate('transfers', store_ids=[transfer.from_store_id, transfer.to_store_id])
         return jsonify(transfer.to_dict()), 201
         
     except Exception as e:
@@ -136,7 +172,7 @@ def create_stock_transfer():
 def get_stock_transfer(transfer_id):
     """Get a specific stock transfer"""
     try:
-        transfer = StockTransfer.query.get_or_404(transfer_id)
+        transfer = with_profile(StockTransfer.query, 'transfer_with_items').get_or_404(transfer_id)
         return jsonify(transfer.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -151,39 +187,29 @@ def approve_stock_transfer(transfer_id):
         if transfer.status != 'pending':
             return jsonify({'error': 'Transfer is not in pending status'}), 400
         
-        # Process each transfer item
-        for item in transfer.transfer_items:
-            # Reduce from any available inventory (FIFO)
-            available_inventory = Inventory.query.filter_by(
-                product_id=item.product_id,
-                store_id=transfer.from_store_id,
-                is_active=True
-            ).filter(Inventory.quantity > 0).order_by(Inventory.date_received).all()
-            
-            remaining_qty_to_transfer = item.quantity
-            for inv in available_inventory:
-                if remaining_qty_to_transfer <= 0:
-                    break
-                
-                transfer_qty = min(inv.quantity, remaining_qty_to_transfer)
-                
-                # Reduce from source
-                inv.quantity -= transfer_qty
-                remaining_qty_to_transfer -= transfer_qty
-                
-                # FIX: Added the 'store_id' argument for the outgoing transaction
-                out_transaction = Transaction(
-                    product_id=item.product_id,
-                    inventory_id=inv.id,
-                    store_id=transfer.from_store_id,
-                    quantity=-transfer_qty,
-                    transaction_type='transfer-out',
-                    reference=f"To {transfer.to_store.name}: {transfer.transfer_number}",
-                    user_id=current_user.id
-                )
-                db.session.add(out_transaction)
-
-                # Create or update in destination
+        # Allocate source batches for every item in one pass
+        items = transfer.transfer_items
+        lines = [
+            AllocationLine(item.product_id, item.product_flavor_id, transfer.from_store_id, item.quantity, item.inventory_id)
+            for item in items
+        ]
+        try:
+            allocations = allocate(lines, request.args.get('allocation_policy'))
+        except InsufficientStockError as e:
+            db.session.rollback()
+            product = Product.query.get(e.product_id) if e.product_id else None
+            return jsonify({'error': f'Insufficient inventory for {product.name}' if product else str(e)}), 400
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        from_store_name = transfer.from_store.name
+        to_store_name = transfer.to_store.name
+        
+        # Destination batches mirror the source batches they were taken from
+        moves = []
+        for item, picked in zip(items, allocations):
+            for inv, transfer_qty in picked:
                 dest_inventory = Inventory(
                     product_id=item.product_id,
                     product_flavor_id=item.product_flavor_id,
@@ -195,25 +221,35 @@ def approve_stock_transfer(transfer_id):
                     unit_cost=item.unit_cost or inv.unit_cost,
                     location=inv.location,
                     date_received=inv.date_received,
-                    notes=f"Transferred from {transfer.from_store.name}"
+                    notes=f"Transferred from {from_store_name}"
                 )
                 db.session.add(dest_inventory)
-                db.session.flush()
-
-                # FIX: Added the 'store_id' argument for the incoming transaction
-                in_transaction = Transaction(
-                    product_id=item.product_id,
-                    inventory_id=dest_inventory.id,
-                    store_id=transfer.to_store_id,
-                    quantity=transfer_qty,
-                    transaction_type='transfer-in',
-                    reference=f"From {transfer.from_store.name}: {transfer.transfer_number}",
-                    user_id=current_user.id
-                )
-                db.session.add(in_transaction)
-
-            if remaining_qty_to_transfer > 0:
-                return jsonify({'error': f'Insufficient inventory for {item.product.name}'}), 400
+                moves.append((item, inv, dest_inventory, transfer_qty))
+        
+        # One flush assigns every destination batch id
+        db.session.flush()
+        
+        ledger_rows = []
+        for item, inv, dest_inventory, transfer_qty in moves:
+            ledger_rows.append({
+                'product_id': item.product_id,
+                'inventory_id': inv.id,
+                'store_id': transfer.from_store_id,
+                'quantity': -transfer_qty,
+                'transaction_type': 'transfer-out',
+                'reference': f"To {to_store_name}: {transfer.transfer_number}",
+                'user_id': current_user.id
+            })
+            ledger_rows.append({
+                'product_id': item.product_id,
+                'inventory_id': dest_inventory.id,
+                'store_id': transfer.to_store_id,
+                'quantity': transfer_qty,
+                'transaction_type': 'transfer-in',
+                'reference': f"From {from_store_name}: {transfer.transfer_number}",
+                'user_id': current_user.id
+            })
+        insert_ledger_rows(ledger_rows)
         
         # Update transfer status
         transfer.status = 'completed'
@@ -221,6 +257,7 @@ def approve_stock_transfer(transfer_id):
         transfer.approved_by = current_user.id
         
         db.session.commit()
+        report_cache.invalidate('transfers', 'inventory', 'transactions', store_ids=[transfer.from_store_id, transfer.to_store_id])
         return jsonify(transfer.to_dict()), 200
         
     except Exception as e:
@@ -240,6 +277,7 @@ def cancel_stock_transfer(transfer_id):
         
         transfer.status = 'cancelled'
         db.session.commit()
+        report_cache.invalidate('transfers', store_ids=[transfer.from_store_id, transfer.to_store_id])
         
         return jsonify(transfer.to_dict()), 200
         
@@ -264,6 +302,7 @@ def update_stock_transfer(transfer_id):
             transfer.notes = data['notes']
         
         db.session.commit()
+        report_cache.invalidate('transfers', store_ids=[transfer.from_store_id, transfer.to_store_id])
         return jsonify(transfer.to_dict()), 200
         
     except Exception as e:
@@ -2,6 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from src.models.user import db
 from src.models.store import Store
+from src.services import report_cache
+from src.services.low_stock import get_low_stock
+from src.services.pagination import clamp_page, pagination_dict
+from src.services.expiry import expiry_summary
 
 stores_bp = Blueprint('stores', __name__)
 
@@ -41,6 +45,7 @@ def create_store():
         
         db.session.add(store)
         db.session.commit()
+        report_cache.invalidate('stores', store_ids=[store.id])
         
         return jsonify(store.to_dict()), 201
         
@@ -87,6 +92,7 @@ def update_store(store_id):
             store.is_active = data['is_active']
         
         db.session.commit()
+        report_cache.invalidate('stores', store_ids=[store_id])
         return jsonify(store.to_dict()), 200
         
     except Exception as e:
@@ -105,11 +111,13 @@ def delete_store(store_id):
             # Soft delete instead of hard delete
             store.is_active = False
             db.session.commit()
+            report_cache.invalidate('stores', store_ids=[store_id])
             return jsonify({'message': 'Store deactivated successfully'}), 200
         else:
             # Hard delete if no related data
             db.session.delete(store)
             db.session.commit()
+            report_cache.invalidate('stores', store_ids=[store_id])
             return jsonify({'message': 'Store deleted successfully'}), 200
         
     except Exception as e:
@@ -125,7 +133,6 @@ def get_store_inventory_summary(store_id):
         
         # Get inventory statistics for this store
         from src.models.inventory import Inventory
-        from src.models.product import Product
         from sqlalchemy import func
         
         total_items = Inventory.query.filter_by(store_id=store_id, is_active=True).count()
@@ -134,35 +141,38 @@ def get_store_inventory_summary(store_id):
         ).scalar() or 0
         
         # Low stock products for this store
+        by_flavor = request.args.get('by_flavor', 'false').lower() == 'true'
+        page, per_page = clamp_page(request.args.get('page', 1, type=int), request.args.get('per_page', 50, type=int))
+        low_stock_rows, low_stock_count = get_low_stock(
+            store_id=store_id, by_flavor=by_flavor, active_only=True, page=page, per_page=per_page
+        )
         low_stock_products = []
-        products = Product.query.filter_by(is_active=True).all()
-        for product in products:
-            store_quantity = product.get_total_quantity(store_id)
-            if store_quantity <= product.reorder_point:
-                low_stock_products.append({
-                    'product_id': product.id,
-                    'product_name': product.name,
-                    'current_stock': store_quantity,
-                    'reorder_point': product.reorder_point
-                })
+        for row in low_stock_rows:
+            entry = {
+                'product_id': row['product_id'],
+                'product_name': row['product_name'],
+                'current_stock': row['current_stock'],
+                'reorder_point': row['reorder_point']
+            }
+            if by_flavor:
+                entry['product_flavor_id'] = row['product_flavor_id']
+                entry['flavor_name'] = row['flavor_name']
+            low_stock_products.append(entry)
         
         # Expired items for this store
-        from datetime import date
-        expired_items = Inventory.query.filter(
-            Inventory.store_id == store_id,
-            Inventory.expiration_date < date.today(),
-            Inventory.is_active == True
-        ).count()
+        expiry = expiry_summary(thresholds=(0,), store_id=store_id, active_only=True)
+        expired_items = expiry['buckets']['expired']['items']
         
         return jsonify({
             'store': store.to_dict(),
             'inventory_summary': {
                 'total_items': total_items,
                 'total_value': float(total_value),
-                'low_stock_count': len(low_stock_products),
+                'low_stock_count': low_stock_count,
                 'expired_items': expired_items
             },
-            'low_stock_products': low_stock_products
+            'low_stock_products': low_stock_products,
+            'pagination': pagination_dict(page, per_page, low_stock_count)
         }), 200
         
     except Exception as e:
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from src.models.user import db
 from src.models.supplier import Supplier
+from src.services import report_cache
 
 suppliers_bp = Blueprint('suppliers', __name__)
 
@@ -66,6 +67,7 @@ def create_supplier():
     
     db.session.add(supplier)
     db.session.commit()
+    report_cache.invalidate('suppliers')
     
     return jsonify({
         'message': 'Supplier created successfully',
@@ -98,6 +100,7 @@ def update_supplier(supplier_id):
         supplier.phone = data['phone']
     
     db.session.commit()
+    report_cache.invalidate('suppliers')
     
     return jsonify({
         'message': 'Supplier updated successfully',
@@ -117,6 +120,7 @@ def delete_supplier(supplier_id):
     
     db.session.delete(supplier)
     db.session.commit()
+    report_cache.invalidate('suppliers')
     
     return jsonify({'message': 'Supplier deleted successfully'}), 200
 
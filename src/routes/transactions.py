@@ -3,22 +3,30 @@ from flask_login import login_required, current_user
 from datetime import datetime
 from src.models.user import db
 from src.models.transaction import Transaction
+from src.models.loading_profiles import with_profile
+from src.services.pagination import keyset_paginate, cursor_pagination_dict
+from src.services.sales_rollup import period_totals
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Stable keyset order for cursor pagination; id breaks ties
+TRANSACTION_KEYSET = [(Transaction.transaction_date, True), (Transaction.id, True)]
+
 @transactions_bp.route('/transactions', methods=['GET'])
 @login_required
 def get_transactions():
     """Get all transactions with optional filtering"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    cursor = request.args.get('cursor')
+    include_total = request.args.get('include_total', 'true').lower() != 'false'
     product_id = request.args.get('product_id', type=int)
     transaction_type = request.args.get('transaction_type')
     user_id = request.args.get('user_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = Transaction.query
+    query = with_profile(Transaction.query, 'transaction_list')
     
     # Apply filters
     if product_id:
@@ -46,10 +54,22 @@ def get_transactions():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
+    if cursor is not None:
+        try:
+            transactions, next_cursor = keyset_paginate(query, TRANSACTION_KEYSET, cursor, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'transactions': [transaction.to_dict() for transaction in transactions],
+            'pagination': cursor_pagination_dict(
+                per_page, next_cursor, query.count() if include_total else None
+            )
+        }), 200
+    
     # Order by most recent first
     query = query.order_by(Transaction.transaction_date.desc())
     
-    transactions = query.paginate(page=page, per_page=per_page, error_out=False)
+    transactions = query.paginate(page=page, per_page=per_page, error_out=False, count=include_total)
     
     return jsonify({
         'transactions': [transaction.to_dict() for transaction in transactions.items],
@@ -62,57 +82,21 @@ def get_transactions():
 @login_required
 def get_transaction(transaction_id):
     """Get specific transaction"""
-    transaction = Transaction.query.get_or_404(transaction_id)
+    transaction = with_profile(Transaction.query, 'transaction_list').get_or_404(transaction_id)
     return jsonify(transaction.to_dict()), 200
 
 @transactions_bp.route('/transactions/summary', methods=['GET'])
 @login_required
 def get_transaction_summary():
     """Get transaction summary statistics"""
-    from sqlalchemy import func
-    from datetime import date, timedelta
-    
-    # Get today's transactions
-    today = date.today()
-    today_start = datetime.combine(today, datetime.min.time())
-    today_end = datetime.combine(today, datetime.max.time())
-    
-    today_sales = Transaction.query.filter(
-        Transaction.transaction_type == 'sale',
-        Transaction.transaction_date >= today_start,
-        Transaction.transaction_date <= today_end
-    ).count()
-    
-    # Get this week's transactions
-    week_start = today - timedelta(days=today.weekday())
-    week_start_dt = datetime.combine(week_start, datetime.min.time())
-    
-    week_sales = Transaction.query.filter(
-        Transaction.transaction_type == 'sale',
-        Transaction.transaction_date >= week_start_dt
-    ).count()
-    
-    # Get this month's transactions
-    month_start = today.replace(day=1)
-    month_start_dt = datetime.combine(month_start, datetime.min.time())
-    
-    month_sales = Transaction.query.filter(
-        Transaction.transaction_type == 'sale',
-        Transaction.transaction_date >= month_start_dt
-    ).count()
-    
-    # Get total quantities sold today
-    today_quantity = db.session.query(func.sum(Transaction.quantity)).filter(
-        Transaction.transaction_type == 'sale',
-        Transaction.transaction_date >= today_start,
-        Transaction.transaction_date <= today_end
-    ).scalar() or 0
+    # Whole days are read from the sales_daily rollup, today from the sale tables
+    periods = period_totals(request.args.get('store_id', type=int))
     
     return jsonify({
-        'today_sales': today_sales,
-        'week_sales': week_sales,
-        'month_sales': month_sales,
-        'today_quantity_sold': today_quantity
+        'today_sales': periods['today_sales'],
+        'week_sales': periods['week_sales'],
+        'month_sales': periods['month_sales'],
+        'today_quantity_sold': periods['today_quantity']
     }), 200
 
 @transactions_bp.route('/transactions/types', methods=['GET'])
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.services import report_cache
 
 user_bp = Blueprint('user', __name__)
 
@@ -15,6 +16,7 @@ def create_user():
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
     db.session.commit()
+    report_cache.invalidate('users')
     return jsonify(user.to_dict()), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
@@ -29,6 +31,7 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    report_cache.invalidate('users')
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -36,4 +39,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    report_cache.invalidate('users')
     return '', 204
@@ -0,0 +1,174 @@
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, insert, or_, and_
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.models.stock_level import StockLevel
+from src.models.transaction import Transaction
+
+ALLOCATION_POLICIES = ('fifo', 'fefo')
+
+# One stock requirement: take `quantity` of a product (optionally one flavor, or one
+# specific batch) from a store.
+AllocationLine = namedtuple('AllocationLine', 'product_id product_flavor_id store_id quantity inventory_id')
+
+class InsufficientStockError(ValueError):
+    """Raised when the candidate batches cannot cover a line"""
+
+    def __init__(self, message, product_id=None):
+        super().__init__(message)
+        self.product_id = product_id
+
+def get_allocation_policy(override=None):
+    """Resolve the batch allocation policy: explicit override, then STOCK_ALLOCATION_POLICY config, then FIFO"""
+    policy = (override or current_app.config.get('STOCK_ALLOCATION_POLICY') or 'fifo').lower()
+    if policy not in ALLOCATION_POLICIES:
+        raise ValueError(f'Invalid allocation policy: {policy}. Use one of {", ".join(ALLOCATION_POLICIES)}')
+    return policy
+
+def _policy_order(policy):
+    if policy == 'fefo':
+        # Earliest expiry first; batches without an expiry date go last
+        return (Inventory.expiration_date.is_(None), Inventory.expiration_date, Inventory.date_received, Inventory.id)
+    return (Inventory.date_received, Inventory.id)
+
+def load_candidate_batches(lines, policy='fifo'):
+    """Load every sellable batch any of the lines could draw from, in one query.
+
+    Returns batches grouped by (product_id, store_id) in policy order, plus the
+    explicitly requested batches by id.
+    """
+    keys = {(line.product_id, line.store_id) for line in lines if not line.inventory_id}
+    batch_ids = {line.inventory_id for line in lines if line.inventory_id}
+
+    conditions = []
+    if keys:
+        # Plain IN lists keep the FIFO partial index usable; exact keys are matched below
+        conditions.append(and_(
+            Inventory.product_id.in_({product_id for product_id, _ in keys}),
+            Inventory.store_id.in_({store_id for _, store_id in keys}),
+            Inventory.is_active == True,
+            Inventory.quantity > 0
+        ))
+    if batch_ids:
+        conditions.append(Inventory.id.in_(list(batch_ids)))
+    if not conditions:
+        return {}, {}
+
+    batches = Inventory.query.filter(or_(*conditions)).order_by(*_policy_order(policy)).all()
+
+    by_key = {}
+    by_id = {}
+    for batch in batches:
+        by_id[batch.id] = batch
+        if (batch.product_id, batch.store_id) in keys and batch.is_active and batch.quantity > 0:
+            by_key.setdefault((batch.product_id, batch.store_id), []).append(batch)
+    return by_key, by_id
+
+def _eligible(batch, line):
+    # A flavored line draws from batches of that flavor and from untagged stock;
+    # a line without a flavor can draw from any batch of the product.
+    if line.product_flavor_id is None:
+        return True
+    return batch.product_flavor_id in (line.product_flavor_id, None)
+
+def allocate(lines, policy=None, batches=None):
+    """Allocate stock for all lines of a document against one batch snapshot.
+
+    Batch quantities are decremented in memory as lines are served, so several lines
+    for the same product share the remaining stock correctly. Pass `batches` (the
+    result of load_candidate_batches) to allocate several documents from one
+    snapshot. Returns, per line, a list of (batch, quantity) pairs. Raises
+    InsufficientStockError if a line cannot be covered, after putting back what the
+    earlier lines of this call took.
+    """
+    policy = get_allocation_policy(policy)
+    by_key, by_id = batches if batches is not None else load_candidate_batches(lines, policy)
+
+    allocations = []
+    try:
+        for line in lines:
+            allocations.append(_allocate_line(line, by_key, by_id))
+    except InsufficientStockError:
+        for picked in allocations:
+            for batch, quantity in picked:
+                batch.quantity += quantity
+        raise
+    return allocations
+
+def _allocate_line(line, by_key, by_id):
+    """Take one line's quantity from its candidate batches, in order"""
+    if line.inventory_id:
+        batch = by_id.get(line.inventory_id)
+        if not batch or batch.store_id != line.store_id or batch.product_id != line.product_id:
+            raise InsufficientStockError(f'Invalid inventory batch {line.inventory_id} for this store', line.product_id)
+        candidates = [batch]
+    else:
+        candidates = [b for b in by_key.get((line.product_id, line.store_id), []) if _eligible(b, line)]
+
+    remaining = line.quantity
+    picked = []
+    for batch in candidates:
+        if remaining <= 0:
+            break
+        if batch.quantity <= 0:
+            continue
+        quantity = min(batch.quantity, remaining)
+        batch.quantity -= quantity
+        remaining -= quantity
+        picked.append((batch, quantity))
+
+    if remaining > 0:
+        for batch, quantity in picked:
+            batch.quantity += quantity
+        if line.inventory_id:
+            raise InsufficientStockError(f'Insufficient quantity in batch {candidates[0].batch_number}', line.product_id)
+        raise InsufficientStockError(f'Insufficient inventory for product {line.product_id} in store', line.product_id)
+    return picked
+
+def insert_ledger_rows(rows):
+    """Write transaction ledger rows with a single executemany INSERT"""
+    if rows:
+        db.session.execute(insert(Transaction), rows)
+
+def write_batch_decrements(allocations):
+    """Write what allocate() took from each batch with one executemany UPDATE.
+
+    Flushing the batches through the ORM diffs every one of them and runs the stock
+    level hook over them; here the decrements go out as a single statement and the
+    stock levels are adjusted alongside. The in-memory quantities were only
+    allocate()'s working copy, so the batches are expired: a later flush leaves
+    them alone and the next read loads what the database now holds.
+
+    Allocation read the batches before the write lock was taken, so each
+    decrement only applies while the batch still holds what was taken. Raises
+    InsufficientStockError if any batch no longer does; the caller rolls back.
+    """
+    taken = {}
+    for picked in allocations:
+        for batch, quantity in picked:
+            taken[batch] = taken.get(batch, 0) + quantity
+    if not taken:
+        return
+    now = datetime.utcnow()
+    rows = [{'batch_id': batch.id, 'taken': quantity, 'now': now} for batch, quantity in taken.items()]
+    # Core updates bypass the ORM flush hook, so stock levels are updated here
+    deltas = {}
+    for batch, quantity in taken.items():
+        key = (batch.product_id, batch.product_flavor_id, batch.store_id)
+        deltas[key] = deltas.get(key, 0) - quantity
+    for batch in taken:
+        db.session.expire(batch)
+
+    table = Inventory.__table__
+    updated = db.session.execute(
+        table.update()
+        .where(table.c.id == bindparam('batch_id'), table.c.quantity >= bindparam('taken'))
+        .values(quantity=table.c.quantity - bindparam('taken'), updated_at=bindparam('now')),
+        rows
+    ).rowcount
+    if updated != len(rows):
+        # Another checkout took from the same batches since they were read
+        raise InsufficientStockError('Stock changed while the sale was being written, please retry')
+    StockLevel.apply_deltas(db.session.connection(), deltas)
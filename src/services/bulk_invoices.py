@@ -0,0 +1,214 @@
+import os
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import func
+from src.models.user import db
+from src.models.sale import Sale
+from src.models.document_job import DocumentJob
+from src.models.loading_profiles import with_profile
+from src.services.invoice_pdf import render_invoice_pdf
+from src.services.pdf_merge import StreamingPdfMerger
+
+OUTPUT_FORMATS = ('zip', 'pdf')
+
+# Sales loaded and handed to the pool per round; each round is two queries
+LOAD_CHUNK_SIZE = 200
+
+# One pool per process, shared by every job it runs
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=current_app.config.get('BULK_RENDER_WORKERS') or None)
+        return _executor
+
+def _discard_executor(executor):
+    """Drop a pool whose worker died; a broken pool rejects all work, so the next job starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _output_dir():
+    path = current_app.config['BULK_DOCUMENT_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def sale_snapshot(sale):
+    """Picklable copy of everything render_invoice_pdf() reads from a sale"""
+    def item_snapshot(item):
+        product_flavor = None
+        if item.product_flavor:
+            flavor = item.product_flavor.flavor
+            product_flavor = SimpleNamespace(flavor=SimpleNamespace(name=flavor.name) if flavor else None)
+        return SimpleNamespace(
+            product=SimpleNamespace(name=item.product.name, sku=item.product.sku) if item.product else None,
+            product_flavor=product_flavor,
+            quantity=item.quantity,
+            unit_price=item.unit_price,
+            line_total=item.line_total
+        )
+
+    return SimpleNamespace(
+        id=sale.id,
+        invoice_number=sale.invoice_number,
+        sale_date=sale.sale_date,
+        store=SimpleNamespace(name=sale.store.name) if sale.store else None,
+        customer_name=sale.customer_name,
+        customer_phone=sale.customer_phone,
+        customer_email=sale.customer_email,
+        subtotal=sale.subtotal,
+        tax_amount=sale.tax_amount,
+        discount_amount=sale.discount_amount,
+        total_amount=sale.total_amount,
+        payment_method=sale.payment_method,
+        payment_status=sale.payment_status,
+        notes=sale.notes,
+        sale_items=[item_snapshot(item) for item in sale.sale_items]
+    )
+
+def _render_snapshot(snapshot):
+    """Worker entry point"""
+    return snapshot.invoice_number, render_invoice_pdf(snapshot)
+
+def select_sale_ids(store_id=None, start_date=None, end_date=None):
+    """Ids of the sales matching a bulk filter, in invoice order"""
+    query = db.session.query(Sale.id)
+    if store_id:
+        query = query.filter(Sale.store_id == store_id)
+    if start_date:
+        query = query.filter(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.filter(Sale.sale_date <= end_date)
+    return [sale_id for sale_id, in query.order_by(Sale.sale_date, Sale.id)]
+
+def purge_expired_jobs(now=None):
+    """Delete jobs past their TTL together with their output files"""
+    ttl = timedelta(hours=float(current_app.config.get('BULK_DOCUMENT_TTL_HOURS', 24)))
+    expired = DocumentJob.query.filter(DocumentJob.created_at < (now or datetime.utcnow()) - ttl).all()
+    for job in expired:
+        if job.file_path:
+            try:
+                os.remove(job.file_path)
+            except FileNotFoundError:
+                pass
+        db.session.delete(job)
+    return len(expired)
+
+def fail_stale_jobs(now=None):
+    """Mark pending and running jobs that stopped reporting progress as failed.
+
+    A job runs on a thread of the process that started it, so if that process
+    exits or is restarted the job is never finished. Running jobs report after
+    every chunk; one silent for BULK_JOB_STALE_MINUTES has no thread left.
+    """
+    stale_after = timedelta(minutes=float(current_app.config.get('BULK_JOB_STALE_MINUTES', 10)))
+    now = now or datetime.utcnow()
+    return DocumentJob.query.filter(
+        DocumentJob.status.in_(('pending', 'running')),
+        func.coalesce(DocumentJob.updated_at, DocumentJob.created_at) < now - stale_after
+    ).update({
+        'status': 'failed',
+        'error': 'Job stopped without finishing; the process running it exited',
+        'finished_at': now
+    }, synchronize_session=False)
+
+def start_invoice_job(sale_ids, output_format, user):
+    """Create a job for the given sales and start rendering it in the background.
+
+    The caller has already checked the format. Returns the committed job.
+    """
+    purge_expired_jobs()
+    fail_stale_jobs()
+    job = DocumentJob(
+        id=uuid.uuid4().hex,
+        document_type='invoice',
+        output_format=output_format,
+        total=len(sale_ids),
+        created_by=user.id
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    threading.Thread(target=_run_invoice_job, args=(app, job.id, sale_ids, output_format), daemon=True).start()
+    return job
+
+def _set_job(job_id, **values):
+    db.session.query(DocumentJob).filter(DocumentJob.id == job_id).update(values)
+    db.session.commit()
+
+def _run_invoice_job(app, job_id, sale_ids, output_format):
+    """Load sales a chunk at a time, render them across the process pool and write the output"""
+    with app.app_context():
+        executor = None
+        temp_path = None
+        archive = None
+        output = None
+        try:
+            path = os.path.join(_output_dir(), f'{job_id}.{output_format}')
+            temp_path = f'{path}.tmp'
+            _set_job(job_id, status='running')
+            executor = _get_executor()
+            # Both formats are written to disk as each chunk renders, so a job's
+            # memory stays at one chunk however many invoices it has
+            if output_format == 'zip':
+                archive = zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_STORED)
+            else:
+                output = open(temp_path, 'wb')
+                merged = StreamingPdfMerger(output)
+            completed = 0
+            for start in range(0, len(sale_ids), LOAD_CHUNK_SIZE):
+                chunk = sale_ids[start:start + LOAD_CHUNK_SIZE]
+                sales = {
+                    sale.id: sale
+                    for sale in with_profile(Sale.query, 'sale_with_items').filter(Sale.id.in_(chunk))
+                }
+                snapshots = [sale_snapshot(sales[sale_id]) for sale_id in chunk if sale_id in sales]
+                # Drop the ORM objects and end the read transaction while the pool renders
+                db.session.expunge_all()
+                db.session.rollback()
+
+                # PDFs are already compressed, so the ZIP stores them as they are
+                for invoice_number, pdf_data in executor.map(_render_snapshot, snapshots, chunksize=4):
+                    if archive is not None:
+                        archive.writestr(f'invoice_{invoice_number}.pdf', pdf_data)
+                    else:
+                        merged.append(pdf_data)
+                completed += len(chunk)
+                _set_job(job_id, completed=completed)
+
+            if archive is not None:
+                archive.close()
+            else:
+                merged.close()
+                output.close()
+            os.replace(temp_path, path)
+            _set_job(job_id, status='completed', file_path=path, finished_at=datetime.utcnow())
+        except Exception as e:
+            db.session.rollback()
+            if isinstance(e, BrokenProcessPool):
+                _discard_executor(executor)
+            if archive is not None:
+                archive.close()
+            if output is not None:
+                output.close()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            try:
+                _set_job(job_id, status='failed', error=str(e) or type(e).__name__, finished_at=datetime.utcnow())
+            except Exception:
+                # Left for fail_stale_jobs() once the job stops reporting
+                db.session.rollback()
+        finally:
+            db.session.remove()
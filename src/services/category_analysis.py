@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from sqlalchemy import func, literal, select, union_all
+from src.models.user import db
+from src.models.product import Product, Category
+from src.models.inventory import Inventory
+from src.models.store import Store
+from src.services.sales_rollup import sales_rows
+
+# Window for the sales columns, in days
+SALES_DAYS = 30
+
+# What a unit of stock is worth: the batch's own cost (falling back to the
+# product's cost price for batches received without one), or the product's cost price
+STOCK_VALUATIONS = ('unit_cost', 'cost_price')
+
+def _category_rows(value_at, store_id=None, today=None):
+    """Stock and recent sales per category and store as one union subquery.
+
+    Stock rows come from inventory and sales rows from the sales rollup, each
+    already grouped, so the caller only has to add them up.
+    """
+    if value_at not in STOCK_VALUATIONS:
+        raise ValueError(f"value_at must be one of: {', '.join(STOCK_VALUATIONS)}")
+    unit_value = (
+        func.coalesce(Inventory.unit_cost, Product.cost_price, 0) if value_at == 'unit_cost'
+        else func.coalesce(Product.cost_price, 0)
+    )
+    stock = select(
+        Product.category_id.label('category_id'),
+        Inventory.store_id.label('store_id'),
+        func.sum(Inventory.quantity).label('total_quantity'),
+        func.sum(Inventory.quantity * unit_value).label('total_stock_value'),
+        literal(0).label('units_sold'),
+        literal(0).label('revenue')
+    ).join(Product, Product.id == Inventory.product_id).group_by(Product.category_id, Inventory.store_id)
+    if store_id:
+        stock = stock.where(Inventory.store_id == store_id)
+
+    recent = sales_rows((today or date.today()) - timedelta(days=SALES_DAYS), store_id=store_id)
+    sales = select(
+        Product.category_id.label('category_id'),
+        recent.c.store_id.label('store_id'),
+        literal(0).label('total_quantity'),
+        literal(0).label('total_stock_value'),
+        func.sum(recent.c.quantity).label('units_sold'),
+        func.sum(recent.c.revenue).label('revenue')
+    ).join(Product, Product.id == recent.c.product_id).group_by(Product.category_id, recent.c.store_id)
+
+    return union_all(stock, sales).subquery('category_rows')
+
+def _totals(rows):
+    return (
+        func.coalesce(func.sum(rows.c.total_quantity), 0).label('total_quantity'),
+        func.coalesce(func.sum(rows.c.total_stock_value), 0).label('total_stock_value'),
+        func.coalesce(func.sum(rows.c.units_sold), 0).label('units_sold'),
+        func.coalesce(func.sum(rows.c.revenue), 0).label('revenue')
+    )
+
+def category_statistics(value_at='unit_cost', store_id=None, today=None):
+    """Every category with its product count, stock and recent sales, in one query"""
+    rows = _category_rows(value_at, store_id, today)
+    per_category = select(rows.c.category_id, *_totals(rows)).group_by(rows.c.category_id).subquery()
+    product_counts = select(
+        Product.category_id.label('category_id'),
+        func.count(Product.id).label('product_count')
+    ).group_by(Product.category_id).subquery()
+
+    return db.session.query(
+        Category,
+        func.coalesce(product_counts.c.product_count, 0).label('product_count'),
+        func.coalesce(per_category.c.total_quantity, 0).label('total_quantity'),
+        func.coalesce(per_category.c.total_stock_value, 0).label('total_stock_value'),
+        func.coalesce(per_category.c.units_sold, 0).label('units_sold'),
+        func.coalesce(per_category.c.revenue, 0).label('revenue')
+    ).outerjoin(
+        product_counts, product_counts.c.category_id == Category.id
+    ).outerjoin(
+        per_category, per_category.c.category_id == Category.id
+    ).order_by(Category.name, Category.id).all()
+
+def category_store_breakdown(value_at='unit_cost', store_id=None, today=None):
+    """Stock and recent sales per category and store, in one query; {category_id: [rows]}"""
+    rows = _category_rows(value_at, store_id, today)
+    breakdown = {}
+    for row in db.session.query(
+        rows.c.category_id, rows.c.store_id, Store.name.label('store_name'), *_totals(rows)
+    ).outerjoin(Store, Store.id == rows.c.store_id).group_by(
+        rows.c.category_id, rows.c.store_id, Store.name
+    ).order_by(rows.c.category_id, rows.c.store_id):
+        breakdown.setdefault(row.category_id, []).append(row)
+    return breakdown
@@ -0,0 +1,300 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from src.models.user import db
+from src.models.sale import Sale, SaleItem
+from src.models.product import Product
+from src.models.flavor import ProductFlavor
+from src.models.store import Store
+from src.services.allocation import (
+    AllocationLine, allocate, get_allocation_policy, insert_ledger_rows, load_candidate_batches,
+    write_batch_decrements
+)
+from src.services.numbering import next_document_numbers
+from src.services.sales_rollup import record_sales
+
+def _parse_amount(value, field):
+    """A money field from the basket as a Decimal, rejecting anything that is not a plain amount"""
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'Invalid {field}: {value}')
+    # Decimal accepts 'NaN' and 'Infinity', which would poison the sale totals and rollups
+    if not amount.is_finite():
+        raise ValueError(f'Invalid {field}: {value}')
+    if amount < 0:
+        raise ValueError(f'{field} cannot be negative')
+    return amount
+
+# How far ahead of the server's clock a terminal's sale_date may be
+SALE_DATE_CLOCK_SKEW = timedelta(minutes=5)
+
+def _parse_sale_date(value, now):
+    """A basket's sale_date as naive UTC, like every other timestamp; naive input is taken as UTC"""
+    try:
+        sale_date = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid sale_date: {value}. Use ISO 8601')
+    if sale_date.tzinfo is not None:
+        sale_date = sale_date.astimezone(timezone.utc).replace(tzinfo=None)
+    if sale_date > now + SALE_DATE_CLOCK_SKEW:
+        raise ValueError('sale_date cannot be in the future')
+    return sale_date
+
+def _parse_lines(items):
+    """Validate the basket shape and amounts before touching the database.
+
+    Returns (item_data, quantity, unit_price, discount_amount) per line.
+    """
+    if not items or not isinstance(items, list):
+        raise ValueError('At least one item is required')
+    lines = []
+    for item_data in items:
+        if not isinstance(item_data, dict):
+            raise ValueError('Each item must be an object')
+        if not item_data.get('product_id') or not item_data.get('quantity') or not item_data.get('unit_price'):
+            raise ValueError('Product ID, quantity, and unit price are required for all items')
+        quantity = int(item_data['quantity'])
+        if quantity <= 0:
+            raise ValueError('Quantity must be positive')
+        unit_price = _parse_amount(item_data['unit_price'], 'unit_price')
+        discount_amount = _parse_amount(item_data.get('discount_amount') or 0, 'discount_amount')
+        lines.append((item_data, quantity, unit_price, discount_amount))
+    return lines
+
+def _allocation_lines(lines, store_id):
+    return [
+        AllocationLine(
+            int(item_data['product_id']),
+            int(item_data['product_flavor_id']) if item_data.get('product_flavor_id') else None,
+            store_id,
+            quantity,
+            int(item_data['inventory_id']) if item_data.get('inventory_id') else None
+        )
+        for item_data, quantity, _, _ in lines
+    ]
+
+def _prefetch(baskets):
+    """Load every store, product and flavor the baskets reference, one query each.
+
+    The loaded objects sit in the session's identity map, so serializing the sales
+    afterwards does not query them again.
+    """
+    store_ids = {basket['store_id'] for basket in baskets}
+    stores = {store.id: store for store in Store.query.filter(Store.id.in_(store_ids))}
+
+    allocation_lines = [line for basket in baskets for line in basket['allocation_lines']]
+    product_ids = {line.product_id for line in allocation_lines}
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(product_ids))}
+
+    flavor_ids = {line.product_flavor_id for line in allocation_lines if line.product_flavor_id}
+    flavors = {}
+    if flavor_ids:
+        flavors = {
+            product_flavor.id: product_flavor
+            for product_flavor in ProductFlavor.query.options(joinedload(ProductFlavor.flavor)).filter(ProductFlavor.id.in_(flavor_ids))
+        }
+    return stores, products, flavors
+
+def _validate_references(basket, stores, products, flavors):
+    if basket['store_id'] not in stores:
+        raise ValueError('Invalid store ID')
+    for line in basket['allocation_lines']:
+        if line.product_id not in products:
+            raise ValueError(f'Invalid product ID: {line.product_id}')
+        if line.product_flavor_id and (
+            line.product_flavor_id not in flavors or flavors[line.product_flavor_id].product_id != line.product_id
+        ):
+            raise ValueError(f'Invalid product flavor ID: {line.product_flavor_id}')
+
+def _line_cost(picked):
+    """Weighted unit cost of the batches a line was allocated from"""
+    quantity = sum(qty for _, qty in picked)
+    cost = sum(Decimal(str(batch.unit_cost)) * qty for batch, qty in picked if batch.unit_cost)
+    return (cost / quantity).quantize(Decimal('0.01')) if quantity else Decimal('0')
+
+def _build_sale(data, basket, allocations, invoice_number, stores, products, flavors, user):
+    """Sale and lines for one allocated basket, neither yet in the session"""
+    # Relationships are set from the prefetched objects, which also keeps them
+    # referenced so serializing the sale is served from the identity map.
+    sale = Sale(
+        invoice_number=invoice_number,
+        store_id=basket['store_id'],
+        customer_name=data.get('customer_name'),
+        customer_phone=data.get('customer_phone'),
+        customer_email=data.get('customer_email'),
+        tax_amount=basket['tax_amount'],
+        discount_amount=basket['discount_amount'],
+        payment_method=data.get('payment_method', 'cash'),
+        payment_status=data.get('payment_status', 'paid'),
+        notes=data.get('notes'),
+        created_by=user.id
+    )
+    # Loaded values, as for the lines below; assigning them would make the flush
+    # walk the store's and the user's sales backrefs
+    set_committed_value(sale, 'store', stores[basket['store_id']])
+    set_committed_value(sale, 'creator', user)
+    if basket['sale_date']:
+        sale.sale_date = basket['sale_date']
+
+    sale_items = []
+    for (_, quantity, unit_price, discount_amount), line, picked in zip(
+        basket['lines'], basket['allocation_lines'], allocations
+    ):
+        inventory = picked[0][0] if line.inventory_id else None
+        item = SaleItem(
+            product_id=line.product_id,
+            product_flavor_id=line.product_flavor_id,
+            inventory_id=inventory.id if inventory else None,
+            quantity=quantity,
+            unit_price=unit_price,
+            unit_cost=_line_cost(picked),
+            line_total=quantity * unit_price - discount_amount,
+            discount_amount=discount_amount
+        )
+        # Lines reference the prefetched objects as already-loaded values, not
+        # as changes: the foreign keys are set above, and assigning them would
+        # make the flush walk every product's sale_items backref
+        set_committed_value(item, 'product', products[line.product_id])
+        set_committed_value(item, 'product_flavor', flavors.get(line.product_flavor_id))
+        set_committed_value(item, 'inventory', inventory)
+        sale_items.append(item)
+    # Totals are worked out from the lines now so the header is inserted complete;
+    # the collection is then detached again so adding the sale does not cascade the
+    # lines in before their ids are assigned
+    set_committed_value(sale, 'sale_items', sale_items)
+    sale.calculate_totals()
+    set_committed_value(sale, 'sale_items', [])
+    return sale, sale_items
+
+def checkout_many(payloads, user, policy=None):
+    """Build, allocate and flush several sales in one pass.
+
+    Stores, products, flavors and candidate batches are loaded with one set query
+    each for all payloads; availability, cost and batch allocation are worked out
+    in memory, each sale drawing from what the previous ones left. Headers, lines,
+    ledger rows and the daily rollup are then written with one executemany each. Returns one
+    (sale, error) pair per payload: a sale that fails validation or allocation
+    gets its error message and writes nothing. The caller commits.
+    """
+    policy = get_allocation_policy(policy)
+    results = [None] * len(payloads)
+    baskets = []
+    now = datetime.utcnow()
+    for index, data in enumerate(payloads):
+        try:
+            if not isinstance(data, dict):
+                raise ValueError('Each sale must be an object')
+            if not data.get('store_id'):
+                raise ValueError('Store ID is required')
+            # A sale is only voided through the void endpoint, which restores its stock
+            if data.get('payment_status') == 'voided':
+                raise ValueError('A sale cannot be created as voided')
+            store_id = int(data['store_id'])
+            lines = _parse_lines(data.get('items'))
+            allocation_lines = _allocation_lines(lines, store_id)
+            tax_amount = _parse_amount(data.get('tax_amount') or 0, 'tax_amount')
+            discount_amount = _parse_amount(data.get('discount_amount') or 0, 'discount_amount')
+            # Offline terminals send the time the sale actually happened
+            sale_date = _parse_sale_date(data['sale_date'], now) if data.get('sale_date') else None
+        except (TypeError, ValueError) as e:
+            results[index] = (None, str(e))
+            continue
+        baskets.append({
+            'index': index,
+            'store_id': store_id,
+            'sale_date': sale_date,
+            'tax_amount': tax_amount,
+            'discount_amount': discount_amount,
+            'lines': lines,
+            'allocation_lines': allocation_lines
+        })
+    if not baskets:
+        return results
+
+    stores, products, flavors = _prefetch(baskets)
+    batches = load_candidate_batches([line for basket in baskets for line in basket['allocation_lines']], policy)
+
+    # Numbers come from their own transaction, so take them before this session writes
+    invoice_numbers = {}
+    for store_id in {basket['store_id'] for basket in baskets if basket['store_id'] in stores}:
+        count = sum(1 for basket in baskets if basket['store_id'] == store_id)
+        invoice_numbers[store_id] = iter(next_document_numbers('invoice', store_id, count))
+
+    created = []
+    for basket in baskets:
+        data = payloads[basket['index']]
+        try:
+            _validate_references(basket, stores, products, flavors)
+            allocations = allocate(basket['allocation_lines'], policy, batches)
+        except ValueError as e:
+            results[basket['index']] = (None, str(e))
+            continue
+        try:
+            sale, sale_items = _build_sale(
+                data, basket, allocations, next(invoice_numbers[basket['store_id']]),
+                stores, products, flavors, user
+            )
+        except Exception:
+            # Put this basket's stock back before the next one allocates
+            for picked in allocations:
+                for batch, quantity in picked:
+                    batch.quantity += quantity
+            raise
+        created.append((sale, sale_items, allocations))
+        results[basket['index']] = (sale, None)
+    if not created:
+        return results
+
+    # Ledger rows need the batches but not the sale ids, so they are taken before
+    # the decrements are written and the batches expired
+    ledger_rows = []
+    for sale, sale_items, allocations in created:
+        for item, picked in zip(sale_items, allocations):
+            for batch, qty in picked:
+                ledger_rows.append({
+                    'product_id': item.product_id,
+                    'inventory_id': batch.id,
+                    'store_id': sale.store_id,
+                    'quantity': -qty,  # Negative for sale
+                    'transaction_type': 'sale',
+                    'unit_price': item.unit_price,
+                    'total': item.unit_price * qty,
+                    'reference': f"Sale: {sale.invoice_number}",
+                    'user_id': user.id
+                })
+
+    # One statement writes every batch decrement (taking SQLite's write lock), then
+    # one flush writes every header
+    write_batch_decrements([picked for _, _, allocations in created for picked in allocations])
+    db.session.add_all([sale for sale, _, _ in created])
+    db.session.flush()
+
+    # The decrements took SQLite's write lock, so no other sale's lines can be
+    # written before this commits. The lines are numbered here, which lets the ORM
+    # write them all with one executemany INSERT and nothing to read back
+    next_id = (db.session.execute(select(func.max(SaleItem.id))).scalar() or 0) + 1
+    for sale, sale_items, _ in created:
+        for item in sale_items:
+            item.id = next_id
+            next_id += 1
+            item.sale_id = sale.id
+            db.session.add(item)
+        set_committed_value(sale, 'sale_items', sale_items)
+    db.session.flush()
+    insert_ledger_rows(ledger_rows)
+    record_sales([(sale, sale_items) for sale, sale_items, _ in created])
+    return results
+
+def checkout(data, user, policy=None):
+    """Build, allocate and flush one sale from a POS basket.
+
+    Raises ValueError for anything the caller should report as a bad request. The
+    caller commits.
+    """
+    sale, error = checkout_many([data], user, policy)[0]
+    if error:
+        raise ValueError(error)
+    return sale
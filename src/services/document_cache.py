@@ -0,0 +1,109 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+
+# Bump when a renderer's output changes, so documents cached by older code are not served
+RENDER_VERSION = 1
+
+# Bytes this process believes the cache holds; None until the first scan
+_approx_bytes = None
+_lock = threading.Lock()
+
+def _cache_dir():
+    path = current_app.config['DOCUMENT_CACHE_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _max_bytes():
+    return int(current_app.config.get('DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+def document_hash(kind, payload):
+    """Content hash of everything a document is rendered from"""
+    content = json.dumps([kind, RENDER_VERSION, payload], sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+def _path(kind, sale_id, content_hash):
+    return os.path.join(_cache_dir(), f'{kind}-{sale_id}-{content_hash}.pdf')
+
+def _entries(directory):
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.pdf'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield entry.path, stat
+
+def _evict(directory, max_bytes):
+    """Remove least recently used documents until the cache is back under 90% of its bound.
+
+    Recency is the access time, which get() sets itself so it does not depend on
+    how the filesystem is mounted. Returns the bytes left.
+    """
+    entries = sorted(_entries(directory), key=lambda entry: entry[1].st_atime)
+    total = sum(stat.st_size for _, stat in entries)
+    target = max_bytes * 0.9
+    for path, stat in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+    return total
+
+def get(kind, sale_id, content_hash):
+    """Cached document bytes and render time, or None"""
+    path = _path(kind, sale_id, content_hash)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        stat = os.stat(path)
+        # Mark as recently used; the modification time stays the render time
+        os.utime(path, (time.time(), stat.st_mtime))
+    except FileNotFoundError:
+        return None
+    return data, datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+def put(kind, sale_id, content_hash, data):
+    """Store a rendered document, evicting old ones past the size bound"""
+    global _approx_bytes
+    directory = _cache_dir()
+    # Write under a temporary name and rename, so readers never see a partial file
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, _path(kind, sale_id, content_hash))
+
+    with _lock:
+        if _approx_bytes is None:
+            _approx_bytes = sum(stat.st_size for _, stat in _entries(directory))
+        else:
+            _approx_bytes += len(data)
+        # Other workers write here too, so the running total is rechecked with a scan before evicting
+        if _approx_bytes > _max_bytes():
+            _approx_bytes = _evict(directory, _max_bytes())
+
+def fetch(kind, sale_id, content_hash, render):
+    """Cached document bytes and render time, rendering and storing them on a miss"""
+    cached = get(kind, sale_id, content_hash)
+    if cached is not None:
+        return cached
+    data = render()
+    put(kind, sale_id, content_hash, data)
+    return data, datetime.now(timezone.utc).replace(microsecond=0)
+
+def invalidate_sale(sale_id):
+    """Drop every cached document of a sale; call when the sale changes"""
+    for path in glob.glob(os.path.join(_cache_dir(), f'*-{int(sale_id)}-*.pdf')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,185 @@
+from types import MappingProxyType
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import TableStyle
+
+# Paragraph styles, table styles and page layouts for the PDF documents, built
+# once at import and shared by every render. Renderers only read them; the
+# registries are read-only mappings so a render cannot swap an entry out from
+# under another request.
+
+_base = getSampleStyleSheet()
+
+def _paragraph_styles():
+    styles = {
+        'normal': _base['Normal'],
+        'heading3': _base['Heading3'],
+        'invoice_title': ParagraphStyle(
+            'CustomTitle',
+            parent=_base['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2c3e50')
+        ),
+        'invoice_heading': ParagraphStyle(
+            'CustomHeading',
+            parent=_base['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            textColor=colors.HexColor('#34495e')
+        ),
+        'invoice_normal': ParagraphStyle(
+            'CustomNormal',
+            parent=_base['Normal'],
+            fontSize=10,
+            spaceAfter=6
+        ),
+        'invoice_footer': ParagraphStyle(
+            'Footer',
+            parent=_base['Normal'],
+            fontSize=12,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#7f8c8d')
+        ),
+        'receipt_title': ParagraphStyle(
+            'ReceiptTitle',
+            parent=_base['Normal'],
+            fontSize=14,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'receipt_normal': ParagraphStyle(
+            'ReceiptNormal',
+            parent=_base['Normal'],
+            fontSize=8,
+            alignment=TA_CENTER
+        ),
+        'receipt_item': ParagraphStyle(
+            'ReceiptItem',
+            parent=_base['Normal'],
+            fontSize=8,
+            alignment=TA_LEFT
+        ),
+        'grn_title': ParagraphStyle(
+            'CustomTitle',
+            parent=_base['Heading1'],
+            fontSize=20,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2c3e50')
+        ),
+    }
+    styles['receipt_qty_price'] = ParagraphStyle(
+        'ReceiptQtyPrice',
+        parent=styles['receipt_item'],
+        alignment=TA_RIGHT
+    )
+    styles['receipt_total'] = ParagraphStyle(
+        'ReceiptTotal',
+        parent=styles['receipt_normal'],
+        alignment=TA_RIGHT
+    )
+    styles['receipt_grand_total'] = ParagraphStyle(
+        'ReceiptGrandTotal',
+        parent=styles['receipt_normal'],
+        alignment=TA_RIGHT,
+        fontName='Helvetica-Bold',
+        fontSize=10
+    )
+    return styles
+
+def _table_styles():
+    return {
+        'invoice_header': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 16),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'invoice_items': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Product names left-aligned
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+        'invoice_totals': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -2), 10),
+            ('FONTSIZE', (0, -1), (-1, -1), 12),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ecf0f1')),
+            ('LINEBELOW', (0, -2), (-1, -2), 1, colors.black),
+            ('LINEBELOW', (0, -1), (-1, -1), 2, colors.black),
+        ]),
+        'grn_info': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+        'grn_items': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Product names left-aligned
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+        'grn_total': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ecf0f1')),
+            ('LINEBELOW', (0, 0), (-1, -1), 2, colors.black),
+        ]),
+        'grn_signatures': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 1), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 2), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]),
+    }
+
+# SimpleDocTemplate keyword arguments per document
+_page_layouts = {
+    'invoice': MappingProxyType({
+        'pagesize': letter,
+        'rightMargin': 72,
+        'leftMargin': 72,
+        'topMargin': 72,
+        'bottomMargin': 18
+    }),
+    'receipt': MappingProxyType({
+        'pagesize': (4*inch, 6*inch),  # Receipt size
+        'rightMargin': 0.2*inch,
+        'leftMargin': 0.2*inch,
+        'topMargin': 0.2*inch,
+        'bottomMargin': 0.2*inch
+    }),
+}
+_page_layouts['grn'] = _page_layouts['invoice']
+
+PARAGRAPH_STYLES = MappingProxyType(_paragraph_styles())
+TABLE_STYLES = MappingProxyType(_table_styles())
+PAGE_LAYOUTS = MappingProxyType(_page_layouts)
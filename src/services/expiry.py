@@ -0,0 +1,176 @@
+from datetime import date, timedelta
+from sqlalchemy import case, func, literal
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.models.product import Product
+from src.models.flavor import Flavor, ProductFlavor
+from src.models.store import Store
+from src.models.supplier import Supplier
+
+# Upper bounds, in days until expiry, of the default "expiring" buckets
+DEFAULT_THRESHOLDS = (7, 30, 90)
+
+def parse_thresholds(raw, default=DEFAULT_THRESHOLDS):
+    """Parse a comma-separated list of day thresholds such as '7,30,90'"""
+    if not raw:
+        return tuple(default)
+    try:
+        thresholds = sorted({int(part) for part in raw.split(',') if part.strip()})
+    except ValueError:
+        raise ValueError('Invalid buckets. Use comma-separated day counts, e.g. 7,30,90')
+    if not thresholds or thresholds[0] < 0:
+        raise ValueError('Invalid buckets. Use comma-separated day counts, e.g. 7,30,90')
+    return tuple(thresholds)
+
+def bucket_name(days):
+    return f'within_{days}_days'
+
+def bucket_names(thresholds):
+    """Bucket names in display order"""
+    return ['expired'] + [bucket_name(days) for days in thresholds]
+
+def _bucket_expression(today, thresholds):
+    whens = [(Inventory.expiration_date < today, literal('expired'))]
+    for days in thresholds:
+        whens.append((Inventory.expiration_date <= today + timedelta(days=days), literal(bucket_name(days))))
+    return case(*whens, else_=literal(None))
+
+def _apply_filters(query, today, max_days, store_id, supplier_id, active_only, in_stock_only):
+    # One range on expiration_date covers every bucket, so the expiry index drives the scan
+    query = query.filter(Inventory.expiration_date <= today + timedelta(days=max_days))
+    if store_id:
+        query = query.filter(Inventory.store_id == store_id)
+    if supplier_id:
+        query = query.filter(Inventory.supplier_id == supplier_id)
+    if active_only:
+        query = query.filter(Inventory.is_active == True)
+    if in_stock_only:
+        query = query.filter(Inventory.quantity > 0)
+    return query
+
+def expiry_rows(thresholds=DEFAULT_THRESHOLDS, min_days=None, max_days=None, store_id=None, supplier_id=None,
+                active_only=False, in_stock_only=False, today=None):
+    """Get batches expiring within max_days (default max(thresholds)) as lightweight row tuples.
+
+    Rows include the batch's bucket. ``min_days`` drops batches expiring sooner than
+    that many days from today; pass 0 to leave out expired stock, and max_days=-1
+    to get only expired stock.
+    """
+    today = today or date.today()
+    bucket = _bucket_expression(today, thresholds).label('bucket')
+    query = db.session.query(
+        Inventory.id,
+        Inventory.product_id,
+        Product.name.label('product_name'),
+        Product.sku.label('product_sku'),
+        Inventory.product_flavor_id,
+        Flavor.name.label('flavor_name'),
+        Inventory.store_id,
+        Store.name.label('store_name'),
+        Inventory.supplier_id,
+        Supplier.name.label('supplier_name'),
+        Inventory.batch_number,
+        Inventory.expiration_date,
+        Inventory.quantity,
+        Inventory.unit_cost,
+        Inventory.location,
+        bucket
+    ).join(
+        Product, Product.id == Inventory.product_id
+    ).join(
+        Store, Store.id == Inventory.store_id
+    ).outerjoin(
+        Supplier, Supplier.id == Inventory.supplier_id
+    ).outerjoin(
+        ProductFlavor, ProductFlavor.id == Inventory.product_flavor_id
+    ).outerjoin(
+        Flavor, Flavor.id == ProductFlavor.flavor_id
+    )
+    max_days = max(thresholds) if max_days is None else max_days
+    query = _apply_filters(query, today, max_days, store_id, supplier_id, active_only, in_stock_only)
+    if min_days is not None:
+        query = query.filter(Inventory.expiration_date >= today + timedelta(days=min_days))
+    return query.order_by(Inventory.expiration_date, Inventory.id).all()
+
+def format_expiry_row(row, today=None):
+    """Serialize an expiry row with the inventory fields clients display"""
+    today = today or date.today()
+    days_until_expiry = (row.expiration_date - today).days
+    return {
+        'id': row.id,
+        'inventory_id': row.id,
+        'product_id': row.product_id,
+        'product_name': row.product_name,
+        'product_sku': row.product_sku,
+        'product_flavor_id': row.product_flavor_id,
+        'flavor_name': row.flavor_name,
+        'store_id': row.store_id,
+        'store_name': row.store_name,
+        'supplier_id': row.supplier_id,
+        'supplier_name': row.supplier_name,
+        'batch_number': row.batch_number,
+        'expiration_date': row.expiration_date.isoformat(),
+        'quantity': row.quantity,
+        'unit_cost': float(row.unit_cost) if row.unit_cost else 0,
+        'location': row.location,
+        'days_until_expiry': days_until_expiry,
+        'is_expired': days_until_expiry < 0,
+        'bucket': row.bucket
+    }
+
+def expiry_summary(thresholds=DEFAULT_THRESHOLDS, store_id=None, supplier_id=None,
+                   active_only=False, in_stock_only=False, today=None):
+    """Count batches, units and cost value per bucket, with per-store and per-supplier breakdowns.
+
+    Everything comes from one GROUP BY over (bucket, store, supplier).
+    """
+    today = today or date.today()
+    bucket = _bucket_expression(today, thresholds)
+    query = db.session.query(
+        bucket.label('bucket'),
+        Inventory.store_id,
+        Store.name,
+        Inventory.supplier_id,
+        Supplier.name,
+        func.count(Inventory.id),
+        func.coalesce(func.sum(Inventory.quantity), 0),
+        func.coalesce(func.sum(Inventory.quantity * Inventory.unit_cost), 0)
+    ).join(
+        Store, Store.id == Inventory.store_id
+    ).outerjoin(
+        Supplier, Supplier.id == Inventory.supplier_id
+    )
+    query = _apply_filters(query, today, max(thresholds), store_id, supplier_id, active_only, in_stock_only)
+    rows = query.group_by(bucket, Inventory.store_id, Inventory.supplier_id).all()
+
+    names = bucket_names(thresholds)
+
+    def empty_buckets():
+        return {name: {'items': 0, 'quantity': 0, 'value': 0.0} for name in names}
+
+    totals = empty_buckets()
+    by_store = {}
+    by_supplier = {}
+    for bucket_value, row_store_id, store_name, row_supplier_id, supplier_name, items, quantity, value in rows:
+        store_entry = by_store.setdefault(row_store_id, {
+            'store_id': row_store_id, 'store_name': store_name, 'buckets': empty_buckets()
+        })
+        supplier_entry = by_supplier.setdefault(row_supplier_id, {
+            'supplier_id': row_supplier_id, 'supplier_name': supplier_name, 'buckets': empty_buckets()
+        })
+        for target in (totals, store_entry['buckets'], supplier_entry['buckets']):
+            target[bucket_value]['items'] += items
+            target[bucket_value]['quantity'] += int(quantity)
+            target[bucket_value]['value'] += float(value)
+
+    for entry in [totals] + [e['buckets'] for e in by_store.values()] + [e['buckets'] for e in by_supplier.values()]:
+        for stats in entry.values():
+            stats['value'] = round(stats['value'], 2)
+
+    return {
+        'as_of': today.isoformat(),
+        'thresholds': list(thresholds),
+        'buckets': totals,
+        'by_store': list(by_store.values()),
+        'by_supplier': list(by_supplier.values())
+    }
@@ -0,0 +1,130 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request, jsonify, make_response
+from flask_login import current_user
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+def _ttl():
+    return timedelta(hours=float(current_app.config.get('IDEMPOTENCY_KEY_TTL_HOURS', 24)))
+
+def purge_expired_keys(now=None):
+    """Delete keys past their TTL; uses the expires_at index"""
+    return db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < (now or datetime.utcnow()))
+    ).rowcount
+
+def _replay(record):
+    response = make_response(record.response_body, record.status_code)
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _lease():
+    return timedelta(seconds=float(current_app.config.get('IDEMPOTENCY_LEASE_SECONDS', 60)))
+
+def _take_over(record, now):
+    """Claim a reservation whose request never finished, as after a crash; False if another retry got it first"""
+    taken = db.session.execute(update(IdempotencyKey).where(
+        IdempotencyKey.id == record.id,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.created_at == record.created_at
+    ).values(created_at=now)).rowcount
+    db.session.commit()
+    return taken == 1
+
+def idempotent(scope):
+    """Make a create endpoint safe to retry with an Idempotency-Key header.
+
+    The first request with a key reserves it, runs the endpoint and stores its
+    response; repeats within the TTL get that response back without running the
+    endpoint again. A failed request whose changes were rolled back releases the
+    key, so the client can fix and resend; one that committed anything keeps it,
+    even on a 5xx, since running it again would repeat the write. A reservation
+    still unfinished after IDEMPOTENCY_LEASE_SECONDS belongs to a request that
+    died and is taken over by the next retry. Requests without the header are
+    unaffected.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return f(*args, **kwargs)
+            if len(key) > 255:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most 255 characters'}), 400
+
+            request_hash = hashlib.sha256(request.get_data()).hexdigest()
+            now = datetime.utcnow()
+            identity = (
+                IdempotencyKey.user_id == current_user.id,
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key
+            )
+
+            # Reserve the key in its own committed transaction, so a concurrent retry
+            # sees it and the endpoint's own rollback cannot undo it
+            purge_expired_keys(now)
+            try:
+                db.session.execute(insert(IdempotencyKey).values(
+                    key=key,
+                    scope=scope,
+                    user_id=current_user.id,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + _ttl()
+                ))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                record = db.session.execute(select(IdempotencyKey).where(*identity)).scalar_one_or_none()
+                if record is None:
+                    # Expired and purged in between; treat as a fresh request
+                    return decorated_function(*args, **kwargs)
+                if record.request_hash != request_hash:
+                    return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'}), 422
+                if record.status_code is not None:
+                    return _replay(record)
+                if record.created_at > now - _lease() or not _take_over(record, now):
+                    return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+
+            # Whether the endpoint committed decides if the key can be released on failure
+            commits = []
+            session = db.session()
+            def count_commit(session):
+                commits.append(True)
+            event.listen(session, 'after_commit', count_commit)
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception as e:
+                db.session.rollback()
+                if commits:
+                    db.session.execute(update(IdempotencyKey).where(*identity).values(
+                        status_code=500,
+                        response_body=json.dumps({'error': str(e) or type(e).__name__})
+                    ))
+                else:
+                    db.session.execute(delete(IdempotencyKey).where(*identity))
+                db.session.commit()
+                raise
+            finally:
+                event.remove(session, 'after_commit', count_commit)
+
+            if commits or 200 <= response.status_code < 300:
+                db.session.execute(update(IdempotencyKey).where(*identity).values(
+                    status_code=response.status_code,
+                    response_body=response.get_data(as_text=True)
+                ))
+            else:
+                # Nothing was written, so the client can fix and resend
+                db.session.execute(delete(IdempotencyKey).where(*identity))
+            db.session.commit()
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,277 @@
+import csv
+import io
+import json
+import re
+from datetime import datetime, date
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert
+from src.models.user import db
+from src.models.product import Product
+from src.models.supplier import Supplier
+from src.models.store import Store
+from src.models.flavor import Flavor, ProductFlavor
+from src.models.inventory import Inventory
+from src.models.stock_level import StockLevel
+from src.services.allocation import insert_ledger_rows
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Rows per executemany INSERT and per commit
+IMPORT_CHUNK_SIZE = 500
+
+# Per-row errors returned in the response; the counts always cover the whole file
+MAX_REPORTED_ERRORS = 1000
+
+# Bytes that are not UTF-8 are decoded to lone surrogates, which valid text never
+# contains, so a bad byte fails the row it is in instead of the whole stream
+_UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+def _undecodable(values):
+    for value in values:
+        if isinstance(value, list):
+            if _undecodable(value):
+                return True
+        elif isinstance(value, str) and _UNDECODABLE.search(value):
+            return True
+    return False
+
+def iter_records(stream, fmt):
+    """Yield (row_number, record) from a CSV or NDJSON byte stream without reading it all.
+
+    A record that cannot be decoded or parsed is yielded as a ValueError so the
+    caller can report it and carry on. CSV that the reader cannot get past ends
+    the stream with one such error.
+    """
+    text = io.TextIOWrapper(
+        stream, encoding='utf-8-sig', errors='surrogateescape', newline='' if fmt == 'csv' else None
+    )
+    if fmt == 'csv':
+        # Row 1 is the header
+        row_number = 1
+        try:
+            reader = csv.DictReader(text)
+            if reader.fieldnames and _undecodable(reader.fieldnames):
+                yield 1, ValueError('Invalid UTF-8 in the header row')
+                return
+            for row_number, record in enumerate(reader, 2):
+                if _undecodable(record.values()):
+                    yield row_number, ValueError('Invalid UTF-8 in row')
+                    continue
+                yield row_number, record
+        except csv.Error as e:
+            yield row_number + 1, ValueError(f'Invalid CSV, rest of the file not read: {e}')
+        return
+    for row_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        if _undecodable([line]):
+            yield row_number, ValueError('Invalid UTF-8 in row')
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, ValueError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(record, dict):
+            yield row_number, ValueError('Each line must be a JSON object')
+            continue
+        yield row_number, record
+
+class ImportLookups:
+    """In-memory maps from the identifiers an import file may use to ids, loaded once per import"""
+
+    def __init__(self):
+        self.products = {}
+        self.product_costs = {}
+        for product_id, sku, cost_price in db.session.query(Product.id, Product.sku, Product.cost_price):
+            self.products[sku.strip().lower()] = product_id
+            self.product_costs[product_id] = cost_price
+        self.suppliers = {name.strip().lower(): supplier_id for supplier_id, name in db.session.query(Supplier.id, Supplier.name)}
+        self.stores = {name.strip().lower(): store_id for store_id, name in db.session.query(Store.id, Store.name)}
+        self.flavors = {}
+        self.flavor_products = {}
+        for product_flavor_id, product_id, flavor_name in db.session.query(
+            ProductFlavor.id, ProductFlavor.product_id, Flavor.name
+        ).join(Flavor, Flavor.id == ProductFlavor.flavor_id):
+            self.flavors[(product_id, flavor_name.strip().lower())] = product_flavor_id
+            self.flavor_products[product_flavor_id] = product_id
+
+    @staticmethod
+    def _resolve(record, id_field, name_field, by_name, valid_ids, label):
+        value = record.get(id_field)
+        if value not in (None, ''):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid {id_field}: {value}')
+            if value not in valid_ids:
+                raise ValueError(f'{label} {value} not found')
+            return value
+        name = record.get(name_field)
+        if name not in (None, ''):
+            resolved = by_name.get(str(name).strip().lower())
+            if resolved is None:
+                raise ValueError(f'{label} not found: {name}')
+            return resolved
+        return None
+
+    def product_id(self, record):
+        return self._resolve(record, 'product_id', 'sku', self.products, self.product_costs, 'Product')
+
+    def store_id(self, record):
+        return self._resolve(record, 'store_id', 'store', self.stores, set(self.stores.values()), 'Store')
+
+    def supplier_id(self, record):
+        return self._resolve(record, 'supplier_id', 'supplier', self.suppliers, set(self.suppliers.values()), 'Supplier')
+
+    def product_flavor_id(self, record, product_id):
+        value = record.get('product_flavor_id')
+        if value not in (None, ''):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid product_flavor_id: {value}')
+            if self.flavor_products.get(value) != product_id:
+                raise ValueError(f'Product flavor {value} not found for this product')
+            return value
+        name = record.get('flavor')
+        if name not in (None, ''):
+            resolved = self.flavors.get((product_id, str(name).strip().lower()))
+            if resolved is None:
+                raise ValueError(f'Flavor not found for this product: {name}')
+            return resolved
+        return None
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {field} format. Use YYYY-MM-DD')
+
+def build_inventory_row(record, lookups, default_store_id=None):
+    """Validate one import record and turn it into inventory column values"""
+    product_id = lookups.product_id(record)
+    if product_id is None:
+        raise ValueError('sku or product_id is required')
+    store_id = lookups.store_id(record) or default_store_id
+    if store_id is None:
+        raise ValueError('store or store_id is required')
+
+    batch_number = str(record.get('batch_number') or '').strip()
+    if not batch_number:
+        raise ValueError('batch_number is required')
+    if not record.get('expiration_date'):
+        raise ValueError('expiration_date is required')
+
+    try:
+        quantity = int(record.get('quantity'))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid quantity: {record.get('quantity')}")
+    if quantity <= 0:
+        raise ValueError('Quantity must be positive')
+
+    unit_cost = record.get('unit_cost')
+    if unit_cost in (None, ''):
+        unit_cost = lookups.product_costs.get(product_id)
+    else:
+        try:
+            unit_cost = Decimal(str(unit_cost))
+        except InvalidOperation:
+            raise ValueError(f'Invalid unit_cost: {unit_cost}')
+        # Decimal accepts 'NaN' and 'Infinity', which would poison every valuation sum
+        if not unit_cost.is_finite():
+            raise ValueError(f'Invalid unit_cost: {unit_cost}')
+        if unit_cost < 0:
+            raise ValueError('unit_cost cannot be negative')
+
+    return {
+        'product_id': product_id,
+        'product_flavor_id': lookups.product_flavor_id(record, product_id),
+        'store_id': store_id,
+        'supplier_id': lookups.supplier_id(record),
+        'batch_number': batch_number,
+        'expiration_date': _parse_date(record['expiration_date'], 'expiration_date'),
+        'quantity': quantity,
+        'unit_cost': unit_cost,
+        'location': record.get('location') or '',
+        'date_received': _parse_date(record['date_received'], 'date_received') if record.get('date_received') else date.today(),
+        'notes': record.get('notes') or None
+    }
+
+def _insert_chunk(chunk, user_id):
+    """Insert one chunk of batches, their restock ledger rows and stock level deltas"""
+    rows = [row for _, row in chunk]
+    inventory_ids = db.session.execute(
+        insert(Inventory).returning(Inventory.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+
+    insert_ledger_rows([{
+        'product_id': row['product_id'],
+        'inventory_id': inventory_id,
+        'store_id': row['store_id'],
+        'quantity': row['quantity'],  # Positive for restock
+        'transaction_type': 'restock',
+        'unit_price': row['unit_cost'],
+        'total': row['unit_cost'] * row['quantity'] if row['unit_cost'] is not None else None,
+        'reference': f"Import: {row['batch_number']}",
+        'user_id': user_id,
+        'notes': f"Imported batch: {row['batch_number']}"
+    } for row, inventory_id in zip(rows, inventory_ids)])
+
+    # Core inserts bypass the ORM flush hook, so stock levels are updated here
+    deltas = {}
+    for row in rows:
+        key = (row['product_id'], row['product_flavor_id'], row['store_id'])
+        deltas[key] = deltas.get(key, 0) + row['quantity']
+    StockLevel.apply_deltas(db.session.connection(), deltas)
+
+def import_inventory(records, user_id, default_store_id=None):
+    """Import (row_number, record) pairs in committed chunks.
+
+    Invalid rows are skipped and reported; a chunk that fails to insert is rolled
+    back and all its rows are reported, and the import continues with the next.
+    If reading the records fails, the rows read so far are still imported and
+    the failure is reported as one more error.
+    """
+    lookups = ImportLookups()
+    result = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def fail(row_number, message):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'row': row_number, 'error': message})
+
+    def flush(chunk):
+        try:
+            _insert_chunk(chunk, user_id)
+            db.session.commit()
+            result['imported'] += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            for row_number, _ in chunk:
+                fail(row_number, str(e))
+
+    chunk = []
+    row_number = 0
+    try:
+        for row_number, record in records:
+            if isinstance(record, Exception):
+                fail(row_number, str(record))
+                continue
+            try:
+                chunk.append((row_number, build_inventory_row(record, lookups, default_store_id)))
+            except ValueError as e:
+                fail(row_number, str(e))
+                continue
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+    except Exception as e:
+        # The stream itself failed, e.g. the client went away; what was read is still imported
+        fail(row_number + 1, f'Import stopped, rest of the file not read: {e}')
+    if chunk:
+        flush(chunk)
+
+    result['errors_truncated'] = result['failed'] > len(result['errors'])
+    return result
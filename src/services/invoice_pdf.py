@@ -0,0 +1,176 @@
+from io import BytesIO
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+from src.services.document_styles import PARAGRAPH_STYLES, TABLE_STYLES, PAGE_LAYOUTS
+
+# Renderers take a sale, or anything with the same attributes (see
+# bulk_invoices.sale_snapshot), and return PDF bytes. They touch no database
+# or Flask state, so worker processes can run them.
+
+def render_invoice_pdf(sale):
+    """Render the invoice PDF for a sale"""
+    # Create PDF buffer
+    buffer = BytesIO()
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(buffer, **PAGE_LAYOUTS['invoice'])
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Shared styles, built once at import
+    styles = PARAGRAPH_STYLES
+    
+    # Company header
+    elements.append(Paragraph("SUPPLEMENT SHOP", styles['invoice_title']))
+    elements.append(Paragraph("Inventory Management System", styles['normal']))
+    elements.append(Spacer(1, 20))
+    
+    # Invoice header
+    invoice_header = [
+        ['INVOICE', ''],
+        [f'Invoice Number: {sale.invoice_number}', ''],
+        [f'Date: {sale.sale_date.strftime("%B %d, %Y")}', ''],
+        [f'Store: {sale.store.name if sale.store else "Unknown"}', '']
+    ]
+    
+    if sale.customer_name:
+        invoice_header.extend([
+            ['', ''],
+            ['Bill To:', ''],
+            [f'{sale.customer_name}', ''],
+        ])
+        if sale.customer_phone:
+            invoice_header.append([f'Phone: {sale.customer_phone}', ''])
+        if sale.customer_email:
+            invoice_header.append([f'Email: {sale.customer_email}', ''])
+    
+    header_table = Table(invoice_header, colWidths=[3*inch, 3*inch])
+    header_table.setStyle(TABLE_STYLES['invoice_header'])
+    
+    elements.append(header_table)
+    elements.append(Spacer(1, 30))
+    
+    # Items table
+    items_data = [['Item', 'SKU', 'Qty', 'Unit Price', 'Total']]
+    
+    for item in sale.sale_items:
+        flavor_info = f" - {item.product_flavor.flavor.name}" if item.product_flavor else ""
+        product_name = f"{item.product.name}{flavor_info}" if item.product else "Unknown Product"
+        sku = item.product.sku if item.product else "N/A"
+        
+        items_data.append([
+            product_name,
+            sku,
+            str(item.quantity),
+            f"${item.unit_price:.2f}",
+            f"${item.line_total:.2f}"
+        ])
+    
+    items_table = Table(items_data, colWidths=[2.5*inch, 1*inch, 0.7*inch, 1*inch, 1*inch])
+    items_table.setStyle(TABLE_STYLES['invoice_items'])
+    
+    elements.append(items_table)
+    elements.append(Spacer(1, 20))
+    
+    # Totals table
+    totals_data = [
+        ['Subtotal:', f"${sale.subtotal:.2f}"],
+        ['Tax:', f"${sale.tax_amount:.2f}"],
+        ['Discount:', f"-${sale.discount_amount:.2f}"],
+        ['TOTAL:', f"${sale.total_amount:.2f}"]
+    ]
+    
+    totals_table = Table(totals_data, colWidths=[4*inch, 1.5*inch])
+    totals_table.setStyle(TABLE_STYLES['invoice_totals'])
+    
+    elements.append(totals_table)
+    elements.append(Spacer(1, 30))
+    
+    # Payment information
+    payment_info = f"Payment Method: {sale.payment_method.title()}"
+    payment_status = f"Payment Status: {sale.payment_status.title()}"
+    
+    elements.append(Paragraph(payment_info, styles['invoice_normal']))
+    elements.append(Paragraph(payment_status, styles['invoice_normal']))
+    
+    if sale.notes:
+        elements.append(Spacer(1, 20))
+        elements.append(Paragraph("Notes:", styles['invoice_heading']))
+        elements.append(Paragraph(sale.notes, styles['invoice_normal']))
+    
+    # Footer
+    elements.append(Spacer(1, 30))
+    footer_text = "Thank you for your business!"
+    elements.append(Paragraph(footer_text, styles['invoice_footer']))
+    
+    # Build PDF
+    doc.build(elements)
+    
+    # Get PDF data
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_data
+
+def render_receipt_pdf(sale):
+    """Render the compact receipt PDF for a sale"""
+    # Create PDF buffer
+    buffer = BytesIO()
+    
+    # Create PDF document (smaller size for receipt)
+    doc = SimpleDocTemplate(buffer, **PAGE_LAYOUTS['receipt'])
+    
+    elements = []
+    styles = PARAGRAPH_STYLES
+    receipt_normal = styles['receipt_normal']
+    
+    # Header
+    elements.append(Paragraph("SUPPLEMENT SHOP", styles['receipt_title']))
+    elements.append(Paragraph(f"{sale.store.name if sale.store else 'Store'}", receipt_normal))
+    elements.append(Spacer(1, 10))
+    
+    # Receipt info
+    elements.append(Paragraph(f"Receipt: {sale.invoice_number}", receipt_normal))
+    elements.append(Paragraph(f"Date: {sale.sale_date.strftime('%m/%d/%Y %I:%M %p')}", receipt_normal))
+    elements.append(Paragraph("=" * 40, receipt_normal))
+    elements.append(Spacer(1, 5))
+    
+    # Items
+    for item in sale.sale_items:
+        flavor_info = f" - {item.product_flavor.flavor.name}" if item.product_flavor else ""
+        product_name = f"{item.product.name}{flavor_info}" if item.product else "Unknown Product"
+        
+        item_line = f"{product_name}"
+        elements.append(Paragraph(item_line, styles['receipt_item']))
+        
+        qty_price_line = f"{item.quantity} x ${item.unit_price:.2f} = ${item.line_total:.2f}"
+        elements.append(Paragraph(qty_price_line, styles['receipt_qty_price']))
+        elements.append(Spacer(1, 3))
+    
+    elements.append(Paragraph("=" * 40, receipt_normal))
+    
+    # Totals
+    elements.append(Paragraph(f"Subtotal: ${sale.subtotal:.2f}", styles['receipt_total']))
+    
+    if sale.tax_amount > 0:
+        elements.append(Paragraph(f"Tax: ${sale.tax_amount:.2f}", styles['receipt_total']))
+    
+    if sale.discount_amount > 0:
+        elements.append(Paragraph(f"Discount: -${sale.discount_amount:.2f}", styles['receipt_total']))
+    
+    elements.append(Paragraph(f"TOTAL: ${sale.total_amount:.2f}", styles['receipt_grand_total']))
+    
+    elements.append(Spacer(1, 10))
+    elements.append(Paragraph(f"Payment: {sale.payment_method.title()}", receipt_normal))
+    elements.append(Spacer(1, 10))
+    elements.append(Paragraph("Thank you!", receipt_normal))
+    
+    # Build PDF
+    doc.build(elements)
+    
+    # Get PDF data
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_data
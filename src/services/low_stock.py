@@ -0,0 +1,59 @@
+from sqlalchemy import func, and_
+from src.models.user import db
+from src.models.product import Product
+from src.models.flavor import Flavor, ProductFlavor
+from src.models.stock_level import StockLevel
+from src.services.pagination import clamp_page
+
+def low_stock_query(store_id=None, by_flavor=False, active_only=False):
+    """Build one grouped query returning every product (or product flavor) at or below its reorder point.
+
+    Rows carry product_id, product_name, product_sku, reorder_point, current_stock and,
+    when ``by_flavor`` is set, product_flavor_id and flavor_name.
+    """
+    stock_join = [StockLevel.product_id == Product.id]
+    if store_id:
+        stock_join.append(StockLevel.store_id == store_id)
+    current_stock = func.coalesce(func.sum(StockLevel.quantity), 0)
+
+    columns = [
+        Product.id.label('product_id'),
+        Product.name.label('product_name'),
+        Product.sku.label('product_sku'),
+        Product.reorder_point.label('reorder_point'),
+    ]
+    if by_flavor:
+        columns += [ProductFlavor.id.label('product_flavor_id'), Flavor.name.label('flavor_name')]
+    query = db.session.query(*columns, current_stock.label('current_stock'))
+
+    if by_flavor:
+        query = query.outerjoin(
+            ProductFlavor, and_(ProductFlavor.product_id == Product.id, ProductFlavor.is_active == True)
+        ).outerjoin(
+            Flavor, Flavor.id == ProductFlavor.flavor_id
+        ).outerjoin(
+            StockLevel, and_(*stock_join, StockLevel.product_flavor_id.is_not_distinct_from(ProductFlavor.id))
+        ).group_by(Product.id, ProductFlavor.id, Flavor.name)
+    else:
+        query = query.outerjoin(StockLevel, and_(*stock_join)).group_by(Product.id)
+
+    if active_only:
+        query = query.filter(Product.is_active == True)
+
+    return query.having(current_stock <= Product.reorder_point)
+
+def count_low_stock(store_id=None, by_flavor=False, active_only=False):
+    """Count low-stock rows without materializing them"""
+    subquery = low_stock_query(store_id, by_flavor, active_only).subquery()
+    return db.session.query(func.count()).select_from(subquery).scalar()
+
+def get_low_stock(store_id=None, by_flavor=False, active_only=False, page=1, per_page=50):
+    """Get one page of low-stock rows plus the total row count"""
+    page, per_page = clamp_page(page, per_page)
+    query = low_stock_query(store_id, by_flavor, active_only)
+    total = count_low_stock(store_id, by_flavor, active_only)
+    order = [Product.name, Product.id]
+    if by_flavor:
+        order.append(ProductFlavor.id)
+    rows = query.order_by(*order).limit(per_page).offset((page - 1) * per_page).all()
+    return [dict(row._mapping) for row in rows], total
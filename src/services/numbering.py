@@ -0,0 +1,85 @@
+import os
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.user import db
+from src.models.document_sequence import DocumentSequence
+
+DOCUMENT_PREFIXES = {
+    'invoice': 'INV',
+    'grn': 'GRN',
+    'transfer': 'ST'
+}
+
+# Blocks this process has reserved but not used up: (document_type, store_id) -> [next, end)
+_blocks = {}
+_blocks_lock = threading.Lock()
+_blocks_pid = os.getpid()
+
+def _block_size():
+    return int(current_app.config.get('DOCUMENT_NUMBER_BLOCK_SIZE', 50))
+
+def reserve_block(document_type, store_id, size):
+    """Reserve `size` consecutive numbers in their own committed transaction.
+
+    Returns the first number of the block. This uses a separate connection, so it
+    must run before the request's session starts writing; SQLite would otherwise
+    make it wait on the request's own lock.
+    """
+    table = DocumentSequence.__table__
+    statement = sqlite_insert(table).values(
+        document_type=document_type,
+        store_id=store_id,
+        next_value=1 + size,
+        updated_at=datetime.utcnow()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=['document_type', 'store_id'],
+        set_={'next_value': table.c.next_value + size, 'updated_at': statement.excluded.updated_at}
+    ).returning(table.c.next_value)
+    with db.engine.begin() as connection:
+        end = connection.execute(statement).scalar()
+    return end - size
+
+def allocate_numbers(document_type, store_id, count=1):
+    """Hand out `count` sequence values from this process's block, reserving more as needed.
+
+    Values are unique across processes; numbers left in a block when a process
+    exits are skipped, so sequences may have gaps.
+    """
+    global _blocks_pid
+    if document_type not in DOCUMENT_PREFIXES:
+        raise ValueError(f'Unknown document type: {document_type}')
+    key = (document_type, store_id)
+    values = []
+    with _blocks_lock:
+        if _blocks_pid != os.getpid():
+            # A forked worker must not reuse blocks reserved by its parent
+            _blocks.clear()
+            _blocks_pid = os.getpid()
+        while len(values) < count:
+            block = _blocks.get(key)
+            if not block or block[0] >= block[1]:
+                size = max(_block_size(), count - len(values))
+                start = reserve_block(document_type, store_id, size)
+                block = _blocks[key] = [start, start + size]
+            take = min(count - len(values), block[1] - block[0])
+            values.extend(range(block[0], block[0] + take))
+            block[0] += take
+    return values
+
+def format_document_number(document_type, store_id, value):
+    """Printable number, e.g. INV01-000123; the dash keeps it apart from the old timestamp numbers"""
+    return f'{DOCUMENT_PREFIXES[document_type]}{store_id:02d}-{value:06d}'
+
+def next_document_numbers(document_type, store_id, count=1):
+    """Allocate `count` formatted document numbers for a store"""
+    return [
+        format_document_number(document_type, store_id, value)
+        for value in allocate_numbers(document_type, store_id, count)
+    ]
+
+def next_document_number(document_type, store_id):
+    """Allocate one formatted document number for a store"""
+    return next_document_numbers(document_type, store_id)[0]
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_, false, Date, DateTime
+
+# Largest page an offset-paginated endpoint serves
+MAX_PER_PAGE = 500
+
+def clamp_page(page, per_page):
+    """Page number and size brought into range: page from 1, per_page from 1 to MAX_PER_PAGE"""
+    return max(page or 1, 1), min(max(per_page or 1, 1), MAX_PER_PAGE)
+
+def pagination_dict(page, per_page, total):
+    """Pagination block in the shape the list endpoints already return"""
+    return {
+        'page': page,
+        'pages': (total + per_page - 1) // per_page if per_page else 0,
+        'per_page': per_page,
+        'total': total
+    }
+
+def cursor_pagination_dict(per_page, next_cursor, total=None):
+    """Pagination block for keyset (cursor) pages"""
+    return {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'total': total
+    }
+
+def encode_cursor(values):
+    """Pack key values into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, keys):
+    """Unpack a cursor into key values typed like their columns"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError('Invalid cursor')
+
+    decoded = []
+    for (column, _), value in zip(keys, values):
+        # Well-formed base64 can still carry values of the wrong type
+        try:
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif value is not None and isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+        if isinstance(value, (dict, list)):
+            raise ValueError('Invalid cursor')
+        decoded.append(value)
+    return decoded
+
+def _after(column, value, descending):
+    """Rows strictly past ``value`` in this column's sort direction (SQLite sorts NULLs lowest)"""
+    if value is None:
+        return false() if descending else column.is_not(None)
+    if descending:
+        return or_(column < value, column.is_(None))
+    return column > value
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+def keyset_paginate(query, keys, cursor, per_page):
+    """Fetch the page after ``cursor`` ordered by ``keys``, a list of (column, descending) pairs.
+
+    The last key must be unique so the order is total. An empty cursor means the
+    first page. Returns the items and the cursor for the next page, or None.
+    """
+    per_page = max(per_page, 1)
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        clauses = []
+        for position, (column, descending) in enumerate(keys):
+            prefix = [_equal(keys[i][0], values[i]) for i in range(position)]
+            clauses.append(and_(*prefix, _after(column, values[position], descending)))
+        query = query.filter(or_(*clauses))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in keys])
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in keys])
+    return items, next_cursor
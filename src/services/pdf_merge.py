@@ -0,0 +1,94 @@
+from io import BytesIO
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+class StreamingPdfMerger:
+    """Concatenate PDFs into a file one document at a time.
+
+    pypdf's PdfWriter keeps every merged page in memory until it writes. Here each
+    added document's pages, and the objects they reference, are renumbered and
+    written out straight away; only the byte offset of each object is kept for the
+    cross-reference table, so memory stays at one document however many are
+    merged. Call close() once to write the page tree and trailer.
+    """
+
+    def __init__(self, fileobj):
+        self._out = fileobj
+        self._offsets = [None]  # Object number -> byte offset; object 0 is the free list head
+        self._page_numbers = []
+        self._out.write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+        self._pages_number = self._reserve()
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write(self, number, obj):
+        self._offsets[number] = self._out.tell()
+        self._out.write(f'{number} 0 obj\n'.encode())
+        obj.write_to_stream(self._out)
+        self._out.write(b'\nendobj\n')
+
+    def append(self, pdf_data):
+        """Add every page of one PDF, given as bytes"""
+        reader = PdfReader(BytesIO(pdf_data))
+        numbers = {}
+        pending = []
+        renumbered = set()
+
+        def renumber(obj):
+            if isinstance(obj, IndirectObject):
+                key = (obj.idnum, obj.generation)
+                if key not in numbers:
+                    numbers[key] = self._reserve()
+                    pending.append((numbers[key], obj.get_object()))
+                return IndirectObject(numbers[key], 0, None)
+            # The reader is thrown away afterwards, so containers are rewritten in
+            # place; it shares some of them (inherited page resources), hence once each
+            if id(obj) in renumbered:
+                return obj
+            if isinstance(obj, DictionaryObject):
+                renumbered.add(id(obj))
+                for name, value in list(obj.items()):
+                    obj[name] = renumber(value)
+            elif isinstance(obj, ArrayObject):
+                renumbered.add(id(obj))
+                for index, value in enumerate(obj):
+                    obj[index] = renumber(value)
+            return obj
+
+        for page in reader.pages:
+            # The reader has already copied inherited attributes onto the page, so
+            # it is written on its own under this file's page tree
+            reference = page.indirect_reference
+            number = self._reserve()
+            numbers[(reference.idnum, reference.generation)] = number
+            page.pop('/Parent', None)
+            renumber(page)
+            page[NameObject('/Parent')] = IndirectObject(self._pages_number, 0, None)
+            self._write(number, page)
+            self._page_numbers.append(number)
+        while pending:
+            number, obj = pending.pop()
+            self._write(number, renumber(obj))
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer"""
+        kids = ' '.join(f'{number} 0 R' for number in self._page_numbers)
+        self._write_raw(self._pages_number, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_numbers)} >>')
+        catalog_number = self._reserve()
+        self._write_raw(catalog_number, f'<< /Type /Catalog /Pages {self._pages_number} 0 R >>')
+
+        xref_offset = self._out.tell()
+        self._out.write(f'xref\n0 {len(self._offsets)}\n'.encode())
+        self._out.write(b'0000000000 65535 f \n')
+        for offset in self._offsets[1:]:
+            self._out.write(f'{offset:010d} 00000 n \n'.encode())
+        self._out.write(
+            f'trailer\n<< /Size {len(self._offsets)} /Root {catalog_number} 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'.encode()
+        )
+
+    def _write_raw(self, number, body):
+        self._offsets[number] = self._out.tell()
+        self._out.write(f'{number} 0 obj\n{body}\nendobj\n'.encode())
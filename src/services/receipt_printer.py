@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+# Thermal receipt rendering. A receipt is laid out once as (style, text) lines
+# from a per-width layout built at import; the lines are then either joined as
+# plain text or wrapped in ESC/POS commands ready to send to the printer.
+
+RECEIPT_WIDTHS = (32, 42, 48)
+
+ESC = b'\x1b'
+GS = b'\x1d'
+INITIALIZE = ESC + b'@' + ESC + b't\x00'  # Reset, then code page 437
+FEED_AND_CUT = b'\n' * 3 + GS + b'V\x42\x00'  # Feed past the cutter, partial cut
+
+# ESC/POS bytes around each line style
+_STYLE_CODES = {
+    None: (b'', b''),
+    'center': (ESC + b'a\x01', ESC + b'a\x00'),
+    'title': (ESC + b'a\x01' + GS + b'!\x11', GS + b'!\x00' + ESC + b'a\x00'),  # Centered, double width and height
+    'bold': (ESC + b'E\x01', ESC + b'E\x00'),
+}
+
+class ReceiptLayout:
+    """Column arithmetic for one paper width, worked out once"""
+
+    def __init__(self, width):
+        self.width = width
+        self.rule = '=' * width
+        self.name_limit = width - 4
+
+    def name(self, text):
+        if len(text) > self.name_limit:
+            return text[:self.name_limit - 3] + '...'
+        return text
+
+    def columns(self, left, right):
+        """Left text and right-aligned text on one line"""
+        return f"{left}{' ' * (self.width - len(left) - len(right))}{right}"
+
+    def lines(self, receipt):
+        """(style, text) lines for a receipt tuple from receipt_data()"""
+        (invoice_number, sale_date, store_name, subtotal, tax_amount, discount_amount,
+         total_amount, payment_method, items) = receipt
+        lines = [
+            ('title', 'SUPPLEMENT SHOP'),
+            ('center', store_name or 'Store'),
+            (None, self.rule),
+            (None, f'Receipt: {invoice_number}'),
+            (None, f"Date: {sale_date.strftime('%m/%d/%Y %I:%M %p')}"),
+            (None, self.rule),
+            (None, ''),
+        ]
+        for product_name, quantity, unit_price, line_total in items:
+            lines.append((None, self.name(product_name)))
+            lines.append((None, self.columns(f'{quantity} x ${unit_price:.2f}', f'${line_total:.2f}')))
+            lines.append((None, ''))
+        lines.append((None, self.rule))
+        lines.append((None, self.columns('Subtotal:', f'${subtotal:.2f}')))
+        if tax_amount > 0:
+            lines.append((None, self.columns('Tax:', f'${tax_amount:.2f}')))
+        if discount_amount > 0:
+            lines.append((None, self.columns('Discount:', f'-${discount_amount:.2f}')))
+        lines.append(('bold', self.columns('TOTAL:', f'${total_amount:.2f}')))
+        lines.append((None, self.rule))
+        lines.append((None, f'Payment: {payment_method.title()}'))
+        lines.append((None, ''))
+        lines.append(('center', 'Thank you for your business!'))
+        return lines
+
+LAYOUTS = {width: ReceiptLayout(width) for width in RECEIPT_WIDTHS}
+
+def receipt_data(sale):
+    """Hashable tuple of everything a receipt prints; it doubles as the sale's version key"""
+    items = []
+    for item in sale.sale_items:
+        flavor_info = f" - {item.product_flavor.flavor.name}" if item.product_flavor else ""
+        product_name = f"{item.product.name}{flavor_info}" if item.product else "Unknown Product"
+        items.append((product_name, item.quantity, item.unit_price, item.line_total))
+    return (
+        sale.invoice_number,
+        sale.sale_date,
+        sale.store.name if sale.store else None,
+        sale.subtotal,
+        sale.tax_amount or 0,
+        sale.discount_amount or 0,
+        sale.total_amount,
+        sale.payment_method,
+        tuple(items)
+    )
+
+def _render_text(lines):
+    # Two trailing blank lines leave room to tear the paper
+    return '\n'.join(text for _, text in lines) + '\n\n'
+
+def _render_escpos(lines):
+    out = [INITIALIZE]
+    for style, text in lines:
+        prefix, suffix = _STYLE_CODES[style]
+        out.append(prefix + text.encode('cp437', 'replace') + b'\n' + suffix)
+    out.append(FEED_AND_CUT)
+    return b''.join(out)
+
+_RENDERERS = {'text': _render_text, 'escpos': _render_escpos}
+
+# Rendered receipts by (format, width, receipt tuple). A changed sale gives a new
+# tuple, so stale entries are never served and simply age out.
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 1024
+
+def render_receipt(sale, width=32, output_format='escpos'):
+    """Receipt for a sale as ESC/POS bytes or plain text, cached per sale version"""
+    if width not in LAYOUTS:
+        raise ValueError(f"width must be one of: {', '.join(str(w) for w in RECEIPT_WIDTHS)}")
+    if output_format not in _RENDERERS:
+        raise ValueError(f"format must be one of: {', '.join(_RENDERERS)}")
+
+    key = (output_format, width, receipt_data(sale))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    rendered = _RENDERERS[output_format](LAYOUTS[width].lines(key[2]))
+    with _cache_lock:
+        _cache[key] = rendered
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return rendered
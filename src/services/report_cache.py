@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import current_app, request, make_response
+
+# Cached /api/reports/* responses, keyed by endpoint and normalized query
+# arguments. Every entry records the version of each tag it was built from:
+# a table ('sales') or a table within one store ('sales@3'). Write paths bump
+# the tags they touch after committing, which invalidates exactly the entries
+# built from them; the entries themselves are left to TTL and LRU eviction.
+#
+# A tag's versions are read before the report is computed, so a write that
+# commits while a report is being built leaves that entry stale, not wrong.
+#
+# The cache can always be rebuilt, so it never fails the request using it: a
+# backend error is logged and counted, lookups fall through to the database,
+# and a bump that did not land leaves its entries to expire with the TTL.
+
+BACKENDS = ('memory', 'sqlite', 'none')
+
+# What a backend raises when its file is locked, corrupt or unwritable
+CACHE_ERRORS = (sqlite3.Error, OSError)
+
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0, 'errors': 0}
+_stats_lock = threading.Lock()
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+class MemoryBackend:
+    """LRU of entries in this process"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (body, expires_at, tag versions)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tags):
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, expires_at, versions = entry
+            if expires_at <= now or any(self._versions.get(tag, 0) != v for tag, v in versions.items()):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body, expires_at, versions):
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (body, expires_at, versions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def size(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    """Entries in a SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path, max_entries, timeout=0.25):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS report_cache_entries ('
+                'key TEXT PRIMARY KEY, body BLOB NOT NULL, versions TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_report_cache_entries_accessed_at ON report_cache_entries (accessed_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS report_cache_tags (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared across threads, so each thread keeps its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # A short busy timeout: a locked cache is skipped, never waited on by a write
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            # Entries can be rebuilt, so a tag bump on the checkout path need not wait for an fsync
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _versions(self, conn, tags):
+        tags = list(tags)
+        found = dict(conn.execute(
+            f"SELECT tag, version FROM report_cache_tags WHERE tag IN ({','.join('?' * len(tags))})", tags
+        )) if tags else {}
+        return {tag: found.get(tag, 0) for tag in tags}
+
+    def versions(self, tags):
+        return self._versions(self._connection(), tags)
+
+    def get(self, key, now):
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT body, versions, expires_at FROM report_cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, versions, expires_at = row
+        versions = json.loads(versions)
+        with conn:
+            if expires_at <= now or self._versions(conn, versions) != versions:
+                conn.execute('DELETE FROM report_cache_entries WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE report_cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return body
+
+    def put(self, key, body, expires_at, versions):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO report_cache_entries (key, body, versions, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, body, json.dumps(versions, sort_keys=True), expires_at, now)
+            )
+            evicted = conn.execute('DELETE FROM report_cache_entries WHERE expires_at <= ?', (now,)).rowcount
+            excess = conn.execute('SELECT COUNT(*) FROM report_cache_entries').fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted += conn.execute(
+                    'DELETE FROM report_cache_entries WHERE key IN '
+                    '(SELECT key FROM report_cache_entries ORDER BY accessed_at LIMIT ?)', (excess,)
+                ).rowcount
+        return evicted
+
+    def bump(self, tags):
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT INTO report_cache_tags (tag, version) VALUES (?, 1) '
+                'ON CONFLICT (tag) DO UPDATE SET version = version + 1',
+                [(tag,) for tag in tags]
+            )
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM report_cache_entries')
+            # Tag versions only ever move forward, so other workers' snapshots stay comparable
+            conn.execute('UPDATE report_cache_tags SET version = version + 1')
+
+    def size(self):
+        return self._connection().execute('SELECT COUNT(*) FROM report_cache_entries').fetchone()[0]
+
+# One backend per app
+_backends = {}
+_backends_lock = threading.Lock()
+
+def _backend():
+    app = current_app._get_current_object()
+    with _backends_lock:
+        if app not in _backends:
+            kind = app.config.get('REPORT_CACHE_BACKEND', 'sqlite')
+            if kind not in BACKENDS:
+                raise ValueError(f"REPORT_CACHE_BACKEND must be one of: {', '.join(BACKENDS)}")
+            max_entries = int(app.config.get('REPORT_CACHE_MAX_ENTRIES', 500))
+            if kind == 'sqlite':
+                _backends[app] = SQLiteBackend(
+                    app.config['REPORT_CACHE_PATH'], max_entries,
+                    float(app.config.get('REPORT_CACHE_TIMEOUT_SECONDS', 0.25))
+                )
+            elif kind == 'memory':
+                _backends[app] = MemoryBackend(max_entries)
+            else:
+                _backends[app] = None
+        return _backends[app]
+
+def _ttl():
+    return float(current_app.config.get('REPORT_CACHE_TTL_SECONDS', 300))
+
+def _cache_key(name):
+    # Argument order and repeats do not matter; the date does, since reports count from today
+    args = sorted((key, value) for key, value in request.args.items(multi=True))
+    return json.dumps([name, date.today().isoformat(), args], separators=(',', ':'))
+
+def report_tags(tables=(), store_tables=(), store_id=None):
+    """Tags of a report: whole tables, plus tables that are narrowed to one store when it is given"""
+    tags = set(tables)
+    for table in store_tables:
+        if store_id:
+            # '@*' is bumped by writes that cannot say which stores they touched
+            tags.update((f'{table}@{store_id}', f'{table}@*'))
+        else:
+            tags.add(table)
+    return tags
+
+def _failed(action, error):
+    _count('errors')
+    current_app.logger.warning('Report cache %s failed; entries are left to the TTL: %s', action, error)
+
+def cached_report(name, tables=(), store_tables=()):
+    """Serve a report endpoint from the cache, built from the given tables.
+
+    `store_tables` are read only for the requested store when the request has a
+    store_id, so writes to other stores leave the entry alone. Only 200
+    responses are stored. Responses carry X-Cache: HIT or MISS.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = _cache_key(name)
+            body = versions = None
+            try:
+                backend = _backend()
+                if backend is None:
+                    return f(*args, **kwargs)
+                body = backend.get(key, time.time())
+                if body is None:
+                    tags = report_tags(tables, store_tables, request.args.get('store_id', type=int))
+                    versions = backend.versions(tags)
+            except CACHE_ERRORS as e:
+                # Served from the database and not stored, since the tag versions are unknown
+                _failed('lookup', e)
+
+            if body is not None:
+                _count('hits')
+                response = make_response(body, 200)
+                response.mimetype = 'application/json'
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            _count('misses')
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and versions is not None:
+                try:
+                    _count('evictions', backend.put(key, response.get_data(), time.time() + _ttl(), versions))
+                    _count('stores')
+                except CACHE_ERRORS as e:
+                    _failed('store', e)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
+
+def invalidate(*tables, store_ids=None):
+    """Invalidate reports built from these tables; call after the write commits.
+
+    `store_ids` are the stores the write touched, so only those stores'
+    filtered reports go too; None means any store. Never raises for a cache
+    error, since the write it follows has already committed.
+    """
+    tags = set(tables)
+    for store_id in ('*',) if store_ids is None else store_ids:
+        if store_id:
+            tags.update(f'{table}@{store_id}' for table in tables)
+    try:
+        backend = _backend()
+        if backend is None:
+            return
+        backend.bump(tags)
+    except CACHE_ERRORS as e:
+        _failed('invalidation', e)
+        return
+    _count('invalidations')
+
+def clear():
+    """Drop every cached report; like invalidate(), a cache error is only logged"""
+    try:
+        backend = _backend()
+        if backend is None:
+            return
+        backend.clear()
+    except CACHE_ERRORS as e:
+        _failed('clear', e)
+        return
+    _count('invalidations')
+
+def metrics():
+    """Hit and miss counters of this process, and the size of the cache"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+    stats['backend'] = current_app.config.get('REPORT_CACHE_BACKEND', 'memory')
+    try:
+        backend = _backend()
+        stats['entries'] = backend.size() if backend is not None else 0
+    except CACHE_ERRORS as e:
+        _failed('size', e)
+        stats['entries'] = None
+    return stats
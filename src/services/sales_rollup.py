@@ -0,0 +1,197 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import case, func, select, type_coerce, union_all
+from src.models.user import db
+from src.models.sale import Sale, SaleItem
+from src.models.sales_daily import SalesDaily, SalesDailyPayment
+
+def _sale_deltas(sales, sign):
+    deltas = {}
+    for sale, sale_items in sales:
+        keys = set()
+        for item in sale_items:
+            key = (sale.sale_date.date(), sale.store_id, item.product_id, item.product_flavor_id)
+            delta = deltas.setdefault(key, [0, Decimal('0'), Decimal('0'), 0])
+            delta[0] += sign * item.quantity
+            delta[1] += sign * Decimal(str(item.line_total or 0))
+            delta[2] += sign * Decimal(str(item.unit_cost or 0)) * item.quantity
+            keys.add(key)
+        for key in keys:
+            deltas[key][3] += sign
+    return deltas
+
+def _payment_deltas(sales, sign):
+    deltas = {}
+    for sale, _ in sales:
+        delta = deltas.setdefault((sale.sale_date.date(), sale.store_id, sale.payment_method), [0, Decimal('0')])
+        delta[0] += sign
+        delta[1] += sign * Decimal(str(sale.total_amount or 0))
+    return deltas
+
+def record_sales(sales):
+    """Add flushed sales, given as (sale, sale_items) pairs, to the daily rollups"""
+    connection = db.session.connection()
+    SalesDaily.apply_deltas(connection, _sale_deltas(sales, 1))
+    SalesDailyPayment.apply_deltas(connection, _payment_deltas(sales, 1))
+
+def reverse_sale(sale):
+    """Take a voided sale back out of the daily rollups"""
+    connection = db.session.connection()
+    sales = [(sale, sale.sale_items)]
+    SalesDaily.apply_deltas(connection, _sale_deltas(sales, -1))
+    SalesDailyPayment.apply_deltas(connection, _payment_deltas(sales, -1))
+
+def sales_rows(start, end=None, store_id=None):
+    """Net sales per day, store, product and flavor in [start, end) as a subquery.
+
+    Whole days before today are read from sales_daily. Today is still filling up,
+    so it is aggregated from the sale tables, which keeps today's figures exact
+    and only touches today's slice of the sale_date index. `end` defaults to no
+    upper bound.
+    """
+    today = date.today()
+    parts = []
+
+    rollup_end = min(end, today) if end else today
+    if start < rollup_end:
+        rollup = select(
+            SalesDaily.sale_date,
+            SalesDaily.store_id,
+            SalesDaily.product_id,
+            SalesDaily.product_flavor_id,
+            SalesDaily.quantity,
+            SalesDaily.revenue,
+            SalesDaily.cost,
+            SalesDaily.sale_count
+        ).where(SalesDaily.sale_date >= start, SalesDaily.sale_date < rollup_end)
+        if store_id:
+            rollup = rollup.where(SalesDaily.store_id == store_id)
+        parts.append(rollup)
+
+    if end is None or end > today or not parts:
+        sale_day = type_coerce(func.date(Sale.sale_date), db.Date)
+        raw = select(
+            sale_day.label('sale_date'),
+            Sale.store_id,
+            SaleItem.product_id,
+            SaleItem.product_flavor_id,
+            func.sum(SaleItem.quantity).label('quantity'),
+            func.coalesce(func.sum(SaleItem.line_total), 0).label('revenue'),
+            func.coalesce(func.sum(SaleItem.unit_cost * SaleItem.quantity), 0).label('cost'),
+            func.count(func.distinct(Sale.id)).label('sale_count')
+        ).join(Sale, Sale.id == SaleItem.sale_id).where(
+            Sale.sale_date >= datetime.combine(max(start, today), datetime.min.time()),
+            Sale.payment_status != 'voided'
+        ).group_by(func.date(Sale.sale_date), Sale.store_id, SaleItem.product_id, SaleItem.product_flavor_id)
+        if end:
+            raw = raw.where(Sale.sale_date < datetime.combine(end, datetime.min.time()))
+        if store_id:
+            raw = raw.where(Sale.store_id == store_id)
+        parts.append(raw)
+
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery('sales_rows')
+
+def payment_rows(start, end=None, store_id=None):
+    """Net sale count and takings per day, store and payment method in [start, end) as a subquery.
+
+    Split between sales_daily_payments and today's sales the same way as sales_rows.
+    """
+    today = date.today()
+    parts = []
+
+    rollup_end = min(end, today) if end else today
+    if start < rollup_end:
+        rollup = select(
+            SalesDailyPayment.sale_date,
+            SalesDailyPayment.store_id,
+            SalesDailyPayment.payment_method,
+            SalesDailyPayment.sale_count,
+            SalesDailyPayment.total_amount
+        ).where(SalesDailyPayment.sale_date >= start, SalesDailyPayment.sale_date < rollup_end)
+        if store_id:
+            rollup = rollup.where(SalesDailyPayment.store_id == store_id)
+        parts.append(rollup)
+
+    if end is None or end > today or not parts:
+        sale_day = type_coerce(func.date(Sale.sale_date), db.Date)
+        raw = select(
+            sale_day.label('sale_date'),
+            Sale.store_id,
+            Sale.payment_method,
+            func.count(Sale.id).label('sale_count'),
+            func.coalesce(func.sum(Sale.total_amount), 0).label('total_amount')
+        ).where(
+            Sale.sale_date >= datetime.combine(max(start, today), datetime.min.time()),
+            Sale.payment_status != 'voided'
+        ).group_by(func.date(Sale.sale_date), Sale.store_id, Sale.payment_method)
+        if end:
+            raw = raw.where(Sale.sale_date < datetime.combine(end, datetime.min.time()))
+        if store_id:
+            raw = raw.where(Sale.store_id == store_id)
+        parts.append(raw)
+
+    return (union_all(*parts) if len(parts) > 1 else parts[0]).subquery('payment_rows')
+
+def _is_midnight(moment):
+    return moment == datetime.combine(moment.date(), datetime.min.time())
+
+def summary_rows(start=None, end=None, store_id=None):
+    """Sales per payment method and sale lines per product between two instants.
+
+    Returns two subqueries, (payment_method, sale_count, total_amount) and
+    (product_id, quantity, revenue, cost), for the caller to add up. Whole days
+    are read from the rollups, so a year of sales costs a few thousand rollup
+    rows; a bound with a time of day falls back to the sale tables. Voided sales
+    are left out either way.
+    """
+    if all(bound is None or _is_midnight(bound) for bound in (start, end)):
+        first_day = start.date() if start else date.min
+        end_day = end.date() if end else None
+        return payment_rows(first_day, end_day, store_id), sales_rows(first_day, end_day, store_id)
+
+    filters = [Sale.payment_status != 'voided']
+    if store_id:
+        filters.append(Sale.store_id == store_id)
+    if start:
+        filters.append(Sale.sale_date >= start)
+    if end:
+        filters.append(Sale.sale_date <= end)
+    payments = select(
+        Sale.payment_method,
+        func.count(Sale.id).label('sale_count'),
+        func.coalesce(func.sum(Sale.total_amount), 0).label('total_amount')
+    ).where(*filters).group_by(Sale.payment_method).subquery('payment_rows')
+    lines = select(
+        SaleItem.product_id,
+        func.sum(SaleItem.quantity).label('quantity'),
+        func.coalesce(func.sum(SaleItem.line_total), 0).label('revenue'),
+        func.coalesce(func.sum(SaleItem.unit_cost * SaleItem.quantity), 0).label('cost')
+    ).join(Sale, Sale.id == SaleItem.sale_id).where(*filters).group_by(SaleItem.product_id).subquery('sales_rows')
+    return payments, lines
+
+def period_totals(store_id=None):
+    """Sales counts and units for today, this week and this month, in one query.
+
+    Counts are summed per product and flavor, so a sale of three products
+    counts as three sale lines.
+    """
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    rows = sales_rows(min(week_start, month_start), store_id=store_id)
+
+    def total(column, since):
+        return func.coalesce(func.sum(case((rows.c.sale_date >= since, column), else_=0)), 0)
+
+    today_sales, today_quantity, week_sales, month_sales = db.session.query(
+        total(rows.c.sale_count, today),
+        total(rows.c.quantity, today),
+        total(rows.c.sale_count, week_start),
+        total(rows.c.sale_count, month_start)
+    ).one()
+    return {
+        'today_sales': today_sales,
+        'today_quantity': today_quantity,
+        'week_sales': week_sales,
+        'month_sales': month_sales
+    }
@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+from sqlalchemy import case, func
+from src.models.user import db
+from src.models.supplier import Supplier
+from src.models.inventory import Inventory
+from src.models.grn import GRN, GRNItem
+from src.services.pagination import clamp_page
+
+# Deliveries this recent count as recent in the report
+RECENT_DAYS = 30
+
+def _inventory_stats(since):
+    return db.session.query(
+        Inventory.supplier_id.label('supplier_id'),
+        func.count(Inventory.id).label('total_inventory_items'),
+        func.sum(Inventory.quantity).label('total_quantity_received'),
+        func.count(func.distinct(Inventory.product_id)).label('unique_products'),
+        func.sum(case((Inventory.date_received >= since, 1), else_=0)).label('recent_deliveries')
+    ).filter(Inventory.supplier_id.is_not(None)).group_by(Inventory.supplier_id).subquery()
+
+def _grn_stats():
+    return db.session.query(
+        GRN.supplier_id.label('supplier_id'),
+        func.count(func.distinct(GRN.id)).label('grn_count'),
+        func.sum(GRNItem.line_total).label('total_purchase_value'),
+        func.sum(GRNItem.quantity_received).label('total_units_purchased'),
+        func.max(GRN.received_date).label('last_grn_date')
+    ).outerjoin(GRNItem, GRNItem.grn_id == GRN.id).group_by(GRN.supplier_id).subquery()
+
+def supplier_performance_query(today=None):
+    """One row per supplier with its inventory and GRN statistics, in a single statement.
+
+    Inventory and GRN lines are each aggregated per supplier in one grouped pass
+    and joined to the suppliers, so the cost does not grow with a query per
+    supplier. average_unit_cost is weighted by the units received.
+    """
+    inventory = _inventory_stats((today or date.today()) - timedelta(days=RECENT_DAYS))
+    grns = _grn_stats()
+    purchase_value = func.coalesce(grns.c.total_purchase_value, 0)
+    units = func.coalesce(grns.c.total_units_purchased, 0)
+    return db.session.query(
+        Supplier,
+        func.coalesce(inventory.c.total_inventory_items, 0).label('total_inventory_items'),
+        func.coalesce(inventory.c.total_quantity_received, 0).label('total_quantity_received'),
+        func.coalesce(inventory.c.unique_products, 0).label('unique_products'),
+        func.coalesce(inventory.c.recent_deliveries, 0).label('recent_deliveries'),
+        func.coalesce(grns.c.grn_count, 0).label('grn_count'),
+        purchase_value.label('total_purchase_value'),
+        units.label('total_units_purchased'),
+        case((units > 0, purchase_value * 1.0 / units), else_=None).label('average_unit_cost'),
+        grns.c.last_grn_date.label('last_grn_date')
+    ).outerjoin(
+        inventory, inventory.c.supplier_id == Supplier.id
+    ).outerjoin(
+        grns, grns.c.supplier_id == Supplier.id
+    )
+
+SORT_FIELDS = (
+    'name', 'total_inventory_items', 'total_quantity_received', 'unique_products', 'recent_deliveries',
+    'grn_count', 'total_purchase_value', 'total_units_purchased', 'average_unit_cost', 'last_grn_date'
+)
+
+def get_supplier_performance(sort='name', descending=False, page=1, per_page=50, today=None):
+    """Get one page of supplier statistics plus the supplier count.
+
+    The count rides along as a window over the same statement, so a page is
+    one query; only a page past the end needs a separate count.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+    page, per_page = clamp_page(page, per_page)
+
+    query = supplier_performance_query(today).add_columns(func.count().over().label('total_count'))
+    columns = {description['name']: description['expr'] for description in query.column_descriptions}
+    sort_column = Supplier.name if sort == 'name' else columns[sort]
+    # Suppliers without GRNs have no average cost or date; keep them last either way
+    order = [sort_column.is_(None), sort_column.desc() if descending else sort_column.asc(), Supplier.id]
+    rows = query.order_by(*order).limit(per_page).offset((page - 1) * per_page).all()
+    total = rows[0].total_count if rows else Supplier.query.count()
+    return rows, total
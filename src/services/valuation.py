@@ -0,0 +1,247 @@
+import re
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import exists, func, literal, null, or_, select, union_all
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.models.product import Product
+from src.models.sale import Sale
+from src.models.store import Store
+from src.models.transaction import Transaction
+from src.models.inventory_checkpoint import InventoryCheckpoint, InventoryCheckpointLine
+
+VALUATION_GROUPS = ('batch', 'product', 'store')
+
+# Appended to a sale's notes by POST /api/sales/<id>/void
+_VOIDED_NOTE = re.compile(r'Voided on (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+
+def legacy_void_cutover():
+    """When the last sale voided without ledger rows was voided, or None.
+
+    Voids used to restore stock to its batches without writing 'return' rows, so
+    replaying the ledger back past one overstates what was in stock before it.
+    Nothing records which batch such a void went to, so valuations from before
+    this instant are flagged rather than corrected.
+    """
+    returned = exists().where(
+        Transaction.transaction_type == 'return',
+        Transaction.reference == literal('Void: ') + Sale.invoice_number
+    )
+    cutover = None
+    for sale_date, notes in db.session.query(Sale.sale_date, Sale.notes).filter(
+        Sale.payment_status == 'voided', ~returned
+    ):
+        matches = _VOIDED_NOTE.findall(notes or '')
+        # Without the note the sale date is the earliest the void can have been
+        voided_at = datetime.strptime(matches[-1], '%Y-%m-%d %H:%M:%S') if matches else sale_date
+        if cutover is None or voided_at > cutover:
+            cutover = voided_at
+    return cutover
+
+def checkpoint_interval():
+    """Minimum time between scheduled checkpoints (INVENTORY_CHECKPOINT_INTERVAL_HOURS, default 24)"""
+    return timedelta(hours=float(current_app.config.get('INVENTORY_CHECKPOINT_INTERVAL_HOURS', 24)))
+
+def checkpoint_due(now=None):
+    """Whether the newest checkpoint is older than the configured interval"""
+    latest = db.session.query(func.max(InventoryCheckpoint.taken_at)).scalar()
+    return latest is None or (now or datetime.utcnow()) - latest >= checkpoint_interval()
+
+def take_checkpoint(user_id=None, notes=None):
+    """Snapshot every non-empty batch with one INSERT ... SELECT. The caller commits."""
+    checkpoint = InventoryCheckpoint(created_by=user_id, notes=notes)
+    db.session.add(checkpoint)
+    db.session.flush()
+    # The flush holds SQLite's write lock until the caller commits, so no ledger
+    # row can be written between the snapshot and this id. Dates cannot mark that
+    # boundary: a row's transaction_date is stamped before it is written, so one
+    # dated before taken_at may still be committed after the snapshot.
+    checkpoint.last_transaction_id = db.session.query(func.max(Transaction.id)).scalar() or 0
+    checkpoint.taken_at = datetime.utcnow()
+
+    result = db.session.execute(InventoryCheckpointLine.__table__.insert().from_select(
+        ['checkpoint_id', 'inventory_id', 'product_id', 'product_flavor_id', 'store_id', 'quantity', 'unit_cost'],
+        select(
+            literal(checkpoint.id),
+            Inventory.id,
+            Inventory.product_id,
+            Inventory.product_flavor_id,
+            Inventory.store_id,
+            Inventory.quantity,
+            Inventory.unit_cost
+        ).where(Inventory.quantity != 0)
+    ))
+    checkpoint.batch_count = result.rowcount
+    db.session.flush()
+    return checkpoint
+
+def nearest_base(as_of, now=None):
+    """Pick the state to replay from: the closest checkpoint on either side of as_of, or live inventory.
+
+    Returns (checkpoint or None for live inventory, direction). 'forward' adds the
+    ledger rows after the checkpoint up to as_of; 'backward' subtracts the rows
+    between as_of and the base.
+    """
+    now = now or datetime.utcnow()
+    before = InventoryCheckpoint.query.filter(
+        InventoryCheckpoint.taken_at <= as_of
+    ).order_by(InventoryCheckpoint.taken_at.desc()).first()
+    after = InventoryCheckpoint.query.filter(
+        InventoryCheckpoint.taken_at > as_of
+    ).order_by(InventoryCheckpoint.taken_at).first()
+
+    candidates = []
+    if before:
+        candidates.append((as_of - before.taken_at, before, 'forward'))
+    if after:
+        candidates.append((after.taken_at - as_of, after, 'backward'))
+    else:
+        # Live inventory is a checkpoint taken "now"
+        candidates.append((max(now - as_of, timedelta(0)), None, 'backward'))
+    _, checkpoint, direction = min(candidates, key=lambda candidate: candidate[0])
+    return checkpoint, direction
+
+def _after_checkpoint(checkpoint):
+    """Ledger rows written after the checkpoint's snapshot"""
+    if checkpoint.last_transaction_id is not None:
+        return Transaction.id > checkpoint.last_transaction_id
+    # Checkpoints from before the ledger position was recorded
+    return Transaction.transaction_date > checkpoint.taken_at
+
+def batch_quantities(as_of, checkpoint, direction, store_id=None, product_id=None):
+    """Subquery of (inventory_id, product_id, store_id, quantity, unit_cost) as of the given instant.
+
+    Product and store come from the checkpoint or ledger rows themselves, so
+    batches deleted since still count.
+    """
+    if checkpoint is not None:
+        start_columns = InventoryCheckpointLine
+        start = select(
+            InventoryCheckpointLine.inventory_id.label('inventory_id'),
+            InventoryCheckpointLine.product_id.label('product_id'),
+            InventoryCheckpointLine.store_id.label('store_id'),
+            InventoryCheckpointLine.quantity.label('quantity'),
+            InventoryCheckpointLine.unit_cost.label('unit_cost')
+        ).where(InventoryCheckpointLine.checkpoint_id == checkpoint.id)
+    else:
+        start_columns = Inventory
+        start = select(
+            Inventory.id.label('inventory_id'),
+            Inventory.product_id.label('product_id'),
+            Inventory.store_id.label('store_id'),
+            Inventory.quantity.label('quantity'),
+            Inventory.unit_cost.label('unit_cost')
+        )
+
+    ledger_quantity = Transaction.quantity if direction == 'forward' else -Transaction.quantity
+    ledger = select(
+        Transaction.inventory_id,
+        Transaction.product_id,
+        Transaction.store_id,
+        ledger_quantity,
+        null()
+    ).where(Transaction.inventory_id.isnot(None))
+    if direction == 'forward':
+        ledger = ledger.where(_after_checkpoint(checkpoint), Transaction.transaction_date <= as_of)
+    else:
+        ledger = ledger.where(Transaction.transaction_date > as_of)
+        if checkpoint is not None:
+            ledger = ledger.where(~_after_checkpoint(checkpoint))
+
+    if store_id:
+        start = start.where(start_columns.store_id == store_id)
+        ledger = ledger.where(Transaction.store_id == store_id)
+    if product_id:
+        start = start.where(start_columns.product_id == product_id)
+        ledger = ledger.where(Transaction.product_id == product_id)
+
+    combined = union_all(start, ledger).subquery()
+    return select(
+        combined.c.inventory_id,
+        func.max(combined.c.product_id).label('product_id'),
+        func.max(combined.c.store_id).label('store_id'),
+        func.sum(combined.c.quantity).label('quantity'),
+        func.max(combined.c.unit_cost).label('unit_cost')
+    ).group_by(combined.c.inventory_id).subquery()
+
+def valuation_as_of(as_of, store_id=None, product_id=None, group_by='product', page=1, per_page=50):
+    """Stock quantity and cost value as of an instant, grouped by batch, product or store.
+
+    Returns (rows, totals, total_rows, base) where base describes the checkpoint
+    the figures were replayed from.
+    """
+    if group_by not in VALUATION_GROUPS:
+        raise ValueError(f'Invalid group_by: {group_by}. Use one of {", ".join(VALUATION_GROUPS)}')
+
+    checkpoint, direction = nearest_base(as_of)
+    stock = batch_quantities(as_of, checkpoint, direction, store_id, product_id)
+    unit_cost = func.coalesce(stock.c.unit_cost, Inventory.unit_cost, 0)
+    value = stock.c.quantity * unit_cost
+
+    def scoped(query):
+        # Batches created after as_of cannot have held stock then, whatever the ledger
+        # says; a batch deleted since has no inventory row but still held its stock
+        return query.select_from(stock).outerjoin(Inventory, Inventory.id == stock.c.inventory_id).filter(
+            stock.c.quantity != 0,
+            or_(Inventory.created_at.is_(None), Inventory.created_at <= as_of)
+        )
+
+    totals_row = scoped(db.session.query(
+        func.count(stock.c.inventory_id),
+        func.coalesce(func.sum(stock.c.quantity), 0),
+        func.coalesce(func.sum(value), 0)
+    )).one()
+    totals = {
+        'batches': totals_row[0],
+        'quantity': int(totals_row[1]),
+        'value': round(float(totals_row[2]), 2)
+    }
+
+    if group_by == 'batch':
+        query = scoped(db.session.query(
+            stock.c.inventory_id.label('inventory_id'),
+            Inventory.batch_number,
+            stock.c.product_id.label('product_id'),
+            Product.name.label('product_name'),
+            Product.sku.label('product_sku'),
+            Inventory.product_flavor_id,
+            stock.c.store_id.label('store_id'),
+            stock.c.quantity.label('quantity'),
+            unit_cost.label('unit_cost'),
+            value.label('value')
+        )).join(Product, Product.id == stock.c.product_id).order_by(stock.c.product_id, stock.c.inventory_id)
+    elif group_by == 'product':
+        query = scoped(db.session.query(
+            Product.id.label('product_id'),
+            Product.name.label('product_name'),
+            Product.sku.label('product_sku'),
+            func.count(stock.c.inventory_id).label('batches'),
+            func.sum(stock.c.quantity).label('quantity'),
+            func.sum(value).label('value')
+        )).join(Product, Product.id == stock.c.product_id).group_by(Product.id).order_by(Product.name, Product.id)
+    else:
+        query = scoped(db.session.query(
+            Store.id.label('store_id'),
+            Store.name.label('store_name'),
+            func.count(stock.c.inventory_id).label('batches'),
+            func.sum(stock.c.quantity).label('quantity'),
+            func.sum(value).label('value')
+        )).join(Store, Store.id == stock.c.store_id).group_by(Store.id).order_by(Store.name, Store.id)
+
+    total_rows = query.order_by(None).count()
+    rows = []
+    for row in query.limit(per_page).offset((page - 1) * per_page):
+        entry = row._asdict()
+        entry['quantity'] = int(entry['quantity'])
+        entry['value'] = round(float(entry['value'] or 0), 2)
+        if 'unit_cost' in entry:
+            entry['unit_cost'] = float(entry['unit_cost'] or 0)
+        rows.append(entry)
+
+    base = {
+        'type': 'checkpoint' if checkpoint is not None else 'live',
+        'checkpoint_id': checkpoint.id if checkpoint is not None else None,
+        'taken_at': checkpoint.taken_at.isoformat() if checkpoint is not None else None,
+        'direction': direction
+    }
+    return rows, totals, total_rows, base
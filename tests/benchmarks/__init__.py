@@ -0,0 +1,26 @@
+import os
+import time
+import pytest
+
+# Benchmarks build large datasets and time real requests, so they only run
+# when asked for: RUN_BENCHMARKS=1 python -m pytest tests/benchmarks
+requires_benchmarks = pytest.mark.skipif(
+    not os.environ.get('RUN_BENCHMARKS'), reason='set RUN_BENCHMARKS=1 to run benchmarks'
+)
+
+def scale(name, default):
+    """Dataset size for a benchmark, overridable from the environment"""
+    return int(os.environ.get(name, default))
+
+def timed(function, repeat):
+    """Wall-clock seconds for each of ``repeat`` calls"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from src.models.user import db
+from src.models.store import Store
+from src.models.product import Product
+from src.models.inventory import Inventory
+from tests.benchmarks import percentile, requires_benchmarks, scale, timed
+
+pytestmark = requires_benchmarks
+
+CHECKOUTS = scale('BENCHMARK_CHECKOUTS', 1000)
+LINES = 20
+BATCHES_PER_PRODUCT = 5
+# A 20-line basket at the till, from request to committed sale
+TARGET_P99_SECONDS = 0.020
+
+def test_checkout_p99_for_a_twenty_line_basket(app, client):
+    with app.app_context():
+        store = Store(name='Checkout benchmark store')
+        products = [Product(name=f'Checkout bench {i}', sku=f'CHKBENCH-{i:02d}') for i in range(LINES)]
+        db.session.add_all([store, *products])
+        db.session.flush()
+        # Several batches per product, so FIFO allocation has a real choice to make
+        db.session.add_all([
+            Inventory(product_id=product.id, store_id=store.id, batch_number=f'CHKBENCH-{i:02d}-{batch}',
+                      quantity=CHECKOUTS * 2, unit_cost=Decimal('2.00') + batch)
+            for i, product in enumerate(products) for batch in range(BATCHES_PER_PRODUCT)
+        ])
+        db.session.commit()
+        basket = {
+            'store_id': store.id,
+            'payment_method': 'card',
+            'items': [{'product_id': product.id, 'quantity': 2, 'unit_price': '9.99'} for product in products]
+        }
+
+    def checkout():
+        response = client.post('/api/sales', json=basket)
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+    timed(checkout, repeat=20)  # warm up caches and the connection pool
+    timings = timed(checkout, repeat=CHECKOUTS)
+    p50, p99 = percentile(timings, 0.5), percentile(timings, 0.99)
+    print(f'\ncheckout, {LINES}-line basket x {CHECKOUTS}: p50 {p50 * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms, '
+          f'max {max(timings) * 1000:.1f} ms')
+    assert p99 < TARGET_P99_SECONDS, f'p99 {p99 * 1000:.1f} ms'
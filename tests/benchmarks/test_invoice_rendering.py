@@ -0,0 +1,38 @@
+import time
+import pytest
+from src.models.sale import Sale
+from src.models.loading_profiles import with_profile
+from src.services.bulk_invoices import sale_snapshot
+from src.services.invoice_pdf import render_invoice_pdf, render_receipt_pdf
+from tests.benchmarks import requires_benchmarks, scale
+
+pytestmark = requires_benchmarks
+
+SALES = scale('BENCHMARK_RENDER_SALES', 20)
+SECONDS = scale('BENCHMARK_RENDER_SECONDS', 5)
+# Per render process. One core manages roughly twice this with the shared
+# styles, so the floor catches a renderer that starts doing real work per call
+TARGET_DOCUMENTS_PER_SECOND = 100
+
+def _documents_per_second(render, sales):
+    rendered = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < SECONDS:
+        for sale in sales:
+            render(sale)
+        rendered += len(sales)
+    return rendered / (time.perf_counter() - started)
+
+@pytest.mark.parametrize('render', [render_invoice_pdf, render_receipt_pdf], ids=['invoice', 'receipt'])
+def test_documents_rendered_per_second(app, render):
+    # Rendered from snapshots, as the bulk job's worker processes do, so the
+    # timing is the renderer alone and not the ORM
+    with app.app_context():
+        sales = [sale_snapshot(sale) for sale in with_profile(Sale.query, 'sale_with_items').limit(SALES)]
+    assert sales
+    assert render(sales[0]).startswith(b'%PDF')
+
+    render(sales[0])  # warm up reportlab's font and glyph caches
+    rate = _documents_per_second(render, sales)
+    print(f'\n{render.__name__}: {rate:.0f} documents/s over {len(sales)} sales')
+    assert rate > TARGET_DOCUMENTS_PER_SECOND, f'{rate:.0f} documents/s'
@@ -0,0 +1,79 @@
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.product import Product
+from src.models.sale import Sale, SaleItem
+from src.models.sales_daily import SalesDaily, SalesDailyPayment
+from tests.benchmarks import percentile, requires_benchmarks, scale, timed
+
+pytestmark = requires_benchmarks
+
+SALES = scale('BENCHMARK_SUMMARY_SALES', 1_000_000)
+LINES_PER_SALE = 3
+PRODUCTS = 200
+INSERT_CHUNK = 50_000
+# The summary has to stay interactive over a year of a large chain's sales
+TARGET_SECONDS = 1.0
+
+def _insert_year_of_sales(store_id, user_id, product_ids):
+    """SALES sales spread over the past year, written straight to the tables.
+
+    The rollups are then rebuilt in one pass, as the migration that introduced
+    them does; checkout keeps them current one sale at a time.
+    """
+    rng = random.Random(11)
+    start = datetime.utcnow() - timedelta(days=365)
+    next_sale_id = (db.session.query(func.max(Sale.id)).scalar() or 0) + 1
+    methods = ('cash', 'card', 'online')
+    connection = db.session.connection()
+    for chunk_start in range(0, SALES, INSERT_CHUNK):
+        sales, items = [], []
+        for sale_id in range(next_sale_id + chunk_start, next_sale_id + min(chunk_start + INSERT_CHUNK, SALES)):
+            total = 0
+            for product_id in rng.sample(product_ids, LINES_PER_SALE):
+                quantity = rng.randint(1, 4)
+                line_total = quantity * 12.5
+                total += line_total
+                items.append({
+                    'sale_id': sale_id, 'product_id': product_id, 'quantity': quantity,
+                    'unit_price': 12.5, 'unit_cost': 7.25, 'line_total': line_total, 'discount_amount': 0
+                })
+            sales.append({
+                'id': sale_id, 'invoice_number': f'BENCH-{sale_id}', 'store_id': store_id, 'created_by': user_id,
+                'sale_date': start + timedelta(seconds=rng.randrange(365 * 86400)),
+                'subtotal': total, 'tax_amount': 0, 'discount_amount': 0, 'total_amount': total,
+                'payment_method': rng.choice(methods), 'payment_status': 'paid'
+            })
+        connection.execute(Sale.__table__.insert(), sales)
+        connection.execute(SaleItem.__table__.insert(), items)
+    SalesDaily.rebuild(connection)
+    SalesDailyPayment.rebuild(connection)
+    db.session.commit()
+
+def test_sales_summary_over_a_year_of_sales(app, client):
+    with app.app_context():
+        store = Store(name='Summary benchmark store')
+        db.session.add(store)
+        products = [Product(name=f'Summary bench {i}', sku=f'SUMBENCH-{i:03d}') for i in range(PRODUCTS)]
+        db.session.add_all(products)
+        db.session.flush()
+        user_id = User.query.filter_by(username='admin').one().id
+        _insert_year_of_sales(store.id, user_id, [product.id for product in products])
+        store_id = store.id
+
+    since = (datetime.utcnow() - timedelta(days=366)).date().isoformat()
+    for label, url in [
+        ('all stores', f'/api/sales/summary?start_date={since}'),
+        ('one store', f'/api/sales/summary?start_date={since}&store_id={store_id}'),
+    ]:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert response.get_json()['summary']['total_sales'] >= SALES
+
+        timings = timed(lambda: client.get(url), repeat=5)
+        median = percentile(timings, 0.5)
+        print(f'\nsales summary, {label}: {SALES:,} sales / {SALES * LINES_PER_SALE:,} lines, '
+              f'median {median * 1000:.0f} ms, worst {max(timings) * 1000:.0f} ms')
+        assert median < TARGET_SECONDS, timings
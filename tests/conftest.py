@@ -0,0 +1,63 @@
+import os
+import pytest
+from sqlalchemy import event
+
+# The app is configured at import, so point every file it writes at a
+# temporary directory before src.main is imported. One app and one seeded
+# database serve the whole session; tests that write add their own rows.
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    root = tmp_path_factory.mktemp('app')
+    os.environ['DATABASE_URL'] = f"sqlite:///{root / 'app.db'}"
+    os.environ['DOCUMENT_CACHE_DIR'] = str(root / 'document_cache')
+    os.environ['BULK_DOCUMENT_DIR'] = str(root / 'bulk_documents')
+    os.environ['REPORT_CACHE_PATH'] = str(root / 'report_cache.db')
+    from src.main import app
+    app.config['TESTING'] = True
+
+    client = app.test_client()
+    login(client)
+    response = client.post('/api/seed-data')
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return app
+
+def login(client, username='admin', password='admin123'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    login(client)
+    return client
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+class StatementRecorder:
+    """SQL statements run on an engine while recording"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __len__(self):
+        return len(self.statements)
+
+    def matching(self, table):
+        return [(sql, params) for sql, params in self.statements if f'FROM {table}' in sql]
+
+@pytest.fixture
+def statements(app):
+    from src.models.user import db
+    recorder = StatementRecorder()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', recorder)
+    yield recorder
+    event.remove(engine, 'before_cursor_execute', recorder)
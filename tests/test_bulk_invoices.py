@@ -0,0 +1,59 @@
+import os
+import signal
+import uuid
+from datetime import datetime, timedelta
+from pypdf import PdfReader
+from src.models.user import db, User
+from src.models.sale import Sale
+from src.models.document_job import DocumentJob
+from src.services import bulk_invoices
+
+def _job(output_format, sale_ids, **fields):
+    user = User.query.filter_by(username='admin').one()
+    job = DocumentJob(id=uuid.uuid4().hex, output_format=output_format, total=len(sale_ids), created_by=user.id, **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+def _run(app, output_format, sale_ids):
+    """Run a job on this thread, as the background thread would, and return it"""
+    job_id = _job(output_format, sale_ids)
+    bulk_invoices._run_invoice_job(app, job_id, sale_ids, output_format)
+    return db.session.get(DocumentJob, job_id)
+
+def test_merged_pdf_is_written_page_by_page(app, app_context):
+    sales = Sale.query.order_by(Sale.id).limit(5).all()
+    job = _run(app, 'pdf', [sale.id for sale in sales])
+
+    assert job.status == 'completed', job.error
+    assert job.updated_at > job.created_at  # Progress reports keep the job alive
+    reader = PdfReader(job.file_path, strict=True)
+    text = '\n'.join(page.extract_text() for page in reader.pages)
+    assert len(reader.pages) >= len(sales)
+    for sale in sales:
+        assert sale.invoice_number in text
+
+def test_broken_pool_fails_the_job_and_is_replaced(app, app_context):
+    sale_ids = [sale_id for sale_id, in db.session.query(Sale.id).limit(3)]
+    executor = bulk_invoices._get_executor()
+    # A render worker dying mid-job, as on a crash or the OOM killer
+    os.kill(executor.submit(os.getpid).result(), signal.SIGKILL)
+
+    job = _run(app, 'zip', sale_ids)
+
+    assert job.status == 'failed'
+    assert job.finished_at is not None
+    assert bulk_invoices._executor is not executor
+    assert _run(app, 'zip', sale_ids).status == 'completed'
+
+def test_jobs_that_stopped_reporting_are_failed(app, app_context):
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    stale = _job('zip', [1], status='running', created_at=long_ago, updated_at=long_ago)
+    waiting = _job('zip', [1], status='pending', created_at=long_ago, updated_at=long_ago)
+    live = _job('zip', [1], status='running')
+
+    bulk_invoices.fail_stale_jobs()
+    db.session.commit()
+
+    statuses = {job.id: job.status for job in DocumentJob.query.filter(DocumentJob.id.in_([stale, waiting, live]))}
+    assert statuses == {stale: 'failed', waiting: 'failed', live: 'running'}
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from src.models.user import db
+from src.models.store import Store
+from src.models.product import Product
+from src.models.inventory import Inventory
+from src.models.sale import Sale, SaleItem
+
+LINES = 20
+
+@pytest.fixture(scope='module')
+def shelf(app):
+    """A store stocked with LINES products of its own"""
+    with app.app_context():
+        store = Store(name='Checkout store')
+        products = [Product(name=f'Checkout product {i}', sku=f'CHK-{i:02d}') for i in range(LINES)]
+        db.session.add_all([store, *products])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(product_id=product.id, store_id=store.id, batch_number=f'CHK-B{i:02d}', quantity=10_000,
+                      unit_cost=Decimal('2.00'))
+            for i, product in enumerate(products)
+        ])
+        db.session.commit()
+        return store.id, [product.id for product in products]
+
+def basket(store_id, product_ids, **fields):
+    return {
+        'store_id': store_id,
+        'items': [{'product_id': product_id, 'quantity': 1, 'unit_price': '5.00'} for product_id in product_ids],
+        **fields
+    }
+
+def test_lines_are_written_in_one_insert_with_their_ids(client, statements, shelf):
+    store_id, product_ids = shelf
+    statements.statements.clear()
+    response = client.post('/api/sales', json=basket(store_id, product_ids))
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+    inserts = [sql for sql, _ in statements.statements if sql.startswith('INSERT INTO sale_items')]
+    assert len(inserts) == 1
+    items = response.get_json()['items']
+    assert [item['product_id'] for item in items] == product_ids
+    with client.application.app_context():
+        stored = {item.id: item.product_id for item in SaleItem.query.filter_by(sale_id=response.get_json()['id'])}
+    assert stored == {item['id']: item['product_id'] for item in items}
+
+@pytest.mark.parametrize('fields, item_fields, error', [
+    ({}, {'unit_price': 'abc'}, 'Invalid unit_price: abc'),
+    ({}, {'unit_price': 'Infinity'}, 'Invalid unit_price: Infinity'),
+    ({}, {'discount_amount': 'NaN'}, 'Invalid discount_amount: NaN'),
+    ({}, {'discount_amount': '-1'}, 'discount_amount cannot be negative'),
+    ({'tax_amount': '1,50'}, {}, 'Invalid tax_amount: 1,50'),
+    ({'discount_amount': 'sNaN'}, {}, 'Invalid discount_amount: sNaN'),
+])
+def test_bad_amount_fails_only_its_own_sale(client, shelf, fields, item_fields, error):
+    store_id, product_ids = shelf
+    bad = basket(store_id, product_ids[:2], **fields)
+    bad['items'][1].update(item_fields)
+    sales = [basket(store_id, product_ids[:1]), bad, basket(store_id, product_ids[1:2])]
+
+    response = client.post('/api/sales/batch', json={'sales': sales})
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['created', 'failed', 'created']
+    assert results[1]['error'] == error
+
+def test_sale_cannot_be_created_voided(client, shelf):
+    store_id, product_ids = shelf
+    response = client.post('/api/sales', json=basket(store_id, product_ids[:1], payment_status='voided'))
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'A sale cannot be created as voided'
+
+def test_payment_status_update_cannot_void_or_reopen(client, shelf):
+    store_id, product_ids = shelf
+    sale = client.post('/api/sales', json=basket(store_id, product_ids[:1])).get_json()
+
+    response = client.put(f"/api/sales/{sale['id']}", json={'payment_status': 'voided'})
+    assert response.status_code == 400
+    assert client.put(f"/api/sales/{sale['id']}", json={'payment_status': 'pending'}).status_code == 200
+
+    assert client.post(f"/api/sales/{sale['id']}/void").status_code == 200
+    response = client.put(f"/api/sales/{sale['id']}", json={'payment_status': 'paid'})
+    assert response.status_code == 400
+    # Other fields of a voided sale can still be edited
+    response = client.put(f"/api/sales/{sale['id']}", json={'payment_status': 'voided', 'notes': 'Refunded at till'})
+    assert response.status_code == 200
+    assert response.get_json()['payment_status'] == 'voided'
+
+def test_batch_emptied_after_allocation_fails_the_sale(app, client, monkeypatch):
+    from src.services import checkout as checkout_service
+    with app.app_context():
+        store = Store(name='Race store')
+        product = Product(name='Race product', sku='RACE-1')
+        db.session.add_all([store, product])
+        db.session.flush()
+        batch = Inventory(product_id=product.id, store_id=store.id, batch_number='RACE-B1', quantity=3,
+                          unit_cost=Decimal('2.00'))
+        db.session.add(batch)
+        db.session.commit()
+        store_id, product_id, batch_id = store.id, product.id, batch.id
+
+    write_batch_decrements = checkout_service.write_batch_decrements
+    def concurrent_sale_first(allocations):
+        # Another checkout commits the last units between this one's read and its write
+        db.session.execute(Inventory.__table__.update().where(Inventory.id == batch_id).values(quantity=1))
+        write_batch_decrements(allocations)
+    monkeypatch.setattr(checkout_service, 'write_batch_decrements', concurrent_sale_first)
+
+    sale = {'store_id': store_id, 'items': [{'product_id': product_id, 'quantity': 3, 'unit_price': '5.00'}]}
+    response = client.post('/api/sales', json=sale)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Stock changed while the sale was being written, please retry'
+
+    response = client.post('/api/sales/batch', json={'sales': [sale]})
+    assert response.get_json()['results'][0]['status'] == 'failed'
+    with app.app_context():
+        assert db.session.get(Inventory, batch_id).quantity == 3
+
+def test_sale_date_is_stored_as_naive_utc(app, client, shelf):
+    store_id, product_ids = shelf
+    response = client.post('/api/sales', json=basket(store_id, product_ids[:1], sale_date='2026-03-01T10:30:00+05:30'))
+    assert response.status_code == 201, response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.get(Sale, response.get_json()['id']).sale_date == datetime(2026, 3, 1, 5, 0)
+
+@pytest.mark.parametrize('sale_date, error', [
+    ('yesterday', 'Invalid sale_date: yesterday. Use ISO 8601'),
+    ((datetime.utcnow() + timedelta(days=1)).isoformat(), 'sale_date cannot be in the future'),
+    ((datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(), 'sale_date cannot be in the future'),
+])
+def test_bad_sale_date_fails_only_its_own_sale(client, shelf, sale_date, error):
+    store_id, product_ids = shelf
+    sales = [basket(store_id, product_ids[:1], sale_date=sale_date), basket(store_id, product_ids[:1])]
+    response = client.post('/api/sales/batch', json={'sales': sales})
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['failed', 'created']
+    assert results[0]['error'] == error
@@ -0,0 +1,91 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.product import Product
+from src.models.inventory import Inventory
+from src.models.sale import Sale
+from src.models.idempotency_key import IdempotencyKey
+from src.routes import sales as sales_routes
+
+@pytest.fixture(scope='module')
+def shop(app):
+    with app.app_context():
+        store = Store(name='Idempotency store')
+        product = Product(name='Idempotency product', sku='IDEM-1', cost_price=Decimal('3.00'))
+        db.session.add_all([store, product])
+        db.session.flush()
+        db.session.add(Inventory(product_id=product.id, store_id=store.id, batch_number='IDEM-B1', quantity=500,
+                                 unit_cost=Decimal('3.00')))
+        db.session.commit()
+        return store.id, product.id
+
+def _sale(shop, quantity=1):
+    store_id, product_id = shop
+    return {
+        'store_id': store_id,
+        'payment_method': 'cash',
+        'items': [{'product_id': product_id, 'quantity': quantity, 'unit_price': '10.00'}]
+    }
+
+def _post(client, payload, key):
+    return client.post('/api/sales', json=payload, headers={'Idempotency-Key': key})
+
+def _sale_count(app, shop):
+    with app.app_context():
+        return Sale.query.filter_by(store_id=shop[0]).count()
+
+def test_rejected_request_releases_the_key(client, shop):
+    assert _post(client, {**_sale(shop), 'items': []}, 'idem-rejected').status_code == 400
+    assert _post(client, _sale(shop), 'idem-rejected').status_code == 201
+
+def test_failure_before_commit_releases_the_key(app, client, shop, monkeypatch):
+    def failing_checkout(*args, **kwargs):
+        raise RuntimeError('checkout failed')
+    monkeypatch.setattr(sales_routes, 'checkout', failing_checkout)
+    before = _sale_count(app, shop)
+    assert _post(client, _sale(shop), 'idem-rolled-back').status_code == 500
+
+    monkeypatch.undo()
+    assert _post(client, _sale(shop), 'idem-rolled-back').status_code == 201
+    assert _sale_count(app, shop) == before + 1
+
+def test_failure_after_commit_is_replayed_not_repeated(app, client, shop, monkeypatch):
+    def failing_invalidate(*args, **kwargs):
+        raise RuntimeError('failed after commit')
+    monkeypatch.setattr(sales_routes.report_cache, 'invalidate', failing_invalidate)
+    before = _sale_count(app, shop)
+    assert _post(client, _sale(shop), 'idem-committed').status_code == 500
+
+    monkeypatch.undo()
+    retry = _post(client, _sale(shop), 'idem-committed')
+    assert retry.status_code == 500
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert _sale_count(app, shop) == before + 1
+
+def _reserve(app, key, payload, age):
+    with app.app_context():
+        user = User.query.filter_by(username='admin').one()
+        created_at = datetime.utcnow() - age
+        db.session.add(IdempotencyKey(
+            key=key, scope='sales', user_id=user.id,
+            request_hash=hashlib.sha256(json.dumps(payload).encode()).hexdigest(),
+            created_at=created_at, expires_at=created_at + timedelta(hours=24)
+        ))
+        db.session.commit()
+
+def test_abandoned_reservation_is_taken_over(app, client, shop):
+    payload = _sale(shop)
+    _reserve(app, 'idem-running', payload, timedelta(seconds=1))
+    _reserve(app, 'idem-abandoned', payload, timedelta(minutes=10))
+
+    running = client.post('/api/sales', data=json.dumps(payload), content_type='application/json',
+                          headers={'Idempotency-Key': 'idem-running'})
+    abandoned = client.post('/api/sales', data=json.dumps(payload), content_type='application/json',
+                            headers={'Idempotency-Key': 'idem-abandoned'})
+
+    assert running.status_code == 409
+    assert abandoned.status_code == 201, abandoned.get_data(as_text=True)
@@ -0,0 +1,69 @@
+import json
+import pytest
+from src.models.product import Product
+from src.models.store import Store
+
+@pytest.fixture
+def target(app):
+    with app.app_context():
+        return Product.query.order_by(Product.id).first().sku, Store.query.order_by(Store.id).first().id
+
+def _import(client, records):
+    body = '\n'.join(record if isinstance(record, str) else json.dumps(record) for record in records)
+    return client.post('/api/inventory/bulk?format=ndjson', data=body, content_type='application/x-ndjson')
+
+@pytest.mark.parametrize('unit_cost, error', [
+    ('NaN', 'Invalid unit_cost: NaN'),
+    ('Infinity', 'Invalid unit_cost: Infinity'),
+    ('-1.50', 'unit_cost cannot be negative'),
+    ('abc', 'Invalid unit_cost: abc'),
+])
+def test_unusable_unit_cost_is_a_row_error(client, target, unit_cost, error):
+    sku, store_id = target
+    row = {'sku': sku, 'store_id': store_id, 'expiration_date': '2030-01-01', 'quantity': 5}
+    response = _import(client, [
+        {**row, 'batch_number': f'IMP-BAD-{unit_cost}', 'unit_cost': unit_cost},
+        {**row, 'batch_number': f'IMP-OK-{unit_cost}', 'unit_cost': '2.50'},
+    ])
+    assert response.status_code == 200, response.get_data(as_text=True)
+    result = response.get_json()
+    assert (result['imported'], result['failed']) == (1, 1)
+    assert result['errors'] == [{'row': 1, 'error': error}]
+
+def test_json_nan_literal_is_a_row_error(client, target):
+    sku, store_id = target
+    line = f'{{"sku": "{sku}", "store_id": {store_id}, "batch_number": "IMP-NAN", ' \
+           f'"expiration_date": "2030-01-01", "quantity": 5, "unit_cost": NaN}}'
+    response = _import(client, [line])
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'row': 1, 'error': 'Invalid unit_cost: NaN'}]
+
+def _csv(sku, store_id, batches):
+    lines = ['sku,store_id,batch_number,expiration_date,quantity']
+    lines += [f'{sku},{store_id},{batch},2030-01-01,1' for batch in batches]
+    return '\n'.join(lines).encode()
+
+def test_undecodable_csv_row_fails_only_that_row(client, target):
+    sku, store_id = target
+    body = _csv(sku, store_id, [f'IMP-UTF-{i}' for i in range(700)])
+    # Row 602 of the file (the header is row 1) gets a byte that is not UTF-8
+    body = body.replace(b'IMP-UTF-600,', b'IMP-UTF-\xff600,')
+    response = client.post('/api/inventory/bulk?format=csv', data=body, content_type='text/csv')
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    result = response.get_json()
+    assert (result['imported'], result['failed']) == (699, 1)
+    assert result['errors'] == [{'row': 602, 'error': 'Invalid UTF-8 in row'}]
+
+def test_unreadable_csv_stops_cleanly(client, target):
+    sku, store_id = target
+    body = _csv(sku, store_id, ['IMP-CSV-1', 'IMP-CSV-2', 'IMP-CSV-3'])
+    # A field past the csv module's size limit
+    body = body.replace(b'IMP-CSV-3', b'"' + b'x' * 200_000 + b'"')
+    response = client.post('/api/inventory/bulk?format=csv', data=body, content_type='text/csv')
+
+    assert response.status_code == 200, response.get_data(as_text=True)
+    result = response.get_json()
+    assert (result['imported'], result['failed']) == (2, 1)
+    assert result['errors'][0]['row'] == 4
+    assert result['errors'][0]['error'].startswith('Invalid CSV, rest of the file not read')
@@ -0,0 +1,96 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import text
+from src.models.user import db
+from src.models.inventory import Inventory
+from src.models.migrations import MIGRATIONS, get_schema_version, run_migrations
+from src.services.allocation import AllocationLine, load_candidate_batches
+from src.services.expiry import expiry_rows
+
+def _index_names(connection):
+    return {
+        name for name, in connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'"
+        ))
+    }
+
+def _plan(statement, parameters):
+    """EXPLAIN QUERY PLAN details for a statement exactly as the app ran it"""
+    connection = db.session.connection().connection.driver_connection
+    return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+def _assert_uses_index(statements, table, index):
+    recorded = statements.matching(table)
+    assert recorded, f'no statement read {table}'
+    plan = _plan(*recorded[0])
+    assert any(line.startswith(f'SEARCH {table} USING') and index in line for line in plan), plan
+    assert not any(line.startswith(f'SCAN {table}') for line in plan), plan
+
+def test_migrations_are_a_no_op_once_current(app_context):
+    with db.engine.connect() as connection:
+        indexes = _index_names(connection)
+        assert get_schema_version(connection) == MIGRATIONS[-1][0]
+
+    assert run_migrations() == []
+
+    with db.engine.connect() as connection:
+        assert get_schema_version(connection) == MIGRATIONS[-1][0]
+        assert _index_names(connection) == indexes
+
+def test_migrations_add_indexes_to_an_existing_database(app_context):
+    # An app.db from before the indexes: create_all() would leave it without them
+    with db.engine.begin() as connection:
+        for table_name in ('inventory', 'transactions', 'sales'):
+            for index in db.metadata.tables[table_name].indexes:
+                index.drop(connection)
+        connection.execute(text('PRAGMA user_version = 0'))
+
+    applied = run_migrations()
+
+    assert [version for version, _ in applied] == [version for version, _, _ in MIGRATIONS]
+    with db.engine.connect() as connection:
+        assert {
+            'ix_inventory_fifo_available', 'ix_inventory_expiration_date',
+            'ix_transactions_date', 'ix_sales_sale_date'
+        } <= _index_names(connection)
+
+def test_fifo_batch_lookup_uses_partial_index(app_context, statements):
+    batch = Inventory.query.filter(Inventory.quantity > 0, Inventory.is_active == True).first()
+    statements.statements.clear()
+
+    load_candidate_batches([AllocationLine(batch.product_id, None, batch.store_id, 1, None)])
+
+    _assert_uses_index(statements, 'inventory', 'ix_inventory_fifo_available')
+
+def test_expiry_query_uses_expiration_index(app_context, statements):
+    expiry_rows(thresholds=(30,))
+
+    _assert_uses_index(statements, 'inventory', 'ix_inventory_expiration_date')
+
+def test_ledger_by_date_uses_date_index(client, statements):
+    start = (date.today() - timedelta(days=7)).isoformat()
+    response = client.get(f'/api/transactions?start_date={start}&end_date={date.today().isoformat()}&include_total=false')
+    assert response.status_code == 200
+
+    with client.application.app_context():
+        _assert_uses_index(statements, 'transactions', 'ix_transactions_date')
+
+@pytest.mark.parametrize('store_filter, index', [('', 'ix_sales_sale_date'), ('&store_id=1', 'ix_sales_store_date')])
+def test_sale_by_date_uses_date_index(client, statements, store_filter, index):
+    start = (date.today() - timedelta(days=7)).isoformat()
+    response = client.get(f'/api/sales?view=summary&start_date={start}&include_total=false{store_filter}')
+    assert response.status_code == 200
+
+    with client.application.app_context():
+        _assert_uses_index(statements, 'sales', index)
+
+def test_insert_sentinel_column_is_dropped(app_context):
+    # A database that applied migration 10 while it still added the column
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE sale_items ADD COLUMN insert_sentinel INTEGER'))
+        connection.execute(text('PRAGMA user_version = 11'))
+
+    assert 12 in [version for version, _ in run_migrations()]
+    with db.engine.connect() as connection:
+        columns = {row[1] for row in connection.execute(text('PRAGMA table_info(sale_items)'))}
+    assert 'insert_sentinel' not in columns
@@ -0,0 +1,60 @@
+import base64
+import json
+import pytest
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+ENDPOINTS = {
+    '/api/inventory': 'inventory',
+    '/api/sales': 'sales',
+    '/api/grns': 'grns',
+    '/api/stock-transfers': 'transfers',
+    '/api/transactions': 'transactions',
+}
+
+@pytest.mark.parametrize('url, key', ENDPOINTS.items())
+@pytest.mark.parametrize('per_page', [0, -5])
+def test_non_positive_per_page_returns_at_most_one_row(client, url, key, per_page):
+    response = client.get(f'{url}?cursor=&per_page={per_page}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert len(response.get_json()[key]) <= 1
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    _cursor({'id': 1}),
+    _cursor([{'id': 1}, 1]),
+    _cursor([1, 2, 3, 4, 5, 6]),
+])
+def test_malformed_cursor_is_rejected(client, url, cursor):
+    response = client.get(f'{url}?cursor={cursor}')
+    assert response.status_code == 400, response.get_data(as_text=True)
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+def test_cursor_with_wrong_date_type_is_rejected(client):
+    # The sales keyset starts with sale_date; a number there is not a datetime
+    response = client.get(f"/api/sales?cursor={_cursor([12345, 1])}")
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('query, page, per_page', [
+    ('per_page=-1', 1, 1),
+    ('per_page=0', 1, 1),
+    ('page=0&per_page=2', 1, 2),
+    ('page=-3&per_page=100000', 1, 500),
+])
+def test_supplier_report_pages_are_clamped(client, query, page, per_page):
+    response = client.get(f'/api/reports/supplier-report?{query}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+    assert (body['pagination']['page'], body['pagination']['per_page']) == (page, per_page)
+    assert body['pagination']['pages'] >= 1
+    assert len(body['suppliers']) <= per_page
+
+@pytest.mark.parametrize('url', ['/api/reports/inventory-summary', '/api/stores/1/inventory-summary'])
+def test_low_stock_pages_are_clamped(client, url):
+    response = client.get(f'{url}?page=0&per_page=-1')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+    assert (body['pagination']['page'], body['pagination']['per_page']) == (1, 1)
+    assert len(body['low_stock_products']) <= 1
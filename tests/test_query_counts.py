@@ -0,0 +1,99 @@
+from decimal import Decimal
+import pytest
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.supplier import Supplier
+from src.models.product import Product
+from src.models.inventory import Inventory
+from src.models.sale import Sale, SaleItem
+from src.models.grn import GRN, GRNItem
+from src.models.stock_transfer import StockTransfer, StockTransferItem
+from src.models.transaction import Transaction
+
+# Each scope gets its own store, supplier and user so the list endpoints can be
+# filtered down to exactly its rows. Every row points at a product of its own,
+# so a lazy load per row would show up as extra statements in the bigger scope.
+SIZES = (10, 1000)
+
+# selectinload fetches a page's item collections in IN batches of 500 parents,
+# so a page longer than that pays one more statement per batch: a fixed cost
+# per page, not per row. Pages here, plus the look-ahead row a cursor page
+# fetches, stay within one batch.
+PAGE_LIMIT = 400
+
+def _create_scope(size):
+    tag = f'qc{size}'
+    store = Store(name=f'Query count store {size}')
+    other_store = Store(name=f'Query count destination {size}')
+    supplier = Supplier(name=f'Query count supplier {size}')
+    user = User(username=tag, email=f'{tag}@example.com', role='staff')
+    user.set_password(tag)
+    db.session.add_all([store, other_store, supplier, user])
+    db.session.flush()
+
+    products = [Product(name=f'{tag} product {i}', sku=f'{tag.upper()}-{i:04d}') for i in range(size)]
+    db.session.add_all(products)
+    db.session.flush()
+
+    for i, product in enumerate(products):
+        batch = Inventory(
+            product_id=product.id, store_id=store.id, supplier_id=supplier.id,
+            batch_number=f'{tag}-B{i:04d}', quantity=10, unit_cost=Decimal('2.00')
+        )
+        sale = Sale(
+            invoice_number=f'{tag}-INV-{i:04d}', store_id=store.id, created_by=user.id,
+            subtotal=Decimal('5.00'), total_amount=Decimal('5.00')
+        )
+        sale.sale_items.append(SaleItem(
+            product_id=product.id, quantity=1, unit_price=Decimal('5.00'), line_total=Decimal('5.00')
+        ))
+        grn = GRN(grn_number=f'{tag}-GRN-{i:04d}', store_id=store.id, supplier_id=supplier.id, created_by=user.id)
+        grn.grn_items.append(GRNItem(
+            product_id=product.id, quantity_received=10, unit_cost=Decimal('2.00'), line_total=Decimal('20.00')
+        ))
+        transfer = StockTransfer(
+            transfer_number=f'{tag}-TRF-{i:04d}', from_store_id=store.id, to_store_id=other_store.id,
+            created_by=user.id
+        )
+        transfer.transfer_items.append(StockTransferItem(product_id=product.id, quantity=1))
+        ledger = Transaction(
+            product_id=product.id, store_id=store.id, quantity=10, transaction_type='purchase', user_id=user.id
+        )
+        db.session.add_all([batch, sale, grn, transfer, ledger])
+    db.session.commit()
+    return {'store_id': store.id, 'user_id': user.id}
+
+@pytest.fixture(scope='module')
+def scopes(app):
+    with app.app_context():
+        return {size: _create_scope(size) for size in SIZES}
+
+ENDPOINTS = [
+    ('/api/inventory?store_id={store_id}', 'inventory'),
+    ('/api/sales?store_id={store_id}', 'sales'),
+    ('/api/grns?store_id={store_id}', 'grns'),
+    ('/api/stock-transfers?from_store_id={store_id}', 'transfers'),
+    ('/api/transactions?user_id={user_id}', 'transactions'),
+]
+
+def _statement_count(client, statements, url, key, size):
+    per_page = min(size, PAGE_LIMIT)
+    statements.statements.clear()
+    response = client.get(f'{url}&per_page={per_page}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+    # The inventory list without a cursor is the whole filtered list, unpaged
+    items = body if isinstance(body, list) else body[key]
+    assert len(items) == (size if isinstance(body, list) else per_page)
+    return len(statements)
+
+@pytest.mark.parametrize('url, key', ENDPOINTS)
+@pytest.mark.parametrize('page', ['offset', 'cursor'])
+def test_list_statement_count_does_not_grow_with_rows(client, statements, scopes, url, key, page):
+    if page == 'cursor':
+        url += '&cursor='
+    counts = [
+        _statement_count(client, statements, url.format(**scopes[size]), key, size)
+        for size in SIZES
+    ]
+    assert counts[0] == counts[1], counts
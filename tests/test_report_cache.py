@@ -0,0 +1,112 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import sqlite3
+import time
+import pytest
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.product import Product
+from src.models.flavor import Flavor, ProductFlavor
+from src.models.inventory import Inventory
+from src.models.transaction import Transaction
+from src.services import report_cache
+
+# A day of its own, so the transaction history below lists only this module's row
+LEDGER_DAY = date(2001, 2, 3)
+
+@pytest.fixture(scope='module')
+def shop(app):
+    with app.app_context():
+        store = Store(name='Cache store')
+        product = Product(name='Cache product', sku='CACHE-1', cost_price=Decimal('3.00'))
+        flavor = Flavor(name='Cache flavor')
+        user = User(username='cache-user', email='cache-user@example.com')
+        user.set_password('cache123')
+        db.session.add_all([store, product, flavor, user])
+        db.session.flush()
+        product_flavor = ProductFlavor(product_id=product.id, flavor_id=flavor.id)
+        db.session.add(product_flavor)
+        db.session.flush()
+        db.session.add_all([
+            Inventory(product_id=product.id, product_flavor_id=product_flavor.id, store_id=store.id,
+                      batch_number='CACHE-B1', quantity=50, unit_cost=Decimal('3.00'),
+                      expiration_date=date.today() + timedelta(days=10)),
+            Transaction(product_id=product.id, store_id=store.id, user_id=user.id, quantity=5,
+                        transaction_type='adjustment', transaction_date=datetime.combine(LEDGER_DAY, datetime.min.time()))
+        ])
+        db.session.commit()
+        return {'store': store.id, 'product': product.id, 'flavor': flavor.id,
+                'product_flavor': product_flavor.id, 'user': user.id}
+
+def _expiry_url(shop):
+    return f"/api/reports/expiration-report?store_id={shop['store']}&buckets=30"
+
+def _expiring(report):
+    return report['buckets']['within_30_days']
+
+def _history_url():
+    return f'/api/reports/transaction-history?start_date={LEDGER_DAY}&end_date={LEDGER_DAY}'
+
+def _refreshed(client, url, write):
+    """Cache the report, make the write, and return the report served before and after it"""
+    client.get(url)
+    cached = client.get(url)
+    assert cached.headers['X-Cache'] == 'HIT'
+
+    response = write()
+    assert response.status_code in (200, 201), response.get_data(as_text=True)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'MISS'
+    return cached.get_json(), response.get_json()
+
+def test_store_update_refreshes_reports(client, shop):
+    _, report = _refreshed(client, _expiry_url(shop),
+                           lambda: client.put(f"/api/stores/{shop['store']}", json={'name': 'Cache store renamed'}))
+    assert [item['store_name'] for item in _expiring(report)] == ['Cache store renamed']
+
+def test_flavor_update_refreshes_reports(client, shop):
+    _, report = _refreshed(client, _expiry_url(shop),
+                           lambda: client.put(f"/api/flavors/{shop['flavor']}", json={'name': 'Cache flavor renamed'}))
+    assert [item['flavor_name'] for item in _expiring(report)] == ['Cache flavor renamed']
+
+def test_flavor_create_refreshes_reports(client, shop):
+    _refreshed(client, _expiry_url(shop), lambda: client.post('/api/flavors', json={'name': 'Cache flavor new'}))
+
+def test_user_update_refreshes_reports(client, shop):
+    _, report = _refreshed(client, _history_url(),
+                           lambda: client.put(f"/api/users/{shop['user']}", json={'username': 'cache-user-renamed'}))
+    assert [item['username'] for item in report['transactions']] == ['cache-user-renamed']
+
+def test_sale_refreshes_reports(client, shop):
+    sale = {
+        'store_id': shop['store'],
+        'payment_method': 'cash',
+        'items': [{'product_id': shop['product'], 'product_flavor_id': shop['product_flavor'],
+                   'quantity': 4, 'unit_price': '10.00'}]
+    }
+    before, after = _refreshed(client, _expiry_url(shop), lambda: client.post('/api/sales', json=sale))
+    assert _expiring(after)[0]['quantity'] == _expiring(before)[0]['quantity'] - 4
+
+def test_locked_cache_does_not_fail_the_write(app, client, shop):
+    sale = {
+        'store_id': shop['store'],
+        'payment_method': 'cash',
+        'items': [{'product_id': shop['product'], 'product_flavor_id': shop['product_flavor'],
+                   'quantity': 1, 'unit_price': '10.00'}]
+    }
+    # Another worker holding the cache's write lock
+    lock = sqlite3.connect(app.config['REPORT_CACHE_PATH'])
+    lock.execute('BEGIN EXCLUSIVE')
+    try:
+        started = time.perf_counter()
+        response = client.post('/api/sales', json=sale, headers={'Idempotency-Key': 'cache-locked-sale'})
+        assert response.status_code == 201, response.get_data(as_text=True)
+        assert time.perf_counter() - started < 2
+        assert client.get(_expiry_url(shop)).status_code == 200
+    finally:
+        lock.rollback()
+        lock.close()
+        with app.app_context():
+            report_cache.clear()
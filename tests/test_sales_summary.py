@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import pytest
+from src.models.user import db
+from src.models.store import Store
+from src.models.product import Product
+from src.models.inventory import Inventory
+
+@pytest.fixture(scope='module')
+def shop(app):
+    with app.app_context():
+        store = Store(name='Summary store')
+        products = [Product(name=f'Summary product {i}', sku=f'SUM-{i}', cost_price=Decimal('3.00')) for i in range(2)]
+        db.session.add_all([store, *products])
+        db.session.flush()
+        db.session.add_all([
+            Inventory(product_id=product.id, store_id=store.id, batch_number=f'SUM-B{i}', quantity=100,
+                      unit_cost=Decimal('3.00'))
+            for i, product in enumerate(products)
+        ])
+        db.session.commit()
+        return store.id, [product.id for product in products]
+
+def _sell(client, store_id, lines, payment_method, sale_date=None):
+    payload = {
+        'store_id': store_id,
+        'payment_method': payment_method,
+        'tax_amount': '1.00',
+        'items': [{'product_id': product_id, 'quantity': quantity, 'unit_price': '10.00'} for product_id, quantity in lines]
+    }
+    if sale_date:
+        payload['sale_date'] = sale_date.isoformat()
+    response = client.post('/api/sales', json=payload)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()['id']
+
+def test_summary_from_rollups_matches_the_sale_tables(client, shop):
+    store_id, (first, second) = shop
+    past = datetime.combine(date.today() - timedelta(days=3), datetime.min.time()) + timedelta(hours=10)
+    _sell(client, store_id, [(first, 2), (second, 1)], 'cash', past)
+    _sell(client, store_id, [(first, 1)], 'card', past + timedelta(hours=1))
+    voided = _sell(client, store_id, [(second, 4)], 'card', past + timedelta(hours=2))
+    _sell(client, store_id, [(second, 2)], 'cash')
+    assert client.post(f'/api/sales/{voided}/void').status_code == 200
+
+    since = date.today() - timedelta(days=5)
+    # A bound with a time of day is summed from the sale tables instead of the rollups
+    from_rollups = client.get(f'/api/sales/summary?store_id={store_id}&start_date={since.isoformat()}').get_json()
+    from_sales = client.get(f'/api/sales/summary?store_id={store_id}&start_date={since.isoformat()}T00:00:01').get_json()
+
+    assert from_rollups == from_sales
+    assert from_rollups['summary']['total_sales'] == 3
+    assert from_rollups['summary']['total_revenue'] == pytest.approx(63.0)
+    assert from_rollups['summary']['total_cost'] == pytest.approx(18.0)
+    assert from_rollups['payment_methods'] == {
+        'cash': {'count': 2, 'amount': pytest.approx(52.0)},
+        'card': {'count': 1, 'amount': pytest.approx(11.0)},
+    }
+    assert {product['quantity'] for product in from_rollups['top_products']} == {3}
+
+def test_summary_end_date_excludes_later_days(client, shop):
+    store_id, _ = shop
+    until = date.today() - timedelta(days=1)
+    summary = client.get(f'/api/sales/summary?store_id={store_id}&end_date={until.isoformat()}').get_json()
+    assert summary['summary']['total_sales'] == 2
+
+def test_transaction_history_rollup_keeps_ledger_counts_apart(client, shop):
+    store_id, (first, _) = shop
+    _sell(client, store_id, [(first, 2)], 'cash')
+    day = date.today().isoformat()
+
+    ledger = client.get(f'/api/reports/transaction-history?start_date={day}&end_date={day}').get_json()
+    rollup = client.get(f'/api/reports/transaction-history?start_date={day}&end_date={day}&use_rollup=true').get_json()
+
+    # Rollup rows are not ledger rows, so they stay out of the ledger counts
+    assert rollup['summary']['total_transactions'] == rollup['pagination']['total'] == ledger['pagination']['total']
+    assert 'sale' not in {entry['type'] for entry in rollup['summary']['by_type']}
+    assert rollup['summary']['sales_rollup']['product_sales'] >= 1
+    assert rollup['summary']['sales_rollup']['total_quantity'] <= -2
@@ -0,0 +1,114 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from src.models.user import db, User
+from src.models.store import Store
+from src.models.product import Product
+from src.models.inventory import Inventory
+from src.models.transaction import Transaction
+from src.models.sale import Sale
+from src.models.migrations import _sign_legacy_ledger_rows
+from src.services.valuation import batch_quantities, take_checkpoint, valuation_as_of
+
+def _product(sku):
+    product = Product(name=f'Valuation {sku}', sku=sku, cost_price=Decimal('4.00'))
+    db.session.add(product)
+    db.session.flush()
+    return product
+
+def _batch_quantity(as_of, checkpoint, direction, batch):
+    stock = batch_quantities(as_of, checkpoint, direction, product_id=batch.product_id)
+    return db.session.query(stock.c.quantity).filter(stock.c.inventory_id == batch.id).scalar()
+
+def test_checkpoint_replays_a_row_committed_after_it_but_dated_before(app_context):
+    store = Store.query.first()
+    user = User.query.filter_by(username='admin').one()
+    batch = Inventory(product_id=_product('VAL-LATE').id, store_id=store.id, batch_number='VAL-LATE-1', quantity=10)
+    db.session.add(batch)
+    db.session.commit()
+    checkpoint = take_checkpoint(user_id=user.id)
+    db.session.commit()
+
+    # A sale whose ledger row was stamped before the snapshot but written after it
+    db.session.add(Transaction(
+        product_id=batch.product_id, inventory_id=batch.id, store_id=store.id, quantity=-3,
+        transaction_type='sale', user_id=user.id, transaction_date=checkpoint.taken_at - timedelta(seconds=1)
+    ))
+    batch.quantity -= 3
+    db.session.commit()
+
+    now = datetime.utcnow()
+    assert _batch_quantity(now, checkpoint, 'forward', batch) == 7
+    assert _batch_quantity(now, None, 'backward', batch) == 7
+    # Before the checkpoint the batch still held the full 10 by the snapshot's reckoning
+    assert _batch_quantity(checkpoint.taken_at - timedelta(seconds=2), checkpoint, 'backward', batch) == 10
+
+def test_valuation_counts_batches_deleted_since(app_context):
+    store = Store.query.first()
+    user = User.query.filter_by(username='admin').one()
+    product = _product('VAL-GONE')
+    batch = Inventory(
+        product_id=product.id, store_id=store.id, batch_number='VAL-GONE-1', quantity=5, unit_cost=Decimal('4.00')
+    )
+    db.session.add(batch)
+    db.session.flush()
+    db.session.add(Transaction(product_id=product.id, inventory_id=batch.id, store_id=store.id, quantity=5,
+                               transaction_type='purchase', user_id=user.id))
+    db.session.commit()
+    as_of = datetime.utcnow()
+    time.sleep(0.01)
+
+    db.session.add(Transaction(product_id=product.id, inventory_id=batch.id, store_id=store.id, quantity=-5,
+                               transaction_type='sale', user_id=user.id))
+    batch.quantity = 0
+    db.session.commit()
+    # Removed outside the ORM, so the ledger keeps pointing at it
+    db.session.execute(Inventory.__table__.delete().where(Inventory.id == batch.id))
+    db.session.commit()
+
+    for group_by in ('batch', 'product', 'store'):
+        rows, totals, _, _ = valuation_as_of(as_of, store_id=store.id, product_id=product.id, group_by=group_by)
+        assert (totals['batches'], totals['quantity']) == (1, 5)
+        assert [row['quantity'] for row in rows] == [5]
+    assert rows[0]['store_id'] == store.id
+
+def test_legacy_ledger_rows_are_signed(app_context):
+    store = Store.query.first()
+    user = User.query.filter_by(username='admin').one()
+    product = _product('VAL-LEGACY')
+    # As written before quantities were signed: the size of each change
+    rows = [
+        Transaction(product_id=product.id, store_id=store.id, quantity=4, transaction_type='adjustment',
+                    user_id=user.id, notes='Quantity adjusted from 10 to 6'),
+        Transaction(product_id=product.id, store_id=store.id, quantity=3, transaction_type='adjustment',
+                    user_id=user.id, notes='Quantity adjusted from 6 to 9'),
+        Transaction(product_id=product.id, store_id=store.id, quantity=2, transaction_type='sale', user_id=user.id),
+        Transaction(product_id=product.id, store_id=store.id, quantity=-1, transaction_type='sale', user_id=user.id),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+
+    with db.engine.begin() as connection:
+        _sign_legacy_ledger_rows(connection)
+    db.session.expire_all()
+
+    assert [row.quantity for row in rows] == [-4, 3, -2, -1]
+
+def test_valuation_before_a_legacy_void_is_flagged(client):
+    with client.application.app_context():
+        store = Store(name='Legacy void store')
+        db.session.add(store)
+        db.session.flush()
+        # Voided before voids wrote return rows to the ledger
+        db.session.add(Sale(
+            invoice_number='LEGACY-VOID-1', store_id=store.id, sale_date=datetime(2020, 1, 1, 9),
+            payment_status='voided', notes='\nVoided on 2020-01-02 10:00:00',
+            created_by=User.query.filter_by(username='admin').one().id
+        ))
+        db.session.commit()
+
+    before = client.get('/api/inventory/valuation?as_of=2020-01-02T09:00:00').get_json()
+    after = client.get('/api/inventory/valuation?as_of=2020-01-02T11:00:00').get_json()
+
+    assert before['warning'].startswith('Sales voided up to 2020-01-02T10:00:00')
+    assert 'warning' not in after